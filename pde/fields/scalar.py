@@ -146,7 +146,7 @@ class ScalarField(DataFieldBase):
     @fill_in_docstring
     def laplace(self, bc: "BoundariesData",
                 out: Optional['ScalarField'] = None,
-                label: str = 'laplace') -> 'ScalarField':
+                label: str = 'laplace', **kwargs) -> 'ScalarField':
         """ apply Laplace operator and return result as a field 
         
         Args:
@@ -157,13 +157,15 @@ class ScalarField(DataFieldBase):
                 Optional scalar field to which the  result is written.
             label (str, optional):
                 Name of the returned field
+            **kwargs:
+                Additional arguments for the operator, e.g., `method`
             
         Returns:
             ScalarField: the result of applying the operator 
         """
         if out is not None:
             assert isinstance(out, ScalarField)
-        laplace = self.grid.get_operator('laplace', bc=bc)
+        laplace = self.grid.get_operator('laplace', bc=bc, **kwargs)
         return self.apply(laplace, out=out, label=label)
 
         
@@ -204,7 +206,7 @@ class ScalarField(DataFieldBase):
     @fill_in_docstring
     def gradient(self, bc: "BoundariesData",
                  out: Optional['VectorField'] = None,
-                 label: str = 'gradient') -> 'VectorField':
+                 label: str = 'gradient', **kwargs) -> 'VectorField':
         """ apply gradient operator and return result as a field 
         
         Args:
@@ -215,13 +217,15 @@ class ScalarField(DataFieldBase):
                 Optional vector field to which the result is written.
             label (str, optional):
                 Name of the returned field
+            **kwargs:
+                Additional arguments for the operator, e.g., `method`
             
         Returns:
             VectorField: the result of applying the operator 
         """
         from .vectorial import VectorField  # @Reimport
         
-        gradient = self.grid.get_operator('gradient', bc=bc)
+        gradient = self.grid.get_operator('gradient', bc=bc, **kwargs)
         if out is None:
             out = VectorField(self.grid, gradient(self.data), label=label)
         else:
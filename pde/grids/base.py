@@ -112,6 +112,9 @@ class GridBase(metaclass=ABCMeta):
     
     _subclasses: Dict[str, 'GridBase'] = {}  # all classes inheriting from this
     _operators: Dict[str, Operator] = {}  # all operators defined for the grid
+    # functions called with `(grid, name, bc, operator)` whenever an operator
+    # is requested, which is for instance used to profile simulations
+    _operator_listeners: List[Callable] = []
     
     # properties that are defined in subclasses
     dim: int  # int: The spatial dimension in which the grid is embedded
@@ -448,7 +451,6 @@ class GridBase(metaclass=ABCMeta):
         return result
             
 
-    @cached_method()
     @fill_in_docstring
     def get_operator(self, name: str,
                      bc: "Boundaries",
@@ -475,6 +477,20 @@ class GridBase(metaclass=ABCMeta):
             function optionally supports a second argument, which provides
             allocated memory for the output.
         """
+        operator = self._get_operator(name, bc, **kwargs)
+        for listener in GridBase._operator_listeners:
+            listener(self, name, bc, operator)
+        return operator
+            
+
+    @cached_method()
+    def _get_operator(self, name: str,
+                      bc: "Boundaries",
+                      **kwargs) -> Callable:
+        """ create a discretized operator defined on this grid
+        
+        This method caches the operators returned by :meth:`get_operator`
+        """
         # obtain all parent classes, except `object`
         classes = inspect.getmro(self.__class__)[:-1]
         for cls in classes:
@@ -491,6 +507,65 @@ class GridBase(metaclass=ABCMeta):
                          "the `register_operator` method.")
             
 
+    @cached_method()
+    @fill_in_docstring
+    def get_operator_matrix(self, name: str,
+                            bc: "Boundaries",
+                            radius: int = 2,
+                            **kwargs) -> Tuple[Any, np.ndarray]:
+        """ return the sparse matrix representing a discretized operator
+        
+        The matrix is assembled by applying the operator to perturbations of
+        support points that do not interact, so this works for all linear
+        operators on all grids. Applying the operator to the flattened data
+        `arr` is then equivalent to `matrix @ arr + vector`, where the vector
+        captures inhomogeneous boundary conditions.
+         
+        Args:
+            name (str):
+                Identifier for the operator. Some examples are 'laplace',
+                'gradient', or 'divergence'.
+            bc (str or list or tuple or dict):
+                The boundary conditions applied to the field.
+                {ARG_BOUNDARIES}
+            radius (int):
+                The maximal distance (in support points) over which the operator
+                couples data. Couplings over larger distances are missed.
+            **kwargs:
+                Specifies extra arguments that can influence how the operator
+                is created.
+                 
+        Returns:
+            tuple: The sparse matrix in CSC format and the dense vector
+            describing the constant part of the operator
+        """
+        from .operators.common import estimate_sparse_jacobian
+        
+        # determine the shape of the input data
+        for cls in inspect.getmro(self.__class__)[:-1]:
+            if name in cls._operators:  # type: ignore
+                rank_in = cls._operators[name].rank_in  # type: ignore
+                break
+        else:
+            rank_in = 0  # let get_operator raise the appropriate error
+        operator = self.get_operator(name, bc=bc, **kwargs)
+        shape_in = (self.dim,) * rank_in + self.shape
+        
+        def apply(arr: np.ndarray) -> np.ndarray:
+            """ apply the operator to flattened data """
+            return operator(arr.reshape(shape_in)).ravel()
+        
+        matrix, vector = estimate_sparse_jacobian(apply, np.zeros(shape_in),
+                                                  self, radius=radius, eps=1)
+        
+        # check whether the matrix represents the operator
+        arr = np.random.default_rng().random(shape_in)
+        if not np.allclose(matrix.dot(arr.flat) + vector, apply(arr)):
+            raise ValueError(f'Operator `{name}` is not linear or couples '
+                             f'support points further apart than {radius}')
+        return matrix, vector.ravel()
+    
+
     def get_subgrid(self, indices: Sequence[int]) -> "GridBase":
         """ return a subgrid of only the specified axes """
         raise NotImplementedError('Subgrids are not implemented for class '
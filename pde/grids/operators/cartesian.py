@@ -10,6 +10,8 @@ This module implements differential operators on Cartesian grids
    make_vector_gradient
    make_vector_laplace
    make_tensor_divergence
+   make_laplace_point
+   make_gradient_squared_point
    
    
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>   
@@ -19,14 +21,17 @@ from typing import Callable, Tuple, Any
 
 import numba as nb
 import numpy as np
+from numba.extending import register_jitable
 from scipy import ndimage, sparse
 
 from .common import (make_laplace_from_matrix, make_general_poisson_solver,
+                     estimate_sparse_jacobian,
                      PARALLELIZATION_THRESHOLD_2D, PARALLELIZATION_THRESHOLD_3D)
 from ..boundaries import Boundaries
 from ..cartesian import CartesianGridBase
 from ...tools.numba import jit_allocate_out
 from ...tools.docstrings import fill_in_docstring
+from ...tools.spectral import np_rfftn, np_irfftn, get_wave_vectors
 
 
 
@@ -424,6 +429,56 @@ def _make_laplace_numba_3d(bcs: Boundaries) -> Callable:
 
 
 
+def _get_spectral_wave_vectors(bcs: Boundaries, zero_nyquist: bool = False) \
+        -> Tuple[np.ndarray, ...]:
+    """ return the wave vectors for spectral operators
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            The boundary conditions, which need to be periodic along all axes
+        zero_nyquist (bool):
+            Whether the Nyquist mode is removed, which is necessary for
+            operators involving odd derivatives
+        
+    Returns:
+        tuple: The wave vector components along all axes
+    """
+    grid = bcs.grid
+    if not all(grid.periodic):
+        raise ValueError('Spectral operators require periodic boundary '
+                         'conditions along all axes')
+    return get_wave_vectors(tuple(grid.shape),
+                            tuple(float(dx) for dx in grid.discretization),
+                            zero_nyquist=zero_nyquist)
+
+
+
+@fill_in_docstring
+def _make_laplace_spectral(bcs: Boundaries) -> Callable:
+    """ make a laplace operator using fast Fourier transforms
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        
+    Returns:
+        A function that can be applied to an array of values
+    """
+    shape = bcs.grid.shape
+    k2s = sum(k**2 for k in _get_spectral_wave_vectors(bcs))
+    
+    def laplace(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ apply laplace operator to array `arr` """
+        result = np_irfftn(-k2s * np_rfftn(arr), shape)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    
+    return laplace
+
+
+
 @CartesianGridBase.register_operator('laplace', rank_in=0, rank_out=0)
 @fill_in_docstring
 def make_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
@@ -433,7 +488,10 @@ def make_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
         bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
             {ARG_BOUNDARIES_INSTANCE}
         method (str): Method used for calculating the laplace operator.
-            If method='auto', a suitable method is chosen automatically.
+            If method='auto', a suitable method is chosen automatically. The
+            method 'spectral' uses fast Fourier transforms and requires periodic
+            boundary conditions along all axes. The resulting function is not
+            compiled and can thus not be used by compiled functions.
         
     Returns:
         A function that can be applied to an array of values
@@ -465,6 +523,9 @@ def make_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
     elif method == 'scipy':
         laplace = _make_laplace_scipy_nd(bcs)
         
+    elif method == 'spectral':
+        laplace = _make_laplace_spectral(bcs)
+        
     else:
         raise ValueError(f'Method `{method}` is not defined')
         
@@ -606,6 +667,34 @@ def _make_gradient_numba_3d(bcs: Boundaries) -> Callable:
 
 
 
+@fill_in_docstring
+def _make_gradient_spectral(bcs: Boundaries) -> Callable:
+    """ make a gradient operator using fast Fourier transforms
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        
+    Returns:
+        A function that can be applied to an array of values
+    """
+    dim = bcs.grid.dim
+    shape = bcs.grid.shape
+    iks = [1j * k for k in _get_spectral_wave_vectors(bcs, zero_nyquist=True)]
+    
+    def gradient(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ apply gradient operator to array `arr` """
+        if out is None:
+            out = np.empty((dim,) + shape)
+        arr_k = np_rfftn(arr)
+        for i in range(dim):
+            out[i] = np_irfftn(iks[i] * arr_k, shape)
+        return out
+    
+    return gradient
+
+
+
 @CartesianGridBase.register_operator('gradient', rank_in=0, rank_out=1)
 @fill_in_docstring
 def make_gradient(bcs: Boundaries, method: str = 'auto') -> Callable:
@@ -615,7 +704,10 @@ def make_gradient(bcs: Boundaries, method: str = 'auto') -> Callable:
         bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
             {ARG_BOUNDARIES_INSTANCE}
         method (str): Method used for calculating the gradient operator.
-            If method='auto', a suitable method is chosen automatically.
+            If method='auto', a suitable method is chosen automatically. The
+            method 'spectral' uses fast Fourier transforms and requires periodic
+            boundary conditions along all axes. The resulting function is not
+            compiled and can thus not be used by compiled functions.
         
     Returns:
         A function that can be applied to an array of values
@@ -644,6 +736,9 @@ def make_gradient(bcs: Boundaries, method: str = 'auto') -> Callable:
     elif method == 'scipy':
         gradient = _make_gradient_scipy_nd(bcs)
         
+    elif method == 'spectral':
+        gradient = _make_gradient_spectral(bcs)
+        
     else:
         raise ValueError(f'Method `{method}` is not defined')
         
@@ -1022,6 +1117,35 @@ def _make_divergence_numba_3d(bcs: Boundaries) -> Callable:
 
 
 
+@fill_in_docstring
+def _make_divergence_spectral(bcs: Boundaries) -> Callable:
+    """ make a divergence operator using fast Fourier transforms
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        
+    Returns:
+        A function that can be applied to an array of values
+    """
+    dim = bcs.grid.dim
+    shape = bcs.grid.shape
+    axes = tuple(range(1, dim + 1))
+    iks = [1j * k for k in _get_spectral_wave_vectors(bcs, zero_nyquist=True)]
+    
+    def divergence(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ apply divergence operator to array `arr` """
+        arr_k = np_rfftn(arr, axes=axes)
+        result = np_irfftn(sum(iks[i] * arr_k[i] for i in range(dim)), shape)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    
+    return divergence
+
+
+
 @CartesianGridBase.register_operator('divergence', rank_in=1, rank_out=0)
 @fill_in_docstring
 def make_divergence(bcs: Boundaries, method: str = 'auto') -> Callable:
@@ -1031,7 +1155,10 @@ def make_divergence(bcs: Boundaries, method: str = 'auto') -> Callable:
         bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
             {ARG_BOUNDARIES_INSTANCE}
         method (str): Method used for calculating the divergence operator.
-            If method='auto', a suitable method is chosen automatically.
+            If method='auto', a suitable method is chosen automatically. The
+            method 'spectral' uses fast Fourier transforms and requires periodic
+            boundary conditions along all axes. The resulting function is not
+            compiled and can thus not be used by compiled functions.
         
     Returns:
         A function that can be applied to an array of values
@@ -1060,6 +1187,9 @@ def make_divergence(bcs: Boundaries, method: str = 'auto') -> Callable:
     elif method == 'scipy':
         divergence = _make_divergence_scipy_nd(bcs)
         
+    elif method == 'spectral':
+        divergence = _make_divergence_spectral(bcs)
+        
     else:
         raise ValueError(f'Method `{method}` is not defined')
         
@@ -1325,6 +1455,34 @@ def _make_vector_laplace_numba_3d(bcs: Boundaries) -> Callable:
 
 
 
+@fill_in_docstring
+def _make_vector_laplace_spectral(bcs: Boundaries) -> Callable:
+    """ make a vector Laplacian using fast Fourier transforms
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        
+    Returns:
+        A function that can be applied to an array of values
+    """
+    dim = bcs.grid.dim
+    shape = bcs.grid.shape
+    axes = tuple(range(1, dim + 1))
+    k2s = sum(k**2 for k in _get_spectral_wave_vectors(bcs))
+    
+    def vector_laplace(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ apply vector Laplacian to array `arr` """
+        result = np_irfftn(-k2s * np_rfftn(arr, axes=axes), shape, axes=axes)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    
+    return vector_laplace
+
+
+
 @CartesianGridBase.register_operator('vector_laplace', rank_in=1, rank_out=1)
 @fill_in_docstring
 def make_vector_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
@@ -1334,7 +1492,10 @@ def make_vector_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
         bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
             {ARG_BOUNDARIES_INSTANCE}
         method (str): Method used for calculating the vector laplace operator.
-            If method='auto', a suitable method is chosen automatically.
+            If method='auto', a suitable method is chosen automatically. The
+            method 'spectral' uses fast Fourier transforms and requires periodic
+            boundary conditions along all axes. The resulting function is not
+            compiled and can thus not be used by compiled functions.
         
     Returns:
         A function that can be applied to an array of values
@@ -1362,6 +1523,8 @@ def make_vector_laplace(bcs: Boundaries, method: str = 'auto') -> Callable:
                                       
     elif method == 'scipy':
         gradient = _make_vector_laplace_scipy_nd(bcs)
+    elif method == 'spectral':
+        gradient = _make_vector_laplace_spectral(bcs)
     else:
         raise ValueError(f'Method `{method}` is not defined')
         
@@ -1525,6 +1688,239 @@ def make_tensor_divergence(bcs: Boundaries, method: str = 'auto') -> Callable:
 
 
 
+@fill_in_docstring
+def make_laplace_point(bcs: Boundaries, interior: bool = False) -> Callable:
+    """ make a function evaluating the laplace operator at a single point
+    
+    In contrast to :func:`make_laplace`, the returned function does not operate
+    on the full array, but only returns the value at a single support point.
+    This allows combining the stencil with other expressions in a single pass
+    over the grid.
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        interior (bool):
+            If True, the returned function ignores the boundary conditions and
+            must thus only be called for points that are not adjacent to the
+            boundary. This avoids any branching in the stencil.
+        
+    Returns:
+        A function with signature `(arr, *idx)`, which can be called from
+        compiled code. Here, `idx` are the integer indices of the point.
+    """
+    dim = bcs.grid.dim
+    bcs.check_value_rank(0)
+    scales = bcs.grid.discretization**-2
+    
+    if dim == 1:
+        scale_x, = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int) -> float:
+                """ evaluate laplace operator at point `i` """
+                return (arr[i - 1] - 2 * arr[i] + arr[i + 1]) * scale_x
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+            
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int) -> float:
+                """ evaluate laplace operator at point `i` """
+                arr_x_l, arr_c, arr_x_h = region_x(arr, (i,))
+                return (arr_x_l - 2 * arr_c + arr_x_h) * scale_x
+        
+    elif dim == 2:
+        scale_x, scale_y = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int, j: int) -> float:
+                """ evaluate laplace operator at point `(i, j)` """
+                arr_c = arr[i, j]
+                return ((arr[i - 1, j] - 2 * arr_c + arr[i + 1, j]) * scale_x +
+                        (arr[i, j - 1] - 2 * arr_c + arr[i, j + 1]) * scale_y)
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+            region_y = bcs[1].make_region_evaluator()
+            
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int, j: int) -> float:
+                """ evaluate laplace operator at point `(i, j)` """
+                arr_x_l, arr_c, arr_x_h = region_x(arr, (i, j))
+                arr_y_l, _, arr_y_h = region_y(arr, (i, j))
+                return ((arr_x_l - 2 * arr_c + arr_x_h) * scale_x +
+                        (arr_y_l - 2 * arr_c + arr_y_h) * scale_y)
+        
+    elif dim == 3:
+        scale_x, scale_y, scale_z = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int, j: int, k: int) -> float:
+                """ evaluate laplace operator at point `(i, j, k)` """
+                arr_c = arr[i, j, k]
+                lap_x = arr[i - 1, j, k] - 2 * arr_c + arr[i + 1, j, k]
+                lap_y = arr[i, j - 1, k] - 2 * arr_c + arr[i, j + 1, k]
+                lap_z = arr[i, j, k - 1] - 2 * arr_c + arr[i, j, k + 1]
+                return lap_x * scale_x + lap_y * scale_y + lap_z * scale_z
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+            region_y = bcs[1].make_region_evaluator()
+            region_z = bcs[2].make_region_evaluator()
+        
+            @register_jitable(inline='always')
+            def laplace_point(arr, i: int, j: int, k: int) -> float:
+                """ evaluate laplace operator at point `(i, j, k)` """
+                arr_x_l, arr_c, arr_x_h = region_x(arr, (i, j, k))
+                arr_y_l, _, arr_y_h = region_y(arr, (i, j, k))
+                arr_z_l, _, arr_z_h = region_z(arr, (i, j, k))
+                return ((arr_x_l - 2 * arr_c + arr_x_h) * scale_x +
+                        (arr_y_l - 2 * arr_c + arr_y_h) * scale_y +
+                        (arr_z_l - 2 * arr_c + arr_z_h) * scale_z)
+        
+    else:
+        raise NotImplementedError('Point-wise laplace operator is not '
+                                  f'implemented for dimension {dim}')
+        
+    return laplace_point  # type: ignore
+    
+
+
+@fill_in_docstring
+def make_gradient_squared_point(bcs: Boundaries, interior: bool = False) \
+        -> Callable:
+    """ make a function evaluating the squared gradient at a single point
+    
+    The gradient is approximated using central differences, consistent with the
+    default of :func:`make_gradient_squared`.
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        interior (bool):
+            If True, the returned function ignores the boundary conditions and
+            must thus only be called for points that are not adjacent to the
+            boundary. This avoids any branching in the stencil.
+        
+    Returns:
+        A function with signature `(arr, *idx)`, which can be called from
+        compiled code. Here, `idx` are the integer indices of the point.
+    """
+    dim = bcs.grid.dim
+    bcs.check_value_rank(0)
+    scales = 1 / (2 * bcs.grid.discretization)**2
+    
+    if dim == 1:
+        scale_x, = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int) -> float:
+                """ evaluate squared gradient at point `i` """
+                return (arr[i + 1] - arr[i - 1])**2 * scale_x
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+        
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int) -> float:
+                """ evaluate squared gradient at point `i` """
+                arr_x_l, _, arr_x_h = region_x(arr, (i,))
+                return (arr_x_h - arr_x_l)**2 * scale_x
+        
+    elif dim == 2:
+        scale_x, scale_y = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int, j: int) -> float:
+                """ evaluate squared gradient at point `(i, j)` """
+                return ((arr[i + 1, j] - arr[i - 1, j])**2 * scale_x +
+                        (arr[i, j + 1] - arr[i, j - 1])**2 * scale_y)
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+            region_y = bcs[1].make_region_evaluator()
+        
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int, j: int) -> float:
+                """ evaluate squared gradient at point `(i, j)` """
+                arr_x_l, _, arr_x_h = region_x(arr, (i, j))
+                arr_y_l, _, arr_y_h = region_y(arr, (i, j))
+                return ((arr_x_h - arr_x_l)**2 * scale_x +
+                        (arr_y_h - arr_y_l)**2 * scale_y)
+        
+    elif dim == 3:
+        scale_x, scale_y, scale_z = scales
+        
+        if interior:
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int, j: int, k: int) -> float:
+                """ evaluate squared gradient at point `(i, j, k)` """
+                return ((arr[i + 1, j, k] - arr[i - 1, j, k])**2 * scale_x +
+                        (arr[i, j + 1, k] - arr[i, j - 1, k])**2 * scale_y +
+                        (arr[i, j, k + 1] - arr[i, j, k - 1])**2 * scale_z)
+            
+        else:
+            region_x = bcs[0].make_region_evaluator()
+            region_y = bcs[1].make_region_evaluator()
+            region_z = bcs[2].make_region_evaluator()
+        
+            @register_jitable(inline='always')
+            def gradient_squared_point(arr, i: int, j: int, k: int) -> float:
+                """ evaluate squared gradient at point `(i, j, k)` """
+                arr_x_l, _, arr_x_h = region_x(arr, (i, j, k))
+                arr_y_l, _, arr_y_h = region_y(arr, (i, j, k))
+                arr_z_l, _, arr_z_h = region_z(arr, (i, j, k))
+                return ((arr_x_h - arr_x_l)**2 * scale_x +
+                        (arr_y_h - arr_y_l)**2 * scale_y +
+                        (arr_z_h - arr_z_l)**2 * scale_z)
+        
+    else:
+        raise NotImplementedError('Point-wise squared gradient operator is '
+                                  f'not implemented for dimension {dim}')
+        
+    return gradient_squared_point  # type: ignore
+
+
+
+@fill_in_docstring
+def _make_poisson_solver_spectral(bcs: Boundaries) -> Callable:
+    """ make a operator that solves Poisson's equation using fast Fourier
+    transforms
+    
+    Args:
+        bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
+            {ARG_BOUNDARIES_INSTANCE}
+        
+    Returns:
+        A function that can be applied to an array of values
+    """
+    shape = bcs.grid.shape
+    k2s = sum(k**2 for k in _get_spectral_wave_vectors(bcs))
+    k2s_inv = np.zeros_like(k2s)
+    k2s_inv[k2s != 0] = -1 / k2s[k2s != 0]  # the mean of the solution vanishes
+    
+    def solve_poisson(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ solves Poisson's equation using fast Fourier transforms """
+        arr_k = np_rfftn(arr)
+        if not np.isclose(arr_k.flat[0] / arr.size, 0, atol=1e-5):
+            # periodic problems can only be solved if the mean vanishes
+            raise RuntimeError('Poisson problem could not be solved')
+        result = np_irfftn(k2s_inv * arr_k, shape)
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    
+    return solve_poisson
+
+
+
 @CartesianGridBase.register_operator('poisson_solver', rank_in=0, rank_out=0)
 @fill_in_docstring
 def make_poisson_solver(bcs: Boundaries, method: str = 'auto') -> Callable:
@@ -1533,14 +1929,26 @@ def make_poisson_solver(bcs: Boundaries, method: str = 'auto') -> Callable:
     Args:
         bcs (:class:`~pde.grids.boundaries.axes.Boundaries`):
             {ARG_BOUNDARIES_INSTANCE}
-        method (str): Method used for calculating the tensor divergence
-            operator. If method='auto', a suitable method is chosen
-            automatically.
+        method (str): Method used for solving the Poisson problem. If
+            method='auto', a suitable method is chosen automatically. The method
+            'spectral' uses fast Fourier transforms and requires periodic
+            boundary conditions along all axes. The resulting function is not
+            compiled. All other methods are described
+            in :func:`~pde.grids.operators.common.make_general_poisson_solver`.
         
     Returns:
         A function that can be applied to an array of values
     """
-    matrix, vector = _get_laplace_matrix(bcs)
+    if method == 'spectral':
+        return _make_poisson_solver_spectral(bcs)
+    if bcs.grid.dim <= 2:
+        matrix, vector = _get_laplace_matrix(bcs)
+    else:
+        # assemble the matrix from the operator for higher dimensions
+        laplace = make_laplace(bcs)
+        matrix, vector = estimate_sparse_jacobian(
+            laplace, np.zeros(bcs.grid.shape), bcs.grid, radius=1, eps=1)
+        vector = vector.ravel()
     return make_general_poisson_solver(matrix, vector, method)
 
 
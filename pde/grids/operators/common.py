@@ -4,12 +4,17 @@ Common functions that are used by many operators
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
-from typing import Callable
+from typing import Callable, List, Tuple, Dict, Any, TYPE_CHECKING
+import inspect
 import logging
-import warnings
 
 import numpy as np
 from scipy import sparse
+from scipy.sparse import linalg  # @UnusedImport
+
+
+if TYPE_CHECKING:
+    from ..base import GridBase  # @UnusedImport
 
 
 
@@ -22,6 +27,9 @@ PARALLELIZATION_THRESHOLD_3D = 64
 """ int: threshold for determining when parallel code is created for
 differential operators. The value gives the minimal number of support points in
 each direction for a 3-dimensional grid """
+POISSON_DIRECT_SOLVER_MAX_SIZE = 2**17
+""" int: maximal number of support points for which Poisson problems are solved
+using a direct solver if the method is chosen automatically """
 
 
 
@@ -61,10 +69,107 @@ def make_laplace_from_matrix(matrix, vector) -> Callable:
 
 
 
+def krylov_tolerance(solver: Callable, rtol: float) -> Dict[str, float]:
+    """ return the keyword argument setting the relative tolerance of `solver`
+    
+    Recent versions of :mod:`scipy` call the relative tolerance of the Krylov
+    solvers `rtol` and deprecate the old name `tol`, which is the only one
+    supported by older versions.
+    
+    Args:
+        solver (callable): A Krylov solver from :mod:`scipy.sparse.linalg`
+        rtol (float): The relative tolerance
+        
+    Returns:
+        dict: The keyword argument that can be passed to `solver`
+    """
+    try:
+        parameters = inspect.signature(solver).parameters
+    except (TypeError, ValueError):
+        parameters = {}  # type: ignore
+    if 'rtol' in parameters:
+        return {'rtol': rtol}
+    else:
+        return {'tol': rtol}
+
+
+
+def _make_preconditioner(matrix, method: str):
+    """ make a preconditioner for iterative solvers
+    
+    Args:
+        matrix: The sparse matrix describing the linear system
+        method (str): The name of the iterative solver, which determines what
+            preconditioners are admissible
+        
+    Returns:
+        A preconditioner based on algebraic multigrid if :mod:`pyamg` is
+        available. Otherwise, a Jacobi preconditioner is used for the method
+        'cg', which requires a symmetric preconditioner, and an incomplete LU
+        factorization for all other methods.
+    """
+    try:
+        import pyamg
+    except ImportError:
+        if method == 'cg':
+            diag = sparse.csc_matrix(matrix).diagonal()
+            diag[diag == 0] = 1
+            logger.info('Use Jacobi preconditioner')
+            return sparse.linalg.LinearOperator(matrix.shape,
+                                                lambda x: x / diag)
+        ilu = sparse.linalg.spilu(sparse.csc_matrix(matrix))
+        logger.info('Use incomplete LU factorization as preconditioner')
+        return sparse.linalg.LinearOperator(matrix.shape, ilu.solve)
+    else:
+        logger.info('Use algebraic multigrid as preconditioner')
+        ml = pyamg.smoothed_aggregation_solver(sparse.csr_matrix(matrix))
+        return ml.aspreconditioner()
+    
+    
+    
+def _make_iterative_solver(method: str, matrix, precond, cache: Dict) \
+        -> Callable:
+    """ make a function solving a linear system iteratively
+    
+    Args:
+        method (str): The name of the iterative solver in
+            :mod:`scipy.sparse.linalg`
+        matrix: The sparse matrix describing the linear system
+        precond: The preconditioner
+        cache (dict): Dictionary in which the last solution is stored, which
+            is used as the initial guess for the next call
+        
+    Returns:
+        A function that returns the solution for a given right hand side
+    """
+    iterative = getattr(sparse.linalg, method)
+    tolerance = krylov_tolerance(iterative, 1e-10)
+    
+    def solver(rhs: np.ndarray) -> np.ndarray:
+        """ solve the linear system iteratively """
+        x0 = cache.get('last_solution')
+        result, info = iterative(matrix, rhs, x0=x0, M=precond, atol=0,
+                                 **tolerance)
+        if info != 0:
+            logger.warning('Iterative solver did not converge')
+        cache['last_solution'] = result
+        return result
+    
+    return solver
+    
+    
+
 def make_general_poisson_solver(matrix, vector, method: str = 'auto') \
         -> Callable:
     """ make an operator that solves Poisson's problem
 
+    The matrix is factorized (or the preconditioner is constructed) when the
+    returned function is called for the first time and the result is reused in
+    all subsequent calls. Singular problems, which arise for pure Neumann or
+    periodic boundary conditions, are handled by projecting the right hand side
+    onto the range of the matrix and returning the solution with vanishing
+    mean.
+
     Args:
         matrix:
             The (sparse) matrix representing the laplace operator on the given
@@ -73,55 +178,116 @@ def make_general_poisson_solver(matrix, vector, method: str = 'auto') \
             The constant part representing the boundary conditions of the
             Laplace operator.
         method (str):
-            The chosen method for implementing the operator
+            The chosen method for implementing the operator. Possible values
+            are 'direct' (or the synonym 'scipy') for a sparse LU factorization,
+            and 'cg' or 'bicgstab' for the respective iterative solvers, which
+            are preconditioned using algebraic multigrid if :mod:`pyamg` is
+            available and an incomplete LU factorization otherwise. 'auto'
+            chooses the direct method for small problems and an iterative
+            method otherwise.
         
     Returns:
         A function that can be applied to an array of values to obtain the
         solution to Poisson's equation where the array is used as the right hand
         side
     """
-    if method not in {'auto', 'scipy'}:
+    if method not in {'auto', 'scipy', 'direct', 'cg', 'bicgstab'}:
         raise ValueError(f'Method {method} is not available')
     
     # prepare the matrix representing the operator
-    mat = matrix.tocsc()
-    vec = vector.toarray()[:, 0]
+    mat = sparse.csc_matrix(matrix)
+    if sparse.issparse(vector):
+        vec = vector.toarray()[:, 0]
+    else:
+        vec = np.ravel(vector)
+    size = mat.shape[0]
+    symmetric = abs(mat - mat.T).max() < 1e-10 * abs(mat).max()
     
-    def solve_poisson(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
-        """ solves Poisson's equation using sparse linear algebra """
-        # prepare the right hand side vector
-        rhs = arr.flat - vec
+    if method == 'auto':
+        method = 'direct' if size <= POISSON_DIRECT_SOLVER_MAX_SIZE else 'cg'
+    elif method == 'scipy':
+        method = 'direct'
+    if method == 'cg' and not symmetric:
+        logger.info('Use BiCGStab since the matrix is not symmetric')
+        method = 'bicgstab'
+    
+    # The constant vector is in the nullspace of the matrix for pure Neumann or
+    # periodic conditions. The singular matrix is then regularized by pinning
+    # the first entry, which does not affect the solution as long as the right
+    # hand side is orthogonal to the left nullspace.
+    singular = np.allclose(mat.dot(np.ones(size)), 0)
+    if singular:
+        pin = sparse.csc_matrix(([mat[0, 0]], ([0], [0])), shape=(size, size))
+        mat_reg = (mat + pin).tocsc()
+    else:
+        mat_reg = mat
+    
+    cache: Dict[str, Any] = {}  # cache for factorizations and preconditioners
+    
+    def get_left_nullspace() -> np.ndarray:
+        """ determine the normalized left nullspace of a singular matrix """
+        if 'nullspace' not in cache:
+            if symmetric:
+                null = np.ones(size)
+            else:
+                # solve mat.T @ null = 0 with the constraint null[0] = 1
+                mat_t = sparse.lil_matrix(mat.T)
+                mat_t[0, :] = 0
+                mat_t[0, 0] = 1
+                rhs = np.zeros(size)
+                rhs[0] = 1
+                null = sparse.linalg.spsolve(mat_t.tocsc(), rhs)
+            cache['nullspace'] = null / np.linalg.norm(null)
+        return cache['nullspace']  # type: ignore
+    
+    def get_solver() -> Callable:
+        """ return a function solving the regularized linear system """
+        if 'solver' in cache:
+            return cache['solver']  # type: ignore
         
-        # solve the linear problem using a sparse solver
         try:
-            with warnings.catch_warnings():
-                warnings.simplefilter("error")  # enable warning catching
-                result = sparse.linalg.spsolve(mat, rhs)
+            if method == 'direct':
+                solver = sparse.linalg.factorized(mat_reg)
+                logger.info('Factorized Poisson problem')
+            else:
+                precond = _make_preconditioner(mat_reg, method)
+                solver = _make_iterative_solver(method, mat_reg, precond, cache)
                 
-        except sparse.linalg.dsolve.linsolve.MatrixRankWarning:
-            # this can happen for singular laplace matrix, e.g. when pure
-            # Neumann conditions are considered. In this case, a solution is
-            # obtained using least squares
+        except RuntimeError:
+            # this can happen for singular laplace matrix that is not captured
+            # by the regularization. In this case, a solution is obtained using
+            # least squares
             logger.warning('Poisson problem seems to be under-determined and '
-                           'could not be solved using sparse.linalg.spsolve')
-            use_leastsquares = True
+                           'is solved using sparse.linalg.lsmr')
             
-        else:
-            # test whether the solution is good enough
-            if np.allclose(mat.dot(result), rhs, rtol=1e-5, atol=1e-5):
-                logger.info('Solved Poisson problem with sparse.linalg.spsolve')
-                use_leastsquares = False
-            else:
-                logger.warning('Poisson problem was not solved using '
-                               'sparse.linalg.spsolve')
-                use_leastsquares = True
-                
-        if use_leastsquares:
-            # use least squares to solve an underdetermined problem
-            result = sparse.linalg.lsmr(mat, rhs)[0]
-            if not np.allclose(mat.dot(result), rhs, rtol=1e-5, atol=1e-5):
+            def solver(rhs: np.ndarray) -> np.ndarray:
+                """ solve the linear system using least squares """
+                return sparse.linalg.lsmr(mat, rhs)[0]
+            
+        cache['solver'] = solver
+        return solver  # type: ignore
+            
+    def solve_poisson(arr: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """ solves Poisson's equation using sparse linear algebra """
+        # prepare the right hand side vector
+        rhs = arr.flat - vec
+        
+        if singular:
+            # project the right hand side onto the range of the matrix
+            null = get_left_nullspace()
+            correction = null * null.dot(rhs)
+            if not np.allclose(correction, 0, rtol=1e-5, atol=1e-5):
                 raise RuntimeError('Poisson problem could not be solved')
-            logger.info('Solved Poisson problem with sparse.linalg.lsmr')
+            rhs = rhs - correction
+        
+        # solve the linear problem using the cached solver
+        result = get_solver()(rhs)
+        if singular:
+            result -= result.mean()  # choose solution with vanishing mean
+        
+        # test whether the solution is good enough
+        if not np.allclose(mat.dot(result), rhs, rtol=1e-5, atol=1e-5):
+            raise RuntimeError('Poisson problem could not be solved')
         
         # convert the result to the correct format
         if out is not None:
@@ -131,3 +297,139 @@ def make_general_poisson_solver(matrix, vector, method: str = 'auto') \
         return out
     
     return solve_poisson
+
+
+
+def get_support_coloring(grid: "GridBase", radius: int) \
+        -> Tuple[List[np.ndarray], List[np.ndarray]]:
+    """ determine a coloring of the support points of a grid
+    
+    Support points of the same color are separated by more than `2 * radius`
+    cells along at least one axis, so their stencils do not overlap if the
+    stencils reach at most `radius` cells in each direction.
+    
+    Args:
+        grid (:class:`~pde.grids.base.GridBase`):
+            The grid whose support points are colored
+        radius (int):
+            The maximal distance over which the stencils couple support points
+            
+    Returns:
+        tuple: Two lists with an entry for each axis. The first list contains
+        integer arrays with the color of each support point along the axis. The
+        second list contains arrays stating for each point and each color, which
+        support point of this color couples to the given point (or -1 if no
+        point couples).
+    """
+    width = 2 * radius + 1
+    colors_axes, neighbors_axes = [], []
+    for n, periodic in zip(grid.shape, grid.periodic):
+        i = np.arange(n)
+        if n <= width:
+            colors = i  # every point has its own color
+        else:
+            colors = i % width
+            if periodic and n % width:
+                # the last points would interact with the first points
+                rest = n % width
+                colors[n - rest:] = width + np.arange(rest)
+        num_colors = colors.max() + 1
+        
+        # determine which point of each color couples to each point
+        neighbors = np.full((n, num_colors), -1)
+        for offset in range(-radius, radius + 1):
+            j = i + offset
+            if periodic:
+                j %= n
+            valid = (0 <= j) & (j < n)
+            neighbors[i[valid], colors[j[valid]]] = j[valid]
+        
+        colors_axes.append(colors)
+        neighbors_axes.append(neighbors)
+    
+    return colors_axes, neighbors_axes
+
+
+
+def estimate_sparse_jacobian(func: Callable, arr: np.ndarray, grid: "GridBase",
+                             radius: int = 2, eps: np.ndarray = None) \
+        -> Tuple[sparse.csc_matrix, np.ndarray]:
+    """ estimate the sparse Jacobian of a function defined on a grid
+    
+    The Jacobian is estimated using finite differences, where support points
+    that do not interact are perturbed simultaneously. The number of
+    evaluations of `func` is thus independent of the grid size. For affine
+    functions, the result is exact if `eps` is one.
+    
+    Args:
+        func (callable):
+            The function, which maps an array of data on the grid to another
+            array of data on the same grid
+        arr (:class:`numpy.ndarray`):
+            The point at which the Jacobian is estimated
+        grid (:class:`~pde.grids.base.GridBase`):
+            The grid on which the data is defined
+        radius (int):
+            The maximal distance (in support points) over which the function
+            couples the data. The estimate misses couplings over larger
+            distances.
+        eps (:class:`numpy.ndarray`, optional):
+            The size of the perturbation of each item of `arr`. If `None`, a
+            value suitable for finite differences is chosen.
+            
+    Returns:
+        tuple: The Jacobian as a sparse matrix in CSC format, which acts on the
+        flattened data, and the function value at `arr`
+    """
+    dim = grid.num_axes
+    num_cells = int(np.prod(grid.shape))
+    num_in = arr.size // num_cells
+    data = arr.reshape((num_in,) + grid.shape)
+    value = func(arr)
+    num_out = value.size // num_cells
+    value_flat = value.reshape((num_out,) + grid.shape)
+    if eps is None:
+        eps = np.sqrt(np.finfo(float).eps) * (1 + np.abs(data))
+    else:
+        eps = np.broadcast_to(eps, arr.shape).reshape(data.shape)
+    colors_axes, neighbors_axes = get_support_coloring(grid, radius)
+    
+    # indices of all points in the flattened data
+    indices_in = np.arange(arr.size).reshape(data.shape)
+    indices_out = np.arange(value.size).reshape(value_flat.shape)
+    
+    rows, cols, values = [], [], []
+    for color in np.ndindex(*(n.shape[1] for n in neighbors_axes)):
+        # determine which points have this color and which perturbed point
+        # affects each point
+        mask = np.ones(grid.shape, dtype=bool)
+        coupled = np.ones(grid.shape, dtype=bool)
+        neighbor = []
+        for axis, c in enumerate(color):
+            shape_axis = [1] * dim
+            shape_axis[axis] = -1
+            mask &= (colors_axes[axis] == c).reshape(shape_axis)
+            idx = neighbors_axes[axis][:, c].reshape(shape_axis)
+            coupled &= idx >= 0
+            neighbor.append(np.broadcast_to(idx, grid.shape))
+        neighbor_idx = tuple(idx[coupled] for idx in neighbor)
+        
+        for comp in range(num_in):
+            perturbed = data.copy()
+            perturbed[comp][mask] += eps[comp][mask]
+            diff = func(perturbed.reshape(arr.shape)).reshape(value_flat.shape)
+            diff -= value_flat
+            
+            # collect the entries of the Jacobian
+            h = eps[comp][neighbor_idx]
+            col = indices_in[comp][neighbor_idx]
+            for comp_out in range(num_out):
+                rows.append(indices_out[comp_out][coupled])
+                cols.append(col)
+                values.append(diff[comp_out][coupled] / h)
+                
+    matrix = sparse.csc_matrix((np.concatenate(values),
+                                (np.concatenate(rows), np.concatenate(cols))),
+                               shape=(value.size, arr.size))
+    matrix.eliminate_zeros()
+    return matrix, value
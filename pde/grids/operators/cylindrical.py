@@ -127,7 +127,7 @@ def make_gradient(bcs: Boundaries) -> Callable:
             # inner radial boundary condition
             i = 0
             arr_z_l, _, arr_z_h = region_z(arr, (i, j))
-            out[0, i, j] = (arr[1, i] - arr[0, i]) * scale_r
+            out[0, i, j] = (arr[1, j] - arr[0, j]) * scale_r
             out[1, i, j] = (arr_z_h - arr_z_l) * scale_z
             out[2, i, j] = 0  # no phi dependence by definition
             
@@ -120,4 +120,27 @@ def test_operators():
         grid.register_operator('noop', make_op)
         assert "noop" in grid.operators
         del grid._operators['noop']  # reset original state
-        
\ No newline at end of file
+            
+    
+    
+@pytest.mark.parametrize('grid', [
+    grids.UnitGrid([5, 4], periodic=[True, False]),
+    grids.CartesianGrid([[0, 1]] * 3, [3, 4, 5]),
+    grids.CylindricalGrid(3, (0, 2), (4, 5)),
+    grids.SphericalGrid(3, 5),
+    grids.PolarGrid(3, 5)
+])
+def test_operator_matrix(grid):
+    """ test the sparse matrices representing operators """
+    bc = 'natural' if any(grid.periodic) else {'value': 1}
+    for name in grid.operators - {'poisson_solver', 'gradient_squared'}:
+        operator = grid.get_operator(name, bc=bc)
+        matrix, vector = grid.get_operator_matrix(name, bc=bc)
+        rank_in = {'divergence': 1, 'vector_gradient': 1, 'vector_laplace': 1,
+                   'tensor_divergence': 2}.get(name, 0)
+        arr = np.random.random((grid.dim,) * rank_in + grid.shape)
+        res = matrix.dot(arr.flat) + vector
+        np.testing.assert_allclose(res, operator(arr).flat, err_msg=name)
+    
+    with pytest.raises(ValueError):
+        grid.get_operator_matrix('gradient_squared', bc=bc)
@@ -39,6 +39,12 @@ class PDEBase(metaclass=ABCMeta):
     explicit_time_dependence: Optional[bool] = None
     """ bool: Flag indicating whether the right hand side of the PDE has an
     explicit time dependence. """
+    
+    runtime_parameters: Tuple[str, ...] = ()
+    """ tuple: Names of the numerical attributes of the PDE that the compiled
+    function returned by :meth:`PDEBase._make_pde_rhs_out_numba` takes as an
+    argument. These parameters can thus be changed without compiling the
+    right hand side again. """
 
 
     def __init__(self, noise: OptionalArrayLike = 0):
@@ -96,12 +102,150 @@ class PDEBase(metaclass=ABCMeta):
         -> FieldBase: pass
 
 
+    def linear_operator_spectrum(self, k2: np.ndarray) -> np.ndarray:
+        """ return the linear part of the PDE in Fourier space
+
+        Semi-implicit solvers, like
+        :class:`~pde.solvers.spectral.SpectralSolver`, treat the linear part
+        exactly and only evaluate the remaining part given by
+        :meth:`evolution_rate_nonlinear` explicitly. The linear part must be
+        isotropic, so it can be expressed as a function of the squared wave
+        vector.
+
+        Args:
+            k2 (:class:`numpy.ndarray`):
+                The squared magnitudes of the wave vectors
+
+        Returns:
+            :class:`numpy.ndarray`: The multiplier of each Fourier mode
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} does not declare '
+                                  'a linear operator')
+
+
+    def evolution_rate_nonlinear(self, state: FieldBase, t: float = 0) \
+            -> FieldBase:
+        """ evaluate the part of the right hand side that is not linear
+
+        The full evolution rate is the sum of the result of this method and the
+        linear part declared by :meth:`linear_operator_spectrum`.
+
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                The field describing the current state
+            t (float): The current time point
+
+        Returns:
+            :class:`~pde.fields.FieldBase`: The non-linear part of the
+            evolution rate
+        """
+        raise NotImplementedError(f'{self.__class__.__name__} does not declare '
+                                  'a linear operator')
+
+
+    def get_parameters(self, **parameters) -> np.ndarray:
+        r""" return the values of the runtime parameters
+        
+        Args:
+            \**parameters:
+                Values of runtime parameters that replace the values stored in
+                the respective attributes of the PDE
+        
+        Returns:
+            :class:`numpy.ndarray`: The values of all parameters listed in
+            :attr:`PDEBase.runtime_parameters` in that order
+        """
+        unknown = set(parameters) - set(self.runtime_parameters)
+        if unknown:
+            raise ValueError(f'{self.__class__.__name__} does not support the '
+                             f'runtime parameters {sorted(unknown)}. Supported '
+                             f'parameters are {list(self.runtime_parameters)}')
+        return np.array([parameters.get(name, getattr(self, name))
+                         for name in self.runtime_parameters], dtype=np.double)
+
+
     def _make_pde_rhs_numba(self, state: FieldBase) -> Callable:
-        """ create a compiled function for evaluating the right hand side """
-        raise NotImplementedError
+        """ create a compiled function for evaluating the right hand side
+        
+        The default implementation uses :meth:`PDEBase._make_pde_rhs_out_numba`
+        with the current values of the runtime parameters, if the PDE declares
+        any.
+        """
+        if not self.runtime_parameters:
+            raise NotImplementedError
+        
+        pde_rhs_out = self._make_pde_rhs_out_numba(state)
+        # the values are compile-time constants of the returned function
+        parameters = tuple(self.get_parameters())
+        
+        @jit
+        def pde_rhs(state_data: np.ndarray, t: float):
+            """ compiled helper function evaluating right hand side """
+            out = np.empty_like(state_data)
+            pde_rhs_out(state_data, t, out, parameters)
+            return out
+        
+        return pde_rhs  # type: ignore
+    
+    
+    def _make_pde_rhs_out_numba(self, state: FieldBase) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
+        
+        The returned function has the signature
+        `(state_data, t, out, parameters)` and writes the evolution rate into
+        the supplied array `out`. Here, `parameters` are the values of the
+        parameters listed in :attr:`PDEBase.runtime_parameters`, e.g., obtained
+        from :meth:`PDEBase.get_parameters`. PDEs declaring runtime parameters
+        need to overwrite this method. For all other PDEs,
+        the default implementation wraps :meth:`PDEBase._make_pde_rhs_numba`
+        and thus still allocates a temporary array.
+        """
+        if self.runtime_parameters:
+            raise NotImplementedError
+        
+        pde_rhs = self._make_pde_rhs_numba(state)
+        
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
+            """ compiled helper function evaluating right hand side """
+            out[...] = pde_rhs(state_data, t)
+            
+        return pde_rhs_out  # type: ignore
+    
+    
+    def _check_rhs_implementation(self, state: FieldBase, rhs: Callable,
+                                  with_out: bool = False):
+        """ compare a compiled right hand side to the numpy implementation
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state at which the functions are compared
+            rhs (callable):
+                The compiled function evaluating the right hand side
+            with_out (bool):
+                Whether `rhs` writes its result into a supplied `out` array
+                
+        Raises:
+            RuntimeError: if the two implementations differ
+        """
+        expected = self.evolution_rate(state.copy()).data
+        test_state = state.copy()
+        if with_out:
+            result = np.empty_like(test_state.data)
+            rhs(test_state.data, 0, result)
+        else:
+            result = rhs(test_state.data, 0)
+        if not np.allclose(result, expected):
+            raise RuntimeError('The numba compiled implementation of the '
+                               'right hand side is not compatible with '
+                               'the numpy implementation. This check can '
+                               'be disabled by setting the class attribute '
+                               '`check_implementation` to `False`.')
 
 
-    def make_pde_rhs(self, state: FieldBase, backend: str = 'auto') -> Callable:
+    def make_pde_rhs(self, state: FieldBase, backend: str = 'auto',
+                     with_out: bool = False) -> Callable:
         """ return a function for evaluating the right hand side of the PDE
         
         Args:
@@ -111,29 +255,61 @@ class PDEBase(metaclass=ABCMeta):
             backend (str): Determines how the function is created. Accepted 
                 values are 'python` and 'numba'. Alternatively, 'auto' lets the
                 code decide for the most optimal backend.
+            with_out (bool):
+                Whether the returned function writes the evolution rate into a
+                supplied array. In this case, the function has the signature
+                `(state_data, t, out)`, where `out` must have the same shape as
+                `state_data`. This allows solvers to reuse preallocated memory.
                 
         Returns:
             Function determining the right hand side of the PDE
         """
+        def make_rhs_numba() -> Callable:
+            """ helper creating the compiled function """
+            if not with_out:
+                return self._make_pde_rhs_numba(state)
+            
+            pde_rhs_out = self._make_pde_rhs_out_numba(state)
+            # the values are compile-time constants of the returned function
+            parameters = tuple(self.get_parameters())
+            
+            @jit
+            def pde_rhs(state_data: np.ndarray, t: float, out: np.ndarray):
+                """ compiled helper function evaluating right hand side """
+                pde_rhs_out(state_data, t, out, parameters)
+                
+            return pde_rhs  # type: ignore
+        
         if backend == 'auto':
             try:
-                rhs = self._make_pde_rhs_numba(state)
+                rhs = make_rhs_numba()
             except NotImplementedError:
                 backend = 'numpy'
             else:
                 rhs._backend = 'numba'  # type: ignore
             
         if backend == 'numba':
-            rhs = self._make_pde_rhs_numba(state)
+            rhs = make_rhs_numba()
             rhs._backend = 'numba'  # type: ignore
                 
         elif backend == 'numpy':
             state = state.copy()
             
-            def evolution_rate_numpy(state_data, t: float):
-                """ evaluate the rhs given only a state without the grid """
-                state.data = state_data
-                return self.evolution_rate(state, t).data
+            if with_out:
+                def evolution_rate_numpy(state_data, t: float,
+                                         out: np.ndarray):
+                    """ evaluate the rhs given only a state without the grid
+                    """
+                    state.data = state_data
+                    out[...] = self.evolution_rate(state, t).data
+                    
+            else:
+                def evolution_rate_numpy(state_data,  # type: ignore
+                                         t: float):
+                    """ evaluate the rhs given only a state without the grid
+                    """
+                    state.data = state_data
+                    return self.evolution_rate(state, t).data
         
             rhs = evolution_rate_numpy
             rhs._backend = 'numpy'  # type: ignore
@@ -145,15 +321,7 @@ class PDEBase(metaclass=ABCMeta):
         if (self.check_implementation and
                 rhs._backend == 'numba'):  # type: ignore
             # compare the numba implementation to the numpy implementation
-            expected = self.evolution_rate(state.copy()).data
-            test_state = state.copy()
-            result = rhs(test_state.data, 0)
-            if not np.allclose(result, expected):
-                raise RuntimeError('The numba compiled implementation of the '
-                                   'right hand side is not compatible with '
-                                   'the numpy implementation. This check can '
-                                   'be disabled by setting the class attribute '
-                                   '`check_implementation` to `False`.')
+            self._check_rhs_implementation(state, rhs, with_out=with_out)
         
         return rhs
             
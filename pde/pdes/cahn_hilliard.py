@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -30,6 +30,7 @@ class CahnHilliardPDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('interface_width',)
     
 
     @fill_in_docstring
@@ -72,38 +73,70 @@ class CahnHilliardPDE(PDEBase):
         c_laplace = state.laplace(bc=self.bc_c, label='evolution rate')
         result = state**3 - state - self.interface_width * c_laplace
         return result.laplace(bc=self.bc_mu)  # type: ignore
+
+    
+    def linear_operator_spectrum(self, k2: np.ndarray) -> np.ndarray:
+        """ return the linear part of the PDE in Fourier space
+        
+        Args:
+            k2 (:class:`numpy.ndarray`):
+                The squared magnitudes of the wave vectors
+                
+        Returns:
+            :class:`numpy.ndarray`: The multiplier of each Fourier mode
+        """
+        return k2 - self.interface_width * k2**2
+    
+    
+    def evolution_rate_nonlinear(self, state: ScalarField,  # type: ignore
+                                 t: float = 0) -> ScalarField:
+        """ evaluate the non-linear part of the right hand side of the PDE
+        
+        Args:
+            state (:class:`~pde.fields.ScalarField`):
+                The scalar field describing the concentration distribution
+            t (float): The current time point
+            
+        Returns:
+            :class:`~pde.fields.ScalarField`:
+            Scalar field describing the non-linear part of the evolution rate
+        """
+        assert isinstance(state, ScalarField)
+        result = state**3
+        return result.laplace(bc=self.bc_mu,  # type: ignore
+                              label='evolution rate')
     
     
-    def _make_pde_rhs_numba(self, state: ScalarField  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
+    def _make_pde_rhs_out_numba(self, state: ScalarField  # type: ignore
+                                ) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
         Args:
             state (:class:`~pde.fields.ScalarField`):
                 An example for the state defining the grid and data types
                 
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
         """
-        shape = state.grid.shape
-        arr_type = nb.typeof(np.empty(shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
-        
-        interface_width = self.interface_width
         laplace_c = state.grid.get_operator('laplace', bc=self.bc_c)
         laplace_mu = state.grid.get_operator('laplace', bc=self.bc_mu)
 
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """ 
-            mu = (state_data**3 - state_data -
-                  interface_width * laplace_c(state_data))
-            return laplace_mu(mu) 
+            interface_width = parameters[0]
+            # the chemical potential requires a separate array
+            mu = np.empty_like(out)
+            laplace_c(state_data, mu)
+            for i in range(mu.size):
+                c = state_data.flat[i]
+                mu.flat[i] = c**3 - c - interface_width * mu.flat[i]
+            laplace_mu(mu, out)
             
-        return pde_rhs  # type: ignore
+        return pde_rhs_out  # type: ignore
     
     
     
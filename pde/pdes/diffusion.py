@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -30,6 +30,7 @@ class DiffusionPDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('diffusivity',)
     
     
     @fill_in_docstring
@@ -70,33 +71,28 @@ class DiffusionPDE(PDEBase):
         return self.diffusivity * laplace  # type: ignore
     
     
-    def _make_pde_rhs_numba(self, state: ScalarField  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
+    def _make_pde_rhs_out_numba(self, state: ScalarField  # type: ignore
+                                ) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
         Args:
             state (:class:`~pde.fields.ScalarField`):
                 An example for the state defining the grid and data types
                 
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
         """
-        shape = state.grid.shape
-        arr_type = nb.typeof(np.empty(shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
-        
-        diffusivity_value = self.diffusivity
         laplace = state.grid.get_operator('laplace', bc=self.bc)
 
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """ 
-            return diffusivity_value * laplace(state_data) 
+            diffusivity_value = parameters[0]
+            laplace(state_data, out)
+            for i in range(out.size):
+                out.flat[i] *= diffusivity_value
             
-        return pde_rhs  # type: ignore
-    
-    
-    
+        return pde_rhs_out  # type: ignore
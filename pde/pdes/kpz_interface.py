@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -33,6 +33,7 @@ class KPZInterfacePDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('nu', 'lmbda')
     
 
     @fill_in_docstring
@@ -79,39 +80,41 @@ class KPZInterfacePDE(PDEBase):
         return result  # type: ignore
     
     
-    def _make_pde_rhs_numba(self, state: ScalarField  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
+    def _make_pde_rhs_out_numba(self, state: ScalarField  # type: ignore
+                                ) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
         Args:
             state (:class:`~pde.fields.ScalarField`):
                 An example for the state defining the grid and data types
                 
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
         """
-        shape = state.grid.shape
         dim = state.grid.dim
-        arr_type = nb.typeof(np.empty(shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
         
-        nu_value, lambda_value = self.nu, self.lmbda
         laplace = state.grid.get_operator('laplace', bc=self.bc)
         gradient = state.grid.get_operator('gradient', bc=self.bc)
 
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """ 
-            grad = gradient(state_data)
-            result = nu_value * laplace(state_data)
+            nu_value, lambda_value = parameters[0], parameters[1]
+            # the gradient requires a separate array
+            grad = np.empty((dim,) + out.shape, dtype=out.dtype)
+            gradient(state_data, grad)
+            laplace(state_data, out)
+            for j in range(out.size):
+                out.flat[j] *= nu_value
             for i in range(dim):
-                result += lambda_value * grad[i]**2
-            return result
+                grad_i = grad[i]
+                for j in range(out.size):
+                    out.flat[j] += lambda_value * grad_i.flat[j]**2
             
-        return pde_rhs  # type: ignore
+        return pde_rhs_out  # type: ignore
     
     
     
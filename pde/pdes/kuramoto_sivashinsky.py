@@ -4,7 +4,7 @@ The Kardar–Parisi–Zhang (KPZ) equation describing the evolution of an interf
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
 """
 
-from typing import Callable
+from typing import Callable, Dict, Any  # @UnusedImport
 
 import numpy as np
 
@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -33,13 +33,15 @@ class KuramotoSivashinskyPDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('nu',)
     
 
     @fill_in_docstring
     def __init__(self, nu: float = 1,
                  noise: float = 0,
                  bc: BoundariesData = 'natural',
-                 bc_lap: BoundariesData = None):
+                 bc_lap: BoundariesData = None,
+                 operator_method: str = 'auto'):
         r""" 
         Args:
             nu (float):
@@ -54,12 +56,26 @@ class KuramotoSivashinskyPDE(PDEBase):
                 scalar field :math:`c`. If `None`, the same boundary condition
                 as `bc` is chosen. Otherwise, this supports the same options as
                 `bc`.
+            operator_method (str):
+                The method used for the differential operators. The value
+                'spectral' selects operators based on fast Fourier transforms,
+                which are more accurate, but require periodic Cartesian grids
+                and are only supported by the numpy backend.
         """
         super().__init__(noise=noise)
         
         self.nu = nu
         self.bc = bc
         self.bc_lap = bc if bc_lap is None else bc_lap
+        self.operator_method = operator_method
+        
+        
+    @property
+    def _operator_kwargs(self) -> Dict[str, Any]:
+        """ dict: arguments selecting the method of the operators """
+        if self.operator_method == 'auto':
+            return {}
+        return {'method': self.operator_method}
             
             
     def evolution_rate(self, state: ScalarField,  # type: ignore
@@ -76,48 +92,91 @@ class KuramotoSivashinskyPDE(PDEBase):
             Scalar field describing the evolution rate of the PDE 
         """
         assert isinstance(state, ScalarField)
-        state_lap = state.laplace(bc=self.bc)
-        result = -self.nu * state_lap.laplace(bc=self.bc_lap) - state_lap \
-                 - 0.5 * state.gradient(bc=self.bc).to_scalar('squared_sum')
+        kwargs = self._operator_kwargs
+        state_lap = state.laplace(bc=self.bc, **kwargs)
+        state_grad = state.gradient(bc=self.bc, **kwargs)
+        result = (-self.nu * state_lap.laplace(bc=self.bc_lap, **kwargs)
+                  - state_lap - 0.5 * state_grad.to_scalar('squared_sum'))
+        result.label = 'evolution rate'
+        return result  # type: ignore
+
+    
+    def linear_operator_spectrum(self, k2: np.ndarray) -> np.ndarray:
+        """ return the linear part of the PDE in Fourier space
+        
+        Args:
+            k2 (:class:`numpy.ndarray`):
+                The squared magnitudes of the wave vectors
+                
+        Returns:
+            :class:`numpy.ndarray`: The multiplier of each Fourier mode
+        """
+        return k2 - self.nu * k2**2
+    
+    
+    def evolution_rate_nonlinear(self, state: ScalarField,  # type: ignore
+                                 t: float = 0) -> ScalarField:
+        """ evaluate the non-linear part of the right hand side of the PDE
+        
+        Args:
+            state (:class:`~pde.fields.ScalarField`):
+                The scalar field describing the concentration distribution
+            t (float): The current time point
+            
+        Returns:
+            :class:`~pde.fields.ScalarField`:
+            Scalar field describing the non-linear part of the evolution rate
+        """
+        assert isinstance(state, ScalarField)
+        state_grad = state.gradient(bc=self.bc, **self._operator_kwargs)
+        result = -0.5 * state_grad.to_scalar('squared_sum')
         result.label = 'evolution rate'
         return result  # type: ignore
     
     
-    def _make_pde_rhs_numba(self, state: ScalarField  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
+    def _make_pde_rhs_out_numba(self, state: ScalarField  # type: ignore
+                                ) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
         Args:
             state (:class:`~pde.fields.ScalarField`):
                 An example for the state defining the grid and data types
                 
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
         """
-        shape = state.grid.shape
+        if self.operator_method not in {'auto', 'numba'}:
+            raise NotImplementedError('Operators of type '
+                                      f'`{self.operator_method}` cannot be '
+                                      'compiled')
         dim = state.grid.dim
-        arr_type = nb.typeof(np.empty(shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
         
-        nu_value = self.nu
         laplace = state.grid.get_operator('laplace', bc=self.bc)
         laplace2 = state.grid.get_operator('laplace', bc=self.bc_lap)
         gradient = state.grid.get_operator('gradient', bc=self.bc)
 
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """ 
-            grad = gradient(state_data)
-            result = -laplace(state_data)
-            result += nu_value * laplace2(result)
+            nu_value = parameters[0]
+            # the operators acting on intermediate results require a separate
+            # array, which is also large enough to hold the gradient
+            tmp = np.empty((dim,) + out.shape, dtype=out.dtype)
+            state_laplace2 = tmp[0]
+            laplace(state_data, out)
+            laplace2(out, state_laplace2)
+            for j in range(out.size):
+                out.flat[j] = -nu_value * state_laplace2.flat[j] - out.flat[j]
+            gradient(state_data, tmp)
             for i in range(dim):
-                result -= 0.5 * grad[i]**2
-            return result
+                grad_i = tmp[i]
+                for j in range(out.size):
+                    out.flat[j] -= 0.5 * grad_i.flat[j]**2
             
-        return pde_rhs  # type: ignore
+        return pde_rhs_out  # type: ignore
     
     
     
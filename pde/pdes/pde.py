@@ -12,7 +12,7 @@ import numpy as np
 
 
 from pde.pdes.base import PDEBase
-from pde.fields import FieldCollection, VectorField
+from pde.fields import FieldCollection, VectorField, ScalarField
 from pde.fields.base import FieldBase, DataFieldBase, OptionalArrayLike
 from pde.grids.boundaries.axes import BoundariesData
 from pde.tools.numba import nb, jit
@@ -33,6 +33,13 @@ class PDE(PDEBase):
             compile a function.
     """
     
+    fuse_operators: bool = True
+    """ bool: Flag determining whether the compiled right hand side of scalar
+    PDEs on Cartesian grids is evaluated by fused kernels, which combine the
+    stencils of the differential operators with the local terms in a single
+    pass over the grid. Expressions that cannot be fused automatically use the
+    separately compiled operators. """
+    
     @fill_in_docstring
     def __init__(self,
                  rhs: "OrderedDict[str, str]",
@@ -158,6 +165,29 @@ class PDE(PDEBase):
         return {k: v.expression for k, v in self._rhs_expr.items()}
             
            
+    def _get_bc(self, var: str, func: str) -> BoundariesData:
+        """ determine the boundary conditions of an operator
+        
+        Args:
+            var (str):
+                The name of the variable whose evolution rate is considered
+            func (str):
+                The name of the operator
+                
+        Returns:
+            The boundary conditions that match the variable and the operator
+        """
+        for bc_key, bc in self.bcs.items():
+            bc_var, bc_func = bc_key.split(':')
+            var_match = (bc_var == var or bc_var == '*')
+            func_match = (bc_func == func or bc_func == '*')
+            if var_match and func_match:
+                return bc  # found a matching boundary condition
+            
+        raise RuntimeError('Could not find suitable boundary condition for '
+                           f'operator `{func}` of variable `{var}`')
+            
+           
     def _prepare(self, state: FieldBase) -> None:
         """ prepare the expression by setting internal variables in the cache
 
@@ -206,17 +236,7 @@ class PDE(PDEBase):
             for func in self._operators[var]:
                 if func in ops:
                     continue
-                # determine boundary conditions
-                for bc_key, bc in self.bcs.items():
-                    bc_var, bc_func = bc_key.split(':')
-                    var_match = (bc_var == var or bc_var == '*')
-                    func_match = (bc_func == func or bc_func == '*')
-                    if var_match and func_match:
-                        break  # found a matching boundary condition
-                else:
-                    raise RuntimeError('Could not find suitable boundary '
-                                       'condition for ')
-                
+                bc = self._get_bc(var, func)
                 ops[func] = state.grid.get_operator(func, bc=bc)
             
             rhs_funcs.append(self._rhs_expr[var]._get_function(user_funcs=ops))
@@ -288,23 +308,75 @@ class PDE(PDEBase):
             the time to obtained an instance of :class:`numpy.ndarray` giving
             the evolution rate.
         """
-        num_fields = len(state)
         data_shape = state.data.shape
+        data_dtype = state.data.dtype
+        rhs_out = self._make_pde_rhs_out_numba_coll(state)
+        
+        @jit
+        def evolution_rate(state_data: np.ndarray, t: float = 0):
+            out = np.empty(data_shape, dtype=data_dtype)
+            rhs_out(state_data, t, out, None)
+            return out
+        
+        return evolution_rate  # type: ignore
+    
+    
+    def _make_pde_rhs_out_numba_coll(self, state: FieldCollection) -> Callable:
+        """ create the compiled in-place rhs if `state` is a field collection
+        
+        Args:
+            state (:class:`~pde.fields.FieldCollection`):
+                An example for the state defining the grid and data types
+                
+        Returns:
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. The
+            argument `parameters` is ignored.
+        """
+        num_fields = len(state)
         rhs_list = tuple(jit(self._cache['rhs_funcs'][i])
                          for i in range(num_fields))
 
         starts = tuple(slc.start for slc in state._slices)
         stops = tuple(slc.stop for slc in state._slices)
 
-        # In the future, the following should be possible:
-#         @jit
-#         def evolution_rate(state_data, t, out):
-#             """ evolve all agents explicitly """
-#             for i in nb.literal_unroll(range(num_fields)):
-#                 out[i] = rhs_list[i](*state_data, t)
-#         return evolver
-    
-        get_data_tuple = self._cache['get_data_tuple']
+        isscalar = tuple(field.rank == 0 for field in state)
+        
+        def data_tuple_chain(i=0, inner=None):
+            """ recursive helper function for splitting the state data """
+            start, stop = starts[i], stops[i]
+            
+            if inner is None:
+                # the innermost function creates the tuple
+                if isscalar[i]:
+                    @jit
+                    def get_data_tuple(state_data):
+                        return (state_data[start],)
+                else:
+                    @jit
+                    def get_data_tuple(state_data):
+                        return (state_data[start: stop],)
+                    
+            else:
+                # all other functions extend the tuple of the inner function
+                if isscalar[i]:
+                    @jit
+                    def get_data_tuple(state_data):
+                        return inner(state_data) + (state_data[start],)
+                else:
+                    @jit
+                    def get_data_tuple(state_data):
+                        return inner(state_data) + (state_data[start: stop],)
+            
+            if i < num_fields - 1:
+                # there are more items in the chain
+                return data_tuple_chain(i + 1, inner=get_data_tuple)
+            else:
+                # this is the outermost function
+                return get_data_tuple
+            
+        # compile the function splitting the data into a tuple of fields
+        get_data_tuple = data_tuple_chain()
             
         def chain(i=0, inner=None):
             """ recursive helper function for applying all rhs """
@@ -330,18 +402,257 @@ class PDE(PDEBase):
             else:
                 # this is the outermost function
                 @jit
-                def evolution_rate(state_data: np.ndarray, t: float = 0):
-                    out = np.empty(data_shape)
-                    with nb.objmode():
-                        data_tpl = get_data_tuple(state_data)
-                        wrap(data_tpl, t, out)
-                    return out
-                return evolution_rate
+                def pde_rhs_out(state_data: np.ndarray, t: float,
+                                out: np.ndarray, parameters):
+                    data_tpl = get_data_tuple(state_data)
+                    wrap(data_tpl, t, out)
+                return pde_rhs_out
         
         # compile the recursive chain
         return chain()  # type: ignore            
     
     
+    def _make_pde_rhs_out_numba_fused(self, state: FieldBase) -> Callable:
+        """ create a single compiled kernel evaluating the right hand side
+        
+        The sympy expression is translated into a function evaluating the whole
+        right hand side at a single support point, where differential operators
+        are replaced by their point-wise stencils. This function is then applied
+        in a single sweep over the grid, avoiding the temporary arrays created
+        by the individual operators. Operators that act on composite
+        expressions require the expression to be evaluated beforehand, so each
+        level of nesting adds another sweep.
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state defining the grid and data types
+                
+        Raises:
+            NotImplementedError: if the expression or the state is not supported
+                
+        Returns:
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. The
+            argument `parameters` is ignored.
+        """
+        import sympy
+        from sympy.core.function import AppliedUndef
+        from ..grids.cartesian import CartesianGridBase
+        from ..grids.operators.cartesian import (make_laplace_point,
+                                                 make_gradient_squared_point)
+        from ..grids.operators.common import (PARALLELIZATION_THRESHOLD_2D,
+                                              PARALLELIZATION_THRESHOLD_3D)
+        
+        point_operators = {'laplace': make_laplace_point,
+                           'gradient_squared': make_gradient_squared_point}
+        
+        # check whether the fused kernel supports the state and the expression
+        if not (isinstance(state, ScalarField) and
+                isinstance(state.grid, CartesianGridBase)):
+            raise NotImplementedError('Fused kernels only support scalar '
+                                      'fields on Cartesian grids')
+        var = self.variables[0]
+        unsupported = self._operators[var] - set(point_operators)
+        if unsupported:
+            raise NotImplementedError('Fused kernels do not support operators '
+                                      f'{unsupported}')
+        
+        shape = state.grid.shape
+        dim = len(shape)
+        if dim > 3:
+            raise NotImplementedError('Fused kernels only support up to three '
+                                      'dimensions')
+        if min(shape) < 3:
+            raise NotImplementedError('Fused kernels require at least three '
+                                      'support points along each axis')
+
+        # define symbols that are used in the point-wise expressions
+        var_symbol = sympy.Symbol(var)
+        arr_state = sympy.IndexedBase('_state')
+        arr_tmp = sympy.IndexedBase('_tmp')
+        idx = sympy.symbols(f'_i0:{dim}')
+        t_symbol = sympy.Symbol('t')
+        
+        # stencils that handle boundary conditions and that can only be used
+        # away from the boundary, respectively
+        point_funcs: Dict[str, Callable] = {}
+        point_funcs_interior: Dict[str, Callable] = {}
+        stages = []  # point-wise expressions for intermediate arrays
+        
+        def transform(expr):
+            """ helper replacing fields and operators by point-wise access """
+            if isinstance(expr, AppliedUndef):
+                func = expr.func.__name__
+                if func not in point_operators or len(expr.args) != 1:
+                    raise NotImplementedError('Fused kernels do not support '
+                                              f'the function {expr}')
+                arg, = expr.args
+                if arg == var_symbol:
+                    arr = arr_state
+                else:
+                    # the argument needs to be evaluated in a preceding sweep
+                    stages.append(transform(arg))
+                    arr = arr_tmp[len(stages) - 1]
+                    
+                name = f'{func}_point'
+                if name not in point_funcs:
+                    bcs = state.grid.get_boundary_conditions(
+                                                    self._get_bc(var, func))
+                    factory = point_operators[func]
+                    point_funcs[name] = factory(bcs)
+                    point_funcs_interior[name] = factory(bcs, interior=True)
+                return sympy.Function(name)(arr, *idx)
+                
+            elif expr == var_symbol:
+                return arr_state[idx]
+            
+            elif expr.args:
+                return expr.func(*(transform(arg) for arg in expr.args))
+            
+            else:
+                return expr
+        
+        rhs_expr = transform(self._rhs_expr[var]._sympy_expr)
+        
+        # use parallel processing for large enough arrays 
+        if dim == 2:
+            parallel = bool(np.prod(shape) >= PARALLELIZATION_THRESHOLD_2D**2)
+        elif dim == 3:
+            parallel = bool(np.prod(shape) >= PARALLELIZATION_THRESHOLD_3D**3)
+        else:
+            parallel = False
+            
+        def make_sweep(expr) -> Callable:
+            """ helper compiling a point-wise expression into a sweep """
+            args = [arr_state, arr_tmp, *idx, t_symbol]
+            f_bc = sympy.lambdify(args, expr, modules=[point_funcs, 'numpy'])
+            f_bc = jit(inline='always')(f_bc)
+            f_in = sympy.lambdify(args, expr,
+                                  modules=[point_funcs_interior, 'numpy'])
+            f_in = jit(inline='always')(f_in)
+            
+            if dim == 1:
+                dim_x, = shape
+                
+                @jit
+                def sweep(state_data, tmp, t, out):
+                    """ evaluate the expression at all support points """
+                    out[0] = f_bc(state_data, tmp, 0, t)
+                    for i in range(1, dim_x - 1):
+                        out[i] = f_in(state_data, tmp, i, t)
+                    out[-1] = f_bc(state_data, tmp, dim_x - 1, t)
+                        
+            elif dim == 2:
+                dim_x, dim_y = shape
+                
+                @jit(parallel=parallel)
+                def sweep(state_data, tmp, t, out):
+                    """ evaluate the expression at all support points """
+                    for i in nb.prange(dim_x):
+                        if i == 0 or i == dim_x - 1:
+                            for j in range(dim_y):
+                                out[i, j] = f_bc(state_data, tmp, i, j, t)
+                        else:
+                            out[i, 0] = f_bc(state_data, tmp, i, 0, t)
+                            for j in range(1, dim_y - 1):
+                                out[i, j] = f_in(state_data, tmp, i, j, t)
+                            out[i, -1] = f_bc(state_data, tmp, i, dim_y - 1, t)
+                            
+            else:
+                dim_x, dim_y, dim_z = shape
+                
+                @jit(parallel=parallel)
+                def sweep(state_data, tmp, t, out):
+                    """ evaluate the expression at all support points """
+                    for i in nb.prange(dim_x):
+                        for j in range(dim_y):
+                            if (i == 0 or i == dim_x - 1 or
+                                    j == 0 or j == dim_y - 1):
+                                for k in range(dim_z):
+                                    out[i, j, k] = f_bc(state_data, tmp,
+                                                        i, j, k, t)
+                            else:
+                                out[i, j, 0] = f_bc(state_data, tmp,
+                                                    i, j, 0, t)
+                                for k in range(1, dim_z - 1):
+                                    out[i, j, k] = f_in(state_data, tmp,
+                                                        i, j, k, t)
+                                out[i, j, -1] = f_bc(state_data, tmp,
+                                                     i, j, dim_z - 1, t)
+                                
+            return sweep  # type: ignore
+        
+        def chain(previous, sweep, n):
+            """ helper appending a sweep evaluating the intermediate array `n` 
+            """
+            if previous is None:
+                @jit
+                def evaluate(state_data, tmp, t):
+                    sweep(state_data, tmp, t, tmp[n])
+            else:
+                @jit
+                def evaluate(state_data, tmp, t):
+                    previous(state_data, tmp, t)
+                    sweep(state_data, tmp, t, tmp[n])
+            return evaluate
+        
+        # compile the sweeps for all intermediate arrays
+        evaluate_stages = None
+        for n, stage_expr in enumerate(stages):
+            evaluate_stages = chain(evaluate_stages, make_sweep(stage_expr), n)
+        sweep_rhs = make_sweep(rhs_expr)
+        tmp_shape = (len(stages),) + shape
+        
+        if evaluate_stages is None:
+            @jit
+            def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                            parameters):
+                """ compiled helper function evaluating right hand side """
+                sweep_rhs(state_data, state_data, t, out)
+                
+        else:
+            tmp_dtype = state.data.dtype
+            
+            @jit
+            def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                            parameters):
+                """ compiled helper function evaluating right hand side """
+                # the intermediate arrays are allocated in each call, so the
+                # function can be called concurrently
+                tmp = np.empty(tmp_shape, dtype=tmp_dtype)
+                evaluate_stages(state_data, tmp, t)
+                sweep_rhs(state_data, tmp, t, out)
+                
+        self.diagnostics['fused_sweeps'] = len(stages) + 1
+        return pde_rhs_out  # type: ignore
+    
+    
+    def _make_pde_rhs_out_numba(self, state: FieldBase) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state defining the grid and data types
+                
+        Returns:
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. The
+            argument `parameters` is ignored.
+        """
+        self._prepare(state)
+        
+        if isinstance(state, FieldCollection):
+            return self._make_pde_rhs_out_numba_coll(state)
+        
+        if self.fuse_operators:
+            try:
+                return self._make_pde_rhs_out_numba_fused(state)
+            except NotImplementedError as err:
+                self._logger.debug('Cannot use fused kernel: %s', err)
+        
+        return super()._make_pde_rhs_out_numba(state)
+    
+    
     def _make_pde_rhs_numba(self, state: FieldBase) -> Callable:
         """ create a compiled function evaluating the right hand side of the PDE
         
@@ -358,6 +669,25 @@ class PDE(PDEBase):
         self._prepare(state)
         
         if isinstance(state, DataFieldBase):
+            if self.fuse_operators:
+                try:
+                    rhs_out = self._make_pde_rhs_out_numba_fused(state)
+                except NotImplementedError as err:
+                    self._logger.debug('Cannot use fused kernel: %s', err)
+                else:
+                    data_shape = state.data.shape
+                    data_dtype = state.data.dtype
+                    
+                    @jit
+                    def pde_rhs(state_data: np.ndarray, t: float):
+                        """ compiled helper function evaluating right hand side
+                        """
+                        out = np.empty(data_shape, dtype=data_dtype)
+                        rhs_out(state_data, t, out, None)
+                        return out
+                    
+                    return pde_rhs  # type: ignore
+                
             return jit(self._cache['rhs_funcs'][0])  # type: ignore
         elif isinstance(state, FieldCollection):
             return self._make_pde_rhs_numba_coll(state)
@@ -4,7 +4,7 @@ The Swift-Hohenberg equation
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
 """
 
-from typing import Callable
+from typing import Callable, Dict, Any  # @UnusedImport
 
 import numpy as np
 
@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -32,6 +32,7 @@ class SwiftHohenbergPDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('rate', 'kc2', 'delta')
 
 
     @fill_in_docstring
@@ -40,7 +41,8 @@ class SwiftHohenbergPDE(PDEBase):
                  kc2: float = 1.,
                  delta: float = 1.,
                  bc: BoundariesData = 'natural', 
-                 bc_lap: BoundariesData = None):
+                 bc_lap: BoundariesData = None,
+                 operator_method: str = 'auto'):
         r""" 
         Args:
             rate (float):
@@ -57,6 +59,11 @@ class SwiftHohenbergPDE(PDEBase):
                 scalar field :math:`c`. If `None`, the same boundary condition
                 as `bc` is chosen. Otherwise, this supports the same options as
                 `bc`.
+            operator_method (str):
+                The method used for the differential operators. The value
+                'spectral' selects operators based on fast Fourier transforms,
+                which are more accurate, but require periodic Cartesian grids
+                and are only supported by the numpy backend.
         """
         super().__init__()
         
@@ -65,6 +72,15 @@ class SwiftHohenbergPDE(PDEBase):
         self.delta = delta
         self.bc = bc
         self.bc_lap = bc if bc_lap is None else bc_lap
+        self.operator_method = operator_method
+        
+        
+    @property
+    def _operator_kwargs(self) -> Dict[str, Any]:
+        """ dict: arguments selecting the method of the operators """
+        if self.operator_method == 'auto':
+            return {}
+        return {'method': self.operator_method}
             
             
     def evolution_rate(self, state: ScalarField,  # type: ignore
@@ -81,8 +97,9 @@ class SwiftHohenbergPDE(PDEBase):
             Scalar field describing the evolution rate of the PDE 
         """
         assert isinstance(state, ScalarField)
-        state_laplace = state.laplace(bc=self.bc)
-        state_laplace2 = state_laplace.laplace(bc=self.bc_lap)
+        kwargs = self._operator_kwargs
+        state_laplace = state.laplace(bc=self.bc, **kwargs)
+        state_laplace2 = state_laplace.laplace(bc=self.bc_lap, **kwargs)
         
         result = ((self.rate - self.kc2**2) * state
                   - 2 * self.kc2 * state_laplace
@@ -92,41 +109,74 @@ class SwiftHohenbergPDE(PDEBase):
         return result  # type: ignore
      
      
-    def _make_pde_rhs_numba(self, state: ScalarField  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
-          
+    def linear_operator_spectrum(self, k2: np.ndarray) -> np.ndarray:
+        """ return the linear part of the PDE in Fourier space
+        
+        Args:
+            k2 (:class:`numpy.ndarray`):
+                The squared magnitudes of the wave vectors
+                
+        Returns:
+            :class:`numpy.ndarray`: The multiplier of each Fourier mode
+        """
+        return self.rate - (self.kc2 - k2)**2
+     
+     
+    def evolution_rate_nonlinear(self, state: ScalarField,  # type: ignore
+                                 t: float = 0) -> ScalarField:
+        """ evaluate the non-linear part of the right hand side of the PDE
+        
         Args:
             state (:class:`~pde.fields.ScalarField`):
-                An example for the state defining the grid and data types
-                  
+                The scalar field describing the concentration distribution
+            t (float): The current time point
+            
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            :class:`~pde.fields.ScalarField`:
+            Scalar field describing the non-linear part of the evolution rate
         """
-        shape = state.grid.shape
-        arr_type = nb.typeof(np.empty(shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
-          
-        rate = self.rate
-        kc2 = self.kc2
-        delta = self.delta
+        assert isinstance(state, ScalarField)
+        result = self.delta * state**2 - state**3
+        result.label = 'evolution rate'
+        return result  # type: ignore
+     
+     
+    def _make_pde_rhs_out_numba(self, state: ScalarField  # type: ignore
+                                ) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
+        Args:
+            state (:class:`~pde.fields.ScalarField`):
+                An example for the state defining the grid and data types
+                
+        Returns:
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
+        """
+        if self.operator_method not in {'auto', 'numba'}:
+            raise NotImplementedError('Operators of type '
+                                      f'`{self.operator_method}` cannot be '
+                                      'compiled')
         laplace = state.grid.get_operator('laplace', bc=self.bc)
         laplace2 = state.grid.get_operator('laplace', bc=self.bc_lap)
   
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """ 
-            state_laplace = laplace(state_data)
-            state_laplace2 = laplace2(state_laplace)
+            rate, kc2, delta = parameters[0], parameters[1], parameters[2]
+            # the second laplacian requires a separate array
+            state_laplace2 = np.empty_like(out)
+            laplace(state_data, out)
+            laplace2(out, state_laplace2)
               
-            return ((rate - kc2**2) * state_data
-                    - 2 * kc2 * state_laplace
-                    - state_laplace2
-                    + delta * state_data**2 - state_data**3)
+            for i in range(out.size):
+                c = state_data.flat[i]
+                out.flat[i] = ((rate - kc2**2) * c
+                               - 2 * kc2 * out.flat[i]
+                               - state_laplace2.flat[i]
+                               + delta * c**2 - c**3)
               
-        return pde_rhs  # type: ignore
+        return pde_rhs_out  # type: ignore
       
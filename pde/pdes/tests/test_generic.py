@@ -6,7 +6,7 @@ import pytest
 import numpy as np
 
 from ... import pdes
-from ...grids import UnitGrid
+from ...grids import UnitGrid, CartesianGrid
 from ...fields import ScalarField
 
 
@@ -16,6 +16,7 @@ from ...fields import ScalarField
                                        pdes.KPZInterfacePDE,
                                        pdes.SwiftHohenbergPDE,
                                        pdes.DiffusionPDE,
+                                       pdes.AllenCahnPDE,
                                        pdes.CahnHilliardPDE])
 def test_pde_consistency(pde_class, dim):
     """ test some methods of generic PDE models """
@@ -30,7 +31,34 @@ def test_pde_consistency(pde_class, dim):
     rhs = eq._make_pde_rhs_numba(state)
     np.testing.assert_allclose(field.data, rhs(state.data, 0))
     
+    rhs_out = eq.make_pde_rhs(state, backend='numba', with_out=True)
+    out = np.empty_like(state.data)
+    rhs_out(state.data, 0, out)
+    np.testing.assert_allclose(field.data, out)
+    
+
 
+def test_pde_spectral_operators():
+    """ test PDEs using spectral operators """
+    grid = CartesianGrid([[0, 2 * np.pi]], 16, periodic=True)
+    state = ScalarField.from_expression(grid, 'sin(x)')
+    x = grid.axes_coords[0]
+    
+    eq = pdes.KuramotoSivashinskyPDE(nu=2, operator_method='spectral')
+    field = eq.evolution_rate(state)
+    np.testing.assert_allclose(field.data, -np.sin(x) - 0.5 * np.cos(x)**2,
+                               atol=1e-12)
+    # the numba backend is not available, so numpy is used instead
+    assert eq.make_pde_rhs(state)._backend == 'numpy'  # type: ignore
+    
+    eq = pdes.SwiftHohenbergPDE(rate=1, kc2=1, delta=0,
+                                operator_method='spectral')
+    field = eq.evolution_rate(state)
+    np.testing.assert_allclose(field.data, state.data - state.data**3,
+                               atol=1e-12)
+    assert eq.make_pde_rhs(state)._backend == 'numpy'  # type: ignore
+    
+    
 
 def test_pde_consistency_test():
     """ test whether the consistency of a pde implementation is checked """
@@ -44,6 +44,32 @@ def test_pde_scalar():
     
     
 
+@pytest.mark.parametrize('dim', [1, 2, 3])
+@pytest.mark.parametrize('expr,sweeps',
+                         [('laplace(c**3 - c - laplace(c))', 2),
+                          ('sin(t) * c + gradient_squared(c)', 1)])
+def test_pde_fused_kernels(dim, expr, sweeps):
+    """ test fused kernels against the separately compiled operators """
+    grid = UnitGrid([6] * dim, periodic=[True, False, True][:dim])
+    field = ScalarField.random_uniform(grid)
+    
+    eq = PDE({'c': expr})
+    rhs = eq.make_pde_rhs(field, backend='numba')
+    assert eq.diagnostics['fused_sweeps'] == sweeps
+    
+    eq_ref = PDE({'c': expr})
+    eq_ref.fuse_operators = False
+    rhs_ref = eq_ref.make_pde_rhs(field, backend='numba')
+    assert 'fused_sweeps' not in eq_ref.diagnostics
+    
+    np.testing.assert_allclose(rhs(field.data, 0.5), rhs_ref(field.data, 0.5))
+    
+    # subsequent calls do not depend on previous ones
+    field.data = np.random.uniform(size=field.data.shape)
+    np.testing.assert_allclose(rhs(field.data, 0.5), rhs_ref(field.data, 0.5))
+    
+    
+
 def test_pde_vector():
     """ test PDE with a single vector field """
     eq = PDE({'u': 'vector_laplace(u) + exp(-t)'})
@@ -84,8 +110,31 @@ def test_pde_vector_scalar():
     res_b = eq.solve(field, t_range=1, dt=0.01, backend='numba', tracker=None)
     
     res_a.assert_field_compatible(res_b)
-    np.testing.assert_allclose(res_a.data, res_b.data)  
+    np.testing.assert_allclose(res_a.data, res_b.data)
+
+    # evaluate the right hand side in place
+    rhs = eq.make_pde_rhs(field, backend='numba', with_out=True)
+    out = np.empty_like(field.data)
+    rhs(field.data, 0, out)
+    np.testing.assert_allclose(out, eq.evolution_rate(field).data)
+
+
 
+def test_pde_collection_data_split():
+    """ test splitting the data of collections in compiled functions """
+    eq = PDE({'a': 'laplace(a) - c',
+              'u': 'vector_laplace(u) + gradient(c)',
+              'c': 'divergence(u) - a * c'})
+    grid = UnitGrid([6, 4])
+    field = FieldCollection([ScalarField.random_uniform(grid),
+                             VectorField.random_uniform(grid),
+                             ScalarField.random_uniform(grid)])
+    
+    rhs = eq.make_pde_rhs(field, backend='numba')
+    # the numpy implementation splits the data using python functions
+    expected = eq.evolution_rate(field, t=0.5)
+    np.testing.assert_allclose(rhs(field.data, 0.5), expected.data)
+    
 
 
 @pytest.mark.parametrize('grid', iter_grids())
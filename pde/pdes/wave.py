@@ -12,7 +12,7 @@ import numpy as np
 from .base import PDEBase
 from ..fields import ScalarField, FieldCollection
 from ..grids.boundaries.axes import BoundariesData
-from ..tools.numba import nb, jit
+from ..tools.numba import jit
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -36,6 +36,7 @@ class WavePDE(PDEBase):
     """
 
     explicit_time_dependence = False
+    runtime_parameters = ('speed',)
     
 
     @fill_in_docstring
@@ -95,35 +96,29 @@ class WavePDE(PDEBase):
         return FieldCollection([u_t, v_t])
     
     
-    def _make_pde_rhs_numba(self, state: FieldCollection  # type: ignore
-                            ) -> Callable:
-        """ create a compiled function evaluating the right hand side of the PDE
+    def _make_pde_rhs_out_numba(self,  # type: ignore
+                                state: FieldCollection) -> Callable:
+        """ create a compiled function evaluating the right hand side in place
         
         Args:
             state (:class:`~pde.fields.FieldCollection`):
                 An example for the state defining the grid and data types
                 
         Returns:
-            A function with signature `(state_data, t)`, which can be called
-            with an instance of :class:`numpy.ndarray` of the state data and
-            the time to obtained an instance of :class:`numpy.ndarray` giving
-            the evolution rate.  
+            A function with signature `(state_data, t, out, parameters)`, which
+            writes the evolution rate into the supplied array `out`. Here,
+            `parameters` are the values of the runtime parameters.
         """
-        shape = state.grid.shape
-        arr_type = nb.typeof(np.empty((2,) + shape, dtype=np.double))
-        signature = arr_type(arr_type, nb.double)
-        
-        speed2 = self.speed**2
         laplace = state.grid.get_operator('laplace', bc=self.bc)
 
-        @jit(signature)
-        def pde_rhs(state_data: np.ndarray, t: float):
+        @jit
+        def pde_rhs_out(state_data: np.ndarray, t: float, out: np.ndarray,
+                        parameters: np.ndarray):
             """ compiled helper function evaluating right hand side """
-            rate = np.empty_like(state_data)
-            rate[0] = state_data[1]
-            laplace(state_data[0], out=rate[1])
-            rate[1] *= speed2
-            return rate
+            speed2 = parameters[0]**2
+            out[0] = state_data[1]
+            laplace(state_data[0], out=out[1])
+            out[1] *= speed2
             
-        return pde_rhs  # type: ignore
+        return pde_rhs_out  # type: ignore
     
@@ -5,9 +5,14 @@ Solvers define how a pde is solved, i.e., advanced in time.
    :nosignatures:
 
    ~controller.Controller
+   ~profiler.SimulationProfiler
+   ~simulation.CompiledSimulation
+   ~distributed.DistributedSolver
    ~explicit.ExplicitSolver
    ~implicit.ImplicitSolver
+   ~implicit.NewtonKrylovSolver
    ~scipy.ScipySolver
+   ~spectral.SpectralSolver
    ~registered_solvers
    
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
@@ -16,9 +21,12 @@ Solvers define how a pde is solved, i.e., advanced in time.
 from typing import List
 
 from .controller import Controller
+from .distributed import DistributedSolver
 from .explicit import ExplicitSolver
-from .implicit import ImplicitSolver
+from .implicit import ImplicitSolver, NewtonKrylovSolver
 from .scipy import ScipySolver
+from .simulation import CompiledSimulation
+from .spectral import SpectralSolver
 
 
 
@@ -33,5 +41,6 @@ def registered_solvers() -> List[str]:
 
 
 
-__all__ = ['Controller', 'ExplicitSolver', 'ImplicitSolver', 'ScipySolver',
-           'registered_solvers']
+__all__ = ['Controller', 'CompiledSimulation', 'DistributedSolver',
+           'ExplicitSolver', 'ImplicitSolver', 'NewtonKrylovSolver',
+           'ScipySolver', 'SpectralSolver', 'registered_solvers']
@@ -5,15 +5,19 @@ Package that contains base classes for solvers
 """
 
 import logging
-from typing import Dict, Any, List  # @UnusedImport
+from typing import Dict, Any, List, TYPE_CHECKING  # @UnusedImport
 from abc import ABCMeta, abstractmethod
 
 import numba as nb
+import numpy as np
 
 from ..pdes.base import PDEBase
 from ..fields.base import FieldBase
 from ..tools.misc import classproperty
 
+if TYPE_CHECKING:
+    from ..trackers.compiled import CompiledTrackerBase  # @UnusedImport
+
 
 
 class SolverBase(metaclass=ABCMeta):
@@ -22,6 +26,10 @@ class SolverBase(metaclass=ABCMeta):
     
     _subclasses: Dict[str, 'SolverBase'] = {}  # all inheriting classes
     
+    supports_compiled_trackers: bool = False
+    """ bool: flag indicating whether the solver evaluates instances of
+    :class:`~pde.trackers.compiled.CompiledTrackerBase` in its inner loop """
+    
         
     def __init__(self, pde: PDEBase):
         """ initialize the solver
@@ -34,11 +42,23 @@ class SolverBase(metaclass=ABCMeta):
         self.info: Dict[str, Any] = {'class': self.__class__.__name__,
                                      'pde_class': self.pde.__class__.__name__}
         self._logger = logging.getLogger(self.__class__.__name__)
+        # compiled trackers that the stepper should evaluate in its inner loop
+        self.compiled_trackers: List["CompiledTrackerBase"] = []
         
 
-    def __init_subclass__(cls, **kwargs):  # @NoSelf
-        """ register all subclassess to reconstruct them later """
+    def __init_subclass__(cls, register: bool = True,
+                          **kwargs):  # @NoSelf
+        """ register all subclassess to reconstruct them later
+        
+        Args:
+            register (bool):
+                Flag determining whether the class is registered, so it can be
+                created using :meth:`from_name`. Helper classes that cannot be
+                created from a PDE alone should not be registered.
+        """
         super().__init_subclass__(**kwargs)
+        if not register:
+            return
         cls._subclasses[cls.__name__] = cls
         if hasattr(cls, 'name') and cls.name:
             if cls.name in cls._subclasses:
@@ -47,6 +67,24 @@ class SolverBase(metaclass=ABCMeta):
             cls._subclasses[cls.name] = cls
 
 
+    @staticmethod
+    def _get_step_count(t_start: float, t_end: float, dt: float) -> int:
+        """ determine the number of steps required to reach `t_end`
+        
+        Deviations caused by rounding errors are tolerated, so a time span of
+        (almost exactly) `n * dt` results in `n` steps.
+        
+        Args:
+            t_start (float): The initial time
+            t_end (float): The time that should be reached
+            dt (float): The time step
+            
+        Returns:
+            int: The number of steps, which is at least 1
+        """
+        return max(1, int(np.ceil((t_end - t_start) / dt - 1e-6)))
+
+
     @classmethod
     def from_name(cls, name: str, pde: PDEBase, **kwargs) -> "SolverBase":
         r""" create solver class based on its name
@@ -89,7 +127,8 @@ class SolverBase(metaclass=ABCMeta):
 
     def _make_pde_rhs(self, state: FieldBase,
                       backend: str = 'auto',
-                      allow_stochastic: bool = False):
+                      allow_stochastic: bool = False,
+                      with_out: bool = False):
         """ obtain a function for evaluating the right hand side
         
         Args:
@@ -104,6 +143,11 @@ class SolverBase(metaclass=ABCMeta):
             allow_stochastic (bool):
                 Flag indicating whether stochastic simulations should be
                 supported.
+            with_out (bool):
+                Flag indicating whether the returned function writes the
+                deterministic evolution rate into a supplied array. In this
+                case, the function has the signature `(state_data, t, out)`.
+                This is not supported for stochastic equations.
                 
         Raises:
             RuntimeError: when a stochastic partial differential equation is
@@ -120,9 +164,13 @@ class SolverBase(metaclass=ABCMeta):
                                'stochastic equations')
         
         if self.pde.is_sde:
+            if with_out:
+                raise RuntimeError('Stochastic equations do not support '
+                                   'evaluating the right hand side in place')
             rhs = self.pde.make_sde_rhs(state, backend=backend)
         else:
-            rhs = self.pde.make_pde_rhs(state, backend=backend)
+            rhs = self.pde.make_pde_rhs(state, backend=backend,
+                                        with_out=with_out)
             
         if hasattr(rhs, '_backend'):
             self.info['backend'] = rhs._backend  # type: ignore
@@ -139,3 +187,12 @@ class SolverBase(metaclass=ABCMeta):
         pass
    
 
+
+    
+    def finalize(self) -> None:
+        """ release resources acquired by the stepper
+        
+        This method is called by :class:`~pde.solvers.controller.Controller`
+        after the simulation finished, e.g., to stop helper processes. 
+        """
+        pass
@@ -5,16 +5,27 @@ Defines the :class:`~pde.controller.Controller` class for solving pdes.
 '''
 
 
-from typing import (Union, Tuple, Any, Dict, TypeVar,  # @UnusedImport
+from pathlib import Path
+from typing import (Union, Tuple, Any, Dict, TypeVar, Optional,  # @UnusedImport
                     TYPE_CHECKING)
 import datetime
+import os
+import pickle
+import tempfile
 import time
 import logging
 
+import numpy as np
+
 from .. import __version__
 from .base import SolverBase
+from .profiler import SimulationProfiler
 from ..trackers.base import (TrackerCollectionDataType, TrackerCollection,
                              FinishedSimulation) 
+from ..trackers.compiled import CompiledTrackerBase
+from ..trackers.intervals import IntervalData, ConstantIntervals, get_interval
+from ..tools.numba import (get_random_state, set_random_state,
+                           CompilationCounter)
 
 if TYPE_CHECKING:
     from ..fields.base import FieldBase  # @UnusedImport
@@ -25,16 +36,58 @@ TState = TypeVar('TState', bound='FieldBase')
 
 
 
+def _write_checkpoint(path: Path, data: Dict[str, Any]) -> None:
+    """ write checkpoint data atomically to a file
+    
+    The data is first written to a temporary file, which then replaces the
+    checkpoint file. Consequently, the checkpoint file is always consistent,
+    even if the process is killed while writing.
+    
+    Args:
+        path (:class:`~pathlib.Path`): The path of the checkpoint file
+        data (dict): The data describing the simulation
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=path.name, suffix='.tmp',
+                                    dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            pickle.dump(data, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    
+    
+
 class Controller():
-    """ class controlling a simulation """
+    """ class controlling a simulation
+    
+    The controller can periodically write checkpoints, which contain the
+    state, the time, the information of the solver, the state of the trackers,
+    and the state of the random number generators. An interrupted simulation
+    can be resumed from such a checkpoint using the `resume_from` argument of
+    :meth:`run`. Resumed simulations reproduce uninterrupted ones exactly if the
+    stepper of the solver does not keep internal state between calls and if
+    checkpoints are written at fixed intervals of simulation time.
+    """
     
     _t_range: Tuple[float, float]
     
+    compilation_warning_threshold: int = 100
+    """ int: number of functions compiled during a simulation above which a
+    warning is logged. Many compilations often indicate that functions are
+    created anew for every step, which is slow. """
+    
     
     def __init__(self, solver: SolverBase,
                  t_range: TRangeType,
                  tracker: TrackerCollectionDataType =
-                    ['progress', 'consistency']):
+                    ['progress', 'consistency'],
+                 checkpoint: str = None,
+                 checkpoint_interval: IntervalData = '0:10:00',
+                 profile: bool = False):
         """ initialize the controller
         
         Args:
@@ -52,10 +105,34 @@ class Controller():
                 displays a progress bar and checks the state for consistency,
                 aborting the simulation when not-a-number values appear. To
                 disable trackers, set the value to `None`.        
+            checkpoint (str, optional):
+                Path of a file to which checkpoints are written periodically.
+                The file is replaced atomically, so it always contains a
+                consistent checkpoint. If `None`, no checkpoints are written.
+            checkpoint_interval:
+                The interval at which checkpoints are written. Numbers specify
+                intervals in simulation time, which is necessary for resuming
+                simulations exactly, while strings specify intervals in real
+                time, e.g., '0:10:00' for every ten minutes.
+            profile (bool):
+                Flag determining whether detailed timing information is
+                collected, which is then available in the `profile` entry of
+                :attr:`diagnostics` and the attribute `profiler`. This breaks
+                down the time spent in the individual trackers, the stepper, and
+                on compiling code, and measures the operators used by the
+                simulation.
         """
         self.solver = solver
         self.t_range = t_range  # type: ignore
         self.trackers = TrackerCollection.from_data(tracker)
+        self.checkpoint = None if checkpoint is None else Path(checkpoint)
+        self.checkpoint_interval: Optional[ConstantIntervals]
+        if self.checkpoint is None:
+            self.checkpoint_interval = None
+        else:
+            self.checkpoint_interval = get_interval(checkpoint_interval)
+        self.profile = profile
+        self.profiler: Optional[SimulationProfiler] = None
         
         self.info: Dict[str, Any] = {'package_version': __version__}
         self._logger = logging.getLogger(self.__class__.__name__)
@@ -79,7 +156,28 @@ class Controller():
                                  'a tuple of two numbers')
 
 
-    def run(self, state: TState, dt: float = None) -> TState: 
+    def _write_checkpoint(self, state: "FieldBase", t: float) -> None:
+        """ write a checkpoint of the current simulation
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`): The current state
+            t (float): The current time
+        """
+        data = {'state': state.data,
+                't': t,
+                'solver_info': self.solver.info,
+                'controller_info': self.info,
+                'tracker_action_times': self.trackers.tracker_action_times,
+                'tracker_intervals': [tracker.interval
+                                      for tracker in self.trackers.trackers],
+                'checkpoint_interval': self.checkpoint_interval,
+                'random_state': get_random_state()}
+        _write_checkpoint(self.checkpoint, data)  # type: ignore
+        self._logger.info(f'Wrote checkpoint at t={t}')
+        
+        
+    def run(self, state: TState, dt: float = None,
+            resume_from: str = None) -> TState: 
         """ run the simulation 
         
         Diagnostic information about the solver procedure are available in the
@@ -95,13 +193,33 @@ class Controller():
             dt (float):
                 Time step of the chosen stepping scheme. If `None`, a default
                 value based on the stepper will be chosen.
+            resume_from (str, optional):
+                Path of a checkpoint file from which the simulation is resumed.
+                The checkpoint replaces the data of `state` and the start time.
+                Trackers are initialized normally, so storages should use the
+                `append` write mode to keep earlier data.
                 
         Returns:
             The state at the final time point.
         """
         # copy the initial state to not modify the supplied one
         state = state.copy()
+        if self.profile:
+            self.profiler = SimulationProfiler()
+        else:
+            self.profiler = None
         t_start, t_end = self.t_range
+        
+        if resume_from is not None:
+            # load the state of the simulation from a checkpoint
+            with open(resume_from, 'rb') as fp:
+                checkpoint = pickle.load(fp)
+            state.data[...] = checkpoint['state']
+            t_start = checkpoint['t']
+            self.info.update(checkpoint['controller_info'])
+            self.info['resumed_at'] = t_start
+        else:
+            checkpoint = None
             
         # initialize solver information
         self.info['t_start'] = t_start
@@ -110,8 +228,24 @@ class Controller():
         self.diagnostics: Dict[str, Any] = {'controller': self.info,
                                             'solver': self.solver.info}
 
+        # compiled trackers with constant intervals are evaluated in the inner
+        # loop of solvers supporting this, while the remaining trackers are
+        # handled by the controller
+        self.solver.compiled_trackers = []
+        for tracker in self.trackers.trackers:
+            if isinstance(tracker, CompiledTrackerBase):
+                tracker.in_loop = (self.solver.supports_compiled_trackers and
+                                   isinstance(tracker.interval,
+                                              ConstantIntervals))
+                if tracker.in_loop:
+                    self.solver.compiled_trackers.append(tracker)
+        
         # initialize trackers
-        self.trackers.initialize(state, info=self.diagnostics)
+        if self.profiler is None:
+            self.trackers.initialize(state, info=self.diagnostics)
+        else:
+            with self.profiler.measure('initialize_trackers'):
+                self.trackers.initialize(state, info=self.diagnostics)
             
         def _handle_stop_iteration(err):
             """ helper function for handling interrupts raised by trackers """
@@ -140,8 +274,48 @@ class Controller():
                                         
             return msg_level, msg
 
-        # initialize the stepper
-        stepper = self.solver.make_stepper(state=state, dt=dt)
+        # initialize the stepper and count the functions compiled while
+        # preparing and running it
+        compilation = CompilationCounter()
+        with compilation:
+            if self.profiler is None:
+                stepper = self.solver.make_stepper(state=state, dt=dt)
+            else:
+                with self.profiler.measure('make_stepper'), \
+                        self.profiler.record_operators():
+                    stepper = self.solver.make_stepper(state=state, dt=dt)
+                stepper = self.profiler.wrap('stepper', stepper)
+                self.trackers.profiler = self.profiler
+        
+        if checkpoint is not None:
+            # restore the state of the solver, the trackers, and the random
+            # number generators
+            self.solver.info.update(checkpoint['solver_info'])
+            if (len(checkpoint['tracker_intervals']) !=
+                    len(self.trackers.trackers)):
+                raise RuntimeError('The number of trackers differs from the '
+                                   'number stored in the checkpoint')
+            for tracker, interval in zip(self.trackers.trackers,
+                                         checkpoint['tracker_intervals']):
+                interval._resume()
+                tracker.interval = interval
+            self.trackers.tracker_action_times = \
+                                        checkpoint['tracker_action_times']
+            if self.trackers.tracker_action_times:
+                self.trackers.time_next_action = \
+                                    min(self.trackers.tracker_action_times)
+            if self.checkpoint is None:
+                t_checkpoint = np.inf
+            else:
+                self.checkpoint_interval = checkpoint['checkpoint_interval']
+                self.checkpoint_interval._resume()  # type: ignore
+                t_checkpoint = self.checkpoint_interval._t_next  # type: ignore
+            set_random_state(checkpoint['random_state'])
+        elif self.checkpoint is not None:
+            interval = self.checkpoint_interval
+            t_checkpoint = interval._initialize(t_start)  # type: ignore
+        else:
+            t_checkpoint = np.inf
                            
         # initialize profiling information
         solver_start = datetime.datetime.now()
@@ -163,24 +337,39 @@ class Controller():
         # evolve the system from t_start to t_end
         t = t_start
         self._logger.debug(f'Start simulation at t={t}')
+        compilation.start()
         try:
-            while t < t_end:
+            # the steppers return the time of their last step, which might
+            # deviate slightly from `t_end` due to rounding errors
+            while t < t_end - atol:
                 # determine next time point with an action
                 t_next_action = self.trackers.handle(state, t, atol=atol)
                 t_next_action = max(t_next_action, t + atol)
-                t_break = min(t_next_action, t_end)
+                
+                # write a checkpoint if necessary
+                if self.checkpoint is not None and t >= t_checkpoint - atol:
+                    t_checkpoint = self.checkpoint_interval.next(t)
+                    if self.profiler is None:
+                        self._write_checkpoint(state, t)
+                    else:
+                        with self.profiler.measure('checkpoint'):
+                            self._write_checkpoint(state, t)
+                t_break = min(t_next_action, t_checkpoint, t_end)
                 
                 prof_start_solve = time.process_time()
                 profiler['tracker'] += prof_start_solve - prof_start_tracker 
                 
                 # advance the system to the new time point
-                t = stepper(state, t, t_break)
-                
-                prof_start_tracker = time.process_time()
-                profiler['solver'] += prof_start_tracker - prof_start_solve
+                try:
+                    t = stepper(state, t, t_break)
+                finally:
+                    prof_start_tracker = time.process_time()
+                    profiler['solver'] += prof_start_tracker - prof_start_solve
                 
         except StopIteration as err:
-            # iteration has been interrupted by a tracker
+            # iteration has been interrupted by a tracker, which might have
+            # been evaluated by the stepper at a later time
+            t = getattr(err, 't', t)
             msg_level, msg = _handle_stop_iteration(err)
             
         except KeyboardInterrupt:
@@ -203,13 +392,32 @@ class Controller():
             except StopIteration as err:
                 # error detected in the final handling of the tracker
                 msg_level, msg = _handle_stop_iteration(err)
+                
+        finally:
+            # release resources that the stepper might have acquired
+            self.solver.finalize()
+            self.trackers.profiler = None
+            compilation.stop()
+        self.solver.info['compilation'] = compilation.results
+        self._logger.info(f'Compiled {compilation.count} functions in '
+                          f'{compilation.time:.3g} seconds')
+        if compilation.count > self.compilation_warning_threshold:
+            self._logger.warning(f'Compiled {compilation.count} functions '
+                                 'during the simulation, which might indicate '
+                                 'that functions are compiled repeatedly')
         
         # calculate final statistics
         profiler['tracker'] += time.process_time() - prof_start_tracker
         duration = datetime.datetime.now() - solver_start
         self.info['solver_duration'] = str(duration)
         self.info['t_final'] = t
-        self.trackers.finalize(info=self.diagnostics)
+        if self.profiler is None:
+            self.trackers.finalize(info=self.diagnostics)
+        else:
+            with self.profiler.measure('finalize_trackers'):
+                self.trackers.finalize(info=self.diagnostics)
+            self.profiler.finish()
+            self.diagnostics['profile'] = self.profiler.results
         
         # show information after a potential progress bar has been deleted to
         # not mess up the display
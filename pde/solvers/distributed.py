@@ -0,0 +1,428 @@
+"""
+Defines a solver that distributes the simulation over several processes
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+import multiprocessing as mp
+import traceback
+from multiprocessing.connection import wait
+from typing import Callable, Dict, List, Tuple, Any  # @UnusedImport
+
+import numpy as np
+
+from .base import SolverBase
+from .explicit import ExplicitSolver
+from ..pdes.base import PDEBase
+from ..fields import FieldCollection
+from ..fields.base import FieldBase, DataFieldBase
+from ..grids.cartesian import CartesianGridBase, CartesianGrid
+from ..tools.numba import random_seed
+
+
+
+def _make_block_state(state: FieldBase, grid: CartesianGridBase) -> FieldBase:
+    """ create a state with the same structure as `state` on another grid
+
+    Args:
+        state (:class:`~pde.fields.FieldBase`):
+            The state whose structure is copied
+        grid (:class:`~pde.grids.cartesian.CartesianGridBase`):
+            The grid on which the new state is defined
+
+    Returns:
+        :class:`~pde.fields.FieldBase`: The new state with uninitialized data
+    """
+    if isinstance(state, DataFieldBase):
+        return state.__class__(grid, label=state.label)
+    elif isinstance(state, FieldCollection):
+        return FieldCollection([field.__class__(grid, label=field.label)
+                                for field in state], label=state.label)
+    else:
+        raise TypeError(f'Unsupported field {state.__class__.__name__}')
+
+
+
+def _run_block(pde: PDEBase, block_state: FieldBase, dt: float,
+               geometry: Dict[str, Any], options: Dict[str, Any],
+               shm_name: str, barrier, conn) -> None:
+    """ advance a single block of the grid in a separate process
+
+    Args:
+        pde (:class:`~pde.pdes.base.PDEBase`):
+            The partial differential equation that is solved
+        block_state (:class:`~pde.fields.FieldBase`):
+            An example for the state of the block including the halo
+        dt (float):
+            The time step
+        geometry (dict):
+            Describes the block using the items `shape` and `dtype` of the
+            global state data, the data `axis` that is decomposed, the
+            `indices` of the global data that are copied into the block, and
+            the slices `own_global` and `own_local` selecting the data owned by
+            this block in the global and the local data, respectively
+        options (dict):
+            The `scheme` and the `backend` of the explicit solver, the `seed`
+            of the random number generator, and the `exchange_interval`
+        shm_name (str):
+            The name of the shared memory containing the global state data
+        barrier (:class:`multiprocessing.Barrier`):
+            Barrier synchronizing all blocks during the halo exchange
+        conn (:class:`multiprocessing.connection.Connection`):
+            Connection for receiving commands from the main process
+    """
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(geometry['shape'], dtype=geometry['dtype'],
+                          buffer=shm.buf)
+        axis, indices = geometry['axis'], geometry['indices']
+        own_global, own_local = geometry['own_global'], geometry['own_local']
+
+        # create the stepper advancing the block
+        explicit = ExplicitSolver(pde, scheme=options['scheme'],
+                                  backend=options['backend'])
+        inner_stepper = explicit._make_fixed_stepper(block_state, dt)
+        work = explicit._work_buffers
+        random_seed(options['seed'])
+
+        while True:
+            command = conn.recv()
+            if command is None:
+                break  # stop the process
+            t_start, steps = command
+
+            try:
+                steps_done = 0
+                while steps_done < steps:
+                    n = min(steps - steps_done, options['exchange_interval'])
+                    np.take(data, indices, axis=axis, out=block_state.data)
+                    barrier.wait()  # wait until all blocks read their data
+                    inner_stepper(block_state.data, t_start + steps_done * dt,
+                                  n, work)
+                    data[own_global] = block_state.data[own_local]
+                    barrier.wait()  # wait until all blocks wrote their data
+                    steps_done += n
+
+            except Exception:
+                barrier.abort()  # release the other blocks
+                conn.send(('error', traceback.format_exc()))
+            else:
+                conn.send(('done', t_start + steps * dt))
+
+    finally:
+        shm.close()
+
+
+
+class DistributedSolver(SolverBase):
+    """ class for solving partial differential equations using several
+    processes
+
+    The Cartesian grid is split into blocks along its first axis and each block
+    is advanced by a separate process using the explicit stepping schemes of
+    :class:`~pde.solvers.explicit.ExplicitSolver`. The blocks are extended by a
+    halo of cells that are exchanged via shared memory, so the boundary
+    conditions of the blocks only affect the halo. The halo needs to be wide
+    enough to cover the distance over which information propagates during
+    `exchange_interval` steps. This is the number of evaluations of the right
+    hand side (one for the Euler scheme and four for the Runge-Kutta scheme)
+    times the reach of the stencils of the PDE (one for a Laplace operator and
+    two for nested operators, as in the Cahn-Hilliard equation).
+    The global state is only assembled when the stepper returns, e.g., to
+    handle trackers.
+    """
+
+    name = 'distributed'
+
+
+    def __init__(self, pde: PDEBase,
+                 num_processes: int = None,
+                 scheme: str = 'euler',
+                 backend: str = 'auto',
+                 halo: int = None,
+                 exchange_interval: int = 1,
+                 seed: int = 0):
+        """ initialize the distributed solver
+
+        Args:
+            pde (:class:`~pde.pdes.base.PDEBase`):
+                The instance describing the pde that needs to be solved
+            num_processes (int):
+                The number of processes. If `None`, the number of CPUs is used.
+            scheme (str):
+                Defines the explicit scheme to use. Supported values are
+                'euler', 'runge-kutta' (or 'rk' for short).
+            backend (str):
+                Determines how the function is created. Accepted  values are
+                'numpy` and 'numba'. Alternatively, 'auto' lets the code decide
+                for the most optimal backend.
+            halo (int):
+                The number of cells that are exchanged on each side of a block.
+                If `None`, it is set to twice the number of evaluations of the
+                right hand side between exchanges.
+            exchange_interval (int):
+                The number of time steps between exchanges of the halo. This
+                needs to be one for stochastic equations, since the noise in
+                the halo differs from the noise in the neighboring block.
+            seed (int):
+                The random seed of the first process. The other processes use
+                consecutive seeds, so stochastic simulations use independent
+                noise in all blocks.
+        """
+        super().__init__(pde)
+        if pde.is_sde and exchange_interval != 1:
+            raise ValueError('Stochastic equations require exchanging the '
+                             'halo in every step (exchange_interval=1)')
+        if num_processes is None:
+            num_processes = mp.cpu_count()
+        self.num_processes = int(num_processes)
+        self.scheme = scheme
+        self.backend = backend
+        self.exchange_interval = int(exchange_interval)
+        self.seed = int(seed)
+
+        if halo is None:
+            evaluations = 1 if scheme == 'euler' else 4
+            halo = 2 * evaluations * self.exchange_interval
+        self.halo = int(halo)
+
+        self._processes: List[mp.Process] = []
+        self._connections: List = []
+        self._barrier = None
+        self._shm = None
+
+
+    def _get_blocks(self, grid: CartesianGridBase) \
+            -> List[Tuple[int, int, int, int]]:
+        """ determine the decomposition of the grid into blocks
+
+        Args:
+            grid (:class:`~pde.grids.cartesian.CartesianGridBase`):
+                The grid that is decomposed along its first axis
+
+        Returns:
+            list: For each block, a tuple of indices giving the range including
+            the halo and the range owned by the block
+        """
+        size = grid.shape[0]
+        periodic = grid.periodic[0]
+        num_blocks = min(self.num_processes, size)
+        if self.halo > size:
+            raise ValueError(f'Halo of {self.halo} cells is larger than the '
+                             f'grid with {size} cells')
+
+        bounds = np.linspace(0, size, num_blocks + 1).astype(int)
+        blocks = []
+        for i in range(num_blocks):
+            own_start, own_end = int(bounds[i]), int(bounds[i + 1])
+            if periodic or i > 0:
+                ext_start = own_start - self.halo
+            else:
+                ext_start = own_start
+            if periodic or i < num_blocks - 1:
+                ext_end = own_end + self.halo
+            else:
+                ext_end = own_end
+            blocks.append((ext_start, ext_end, own_start, own_end))
+        return blocks
+
+
+    def _get_block_geometry(self, state: FieldBase,
+                            block: Tuple[int, int, int, int]) \
+            -> Tuple[FieldBase, Dict[str, Any]]:
+        """ determine the state and the geometry of a single block
+
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the global state
+            block (tuple):
+                The indices along the first axis that define the block. The
+                first two items give the range including the halo, while the
+                last two give the range owned by this block.
+
+        Returns:
+            tuple: The state of the block including the halo and a dictionary
+            describing the geometry, as expected by :func:`_run_block`
+        """
+        grid = state.grid
+        axis = state.data.ndim - grid.num_axes  # data axis that is decomposed
+        ext_start, ext_end, own_start, own_end = block
+
+        # create the grid of the block including the halo
+        dx = grid.discretization[0]
+        x0 = grid.axes_bounds[0][0]
+        bounds = ((x0 + ext_start * dx, x0 + ext_end * dx),) + \
+                 tuple(grid.axes_bounds[1:])
+        shape = (ext_end - ext_start,) + tuple(grid.shape[1:])
+        block_grid = CartesianGrid(bounds, shape, periodic=grid.periodic)
+        block_state = _make_block_state(state, block_grid)
+
+        # indices for exchanging data with the global state
+        geometry = {
+            'shape': state.data.shape,
+            'dtype': state.data.dtype,
+            'axis': axis,
+            'indices': np.arange(ext_start, ext_end) % grid.shape[0],
+            'own_global': (slice(None),) * axis + (slice(own_start, own_end),),
+            'own_local': (slice(None),) * axis +
+                         (slice(own_start - ext_start, own_end - ext_start),)
+        }
+        return block_state, geometry
+
+
+    def make_stepper(self, state: FieldBase, dt=None) -> Callable:
+        """ return a stepper function using an explicit scheme
+
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Time step of the explicit stepping. If `None`, this solver
+                specifies 1e-3 as a default value.
+
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`. The function call signature is
+            `(state: numpy.ndarray, t_start: float, t_end: float)`
+        """
+        from multiprocessing import shared_memory
+
+        if not isinstance(state.grid, CartesianGridBase):
+            raise ValueError('Distributed simulations are only supported on '
+                             'Cartesian grids')
+
+        # support `None` as a default value, so the controller can signal that
+        # the solver should use a default time step
+        if dt is None:
+            dt = 1e-3
+
+        self.finalize()  # stop processes from an earlier run
+        blocks = self._get_blocks(state.grid)
+
+        self.info['dt'] = dt
+        self.info['steps'] = 0
+        self.info['scheme'] = self.scheme
+        self.info['stochastic'] = self.pde.is_sde
+        self.info['num_processes'] = len(blocks)
+        self.info['halo'] = self.halo
+
+        # allocate shared memory for the global state
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=state.data.nbytes)
+        data = np.ndarray(state.data.shape, dtype=state.data.dtype,
+                          buffer=self._shm.buf)  # type: ignore
+
+        # start the processes advancing the individual blocks
+        if 'fork' in mp.get_all_start_methods():
+            ctx = mp.get_context('fork')
+        else:
+            ctx = mp.get_context('spawn')
+        # keep a reference, so spawned processes can attach to the barrier
+        self._barrier = barrier = ctx.Barrier(len(blocks))
+        for rank, block in enumerate(blocks):
+            block_state, geometry = self._get_block_geometry(state, block)
+            options = {'scheme': self.scheme, 'backend': self.backend,
+                       'seed': self.seed + rank,
+                       'exchange_interval': self.exchange_interval}
+            conn_main, conn_block = ctx.Pipe()
+            # the processes only receive picklable data describing the block
+            process = ctx.Process(target=_run_block,
+                                  args=(self.pde, block_state, dt, geometry,
+                                        options,
+                                        self._shm.name,  # type: ignore
+                                        barrier, conn_block),
+                                  daemon=True)
+            process.start()
+            # only the block process uses this end, so the main process
+            # notices when the block process terminates
+            conn_block.close()
+            self._processes.append(process)
+            self._connections.append(conn_main)
+
+        def stepper(state: FieldBase, t_start: float, t_end: float) -> float:
+            """ use distributed stepping to advance `state` from `t_start` to
+            `t_end` """
+            # calculate number of steps (which is at least 1)
+            steps = self._get_step_count(t_start, t_end, dt)
+
+            data[...] = state.data
+            for conn in self._connections:
+                try:
+                    conn.send((t_start, steps))
+                except (BrokenPipeError, OSError):
+                    pass  # the process stopped, which is reported below
+            results = self._receive_results()
+
+            errors = [msg for status, msg in results if status == 'error']
+            if errors:
+                raise RuntimeError('Distributed simulation failed:\n' +
+                                   '\n'.join(errors))
+
+            state.data[...] = data
+            self.info['steps'] += steps
+            return results[0][1]  # type: ignore
+
+        self._logger.info(f'Initialized distributed {self.scheme} stepper '
+                          'with dt=%g using %d processes', dt, len(blocks))
+        return stepper
+
+
+    def _receive_results(self) -> List[Tuple[str, Any]]:
+        """ wait for the replies of all processes advancing the blocks
+
+        If a process terminates without replying, the barrier is aborted, so
+        the other processes report an error instead of waiting for it forever.
+
+        Returns:
+            list: The status and the associated message for each block
+        """
+        results: Dict[int, Tuple[str, Any]] = {}
+        while len(results) < len(self._connections):
+            pending = [rank for rank in range(len(self._connections))
+                       if rank not in results]
+            wait([self._connections[rank] for rank in pending] +
+                 [self._processes[rank].sentinel for rank in pending])
+            
+            for rank in pending:
+                process, conn = self._processes[rank], self._connections[rank]
+                if conn.poll():
+                    try:
+                        results[rank] = conn.recv()
+                    except EOFError:
+                        pass  # the process stopped without replying
+                    else:
+                        continue
+                elif process.is_alive():
+                    continue  # the process is still running
+                
+                # release the other blocks waiting for this one
+                if self._barrier is not None:
+                    self._barrier.abort()
+                results[rank] = ('error', f'The process of block {rank} '
+                                 'terminated with exit code '
+                                 f'{process.exitcode}')
+                
+        return [results[rank] for rank in range(len(self._connections))]
+
+
+    def finalize(self) -> None:
+        """ stop all processes and release the shared memory """
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass  # process already stopped
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._processes, self._connections = [], []
+        self._barrier = None
+
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -4,7 +4,7 @@ Defines an explicit solver supporting various methods
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
 """
 
-from typing import Callable
+from typing import Callable, Tuple
 
 import numpy as np
 
@@ -12,6 +12,7 @@ from .base import SolverBase
 from ..pdes.base import PDEBase 
 from ..fields.base import FieldBase
 from ..tools.numba import jit
+from ..trackers.compiled import CompiledTrackerCollection
 
 
 
@@ -21,9 +22,18 @@ class ExplicitSolver(SolverBase):
     name = 'explicit'
 
 
+    dt_min = 1e-10
+    """ float: minimal time step that the adaptive solver will use """
+    dt_max = 1e10
+    """ float: maximal time step that the adaptive solver will use """
+
+
     def __init__(self, pde: PDEBase,
                  scheme: str = 'euler',
-                 backend: str = 'auto'):
+                 backend: str = 'auto',
+                 adaptive: bool = False,
+                 atol: float = 1e-6,
+                 rtol: float = 1e-3):
         """ initialize the explicit solver
         
         Args:
@@ -36,120 +46,619 @@ class ExplicitSolver(SolverBase):
                 Determines how the function is created. Accepted  values are
                 'numpy` and 'numba'. Alternatively, 'auto' lets the code decide
                 for the most optimal backend.
+            adaptive (bool):
+                When enabled, the time step is adjusted during the simulation
+                using an error estimate obtained from an embedded scheme. The
+                Euler scheme is then paired with Heun's method, while the
+                Runge-Kutta scheme uses the Runge-Kutta-Fehlberg method. The
+                time step `dt` passed to the stepper is only used as an initial
+                guess in this case.
+            atol (float):
+                The absolute tolerance of the local error in the adaptive mode
+            rtol (float):
+                The relative tolerance of the local error in the adaptive mode
         """        
         super().__init__(pde)
         self.scheme = scheme
         self.backend = backend
+        self.adaptive = adaptive
+        self.atol = atol
+        self.rtol = rtol
+        
+        
+    @property
+    def supports_compiled_trackers(self) -> bool:  # type: ignore
+        """ bool: compiled trackers are supported with fixed time steps """
+        return not self.adaptive
     
     
-    def _make_euler_stepper(self, state: FieldBase, dt: float) -> Callable:
-        """ make a simple Euler stepper
+    def _get_work_buffers(self, state_data: np.ndarray) -> np.ndarray:
+        """ allocate the work buffers used by the explicit schemes
         
         Args:
-            state (:class:`~pde.fields.FieldBase`):
-                An example for the state from which the grid and other
-                information can be extracted
-            dt (float):
-                Time step of the explicit stepping. If `None`, this solver
-                specifies 1e-3 as a default value.
+            state_data (:class:`numpy.ndarray`):
+                An example for the data of the state
                 
         Returns:
-            Function that can be called to advance the `state` from time
-            `t_start` to time `t_end`. The function call signature is
-            `(state: numpy.ndarray, t_start: float, t_end: float)`            
+            :class:`numpy.ndarray`: An array whose first axis enumerates the
+            buffers, which all have the shape of `state_data`
         """
-        rhs = self._make_pde_rhs(state, backend=self.backend,
-                                 allow_stochastic=True)
+        if self.pde.is_sde:
+            num = 0  # the stochastic stepper does not use work buffers
+        elif self.adaptive:
+            # the new state, the error estimate, and the stages
+            num = 3 if self.scheme == 'euler' else 8
+        elif self.scheme == 'euler':
+            num = 1
+        else:
+            num = 5
+        return np.empty((num,) + state_data.shape, dtype=state_data.dtype)
+    
+    
+    def _make_euler_loop(self, rhs: Callable, compiled: bool) -> Callable:
+        """ make the inner loop of the Euler scheme
         
+        Args:
+            rhs (callable):
+                Function with signature `(state_data, t, out, parameters)`
+                writing the evolution rate into `out`. For stochastic equations,
+                the signature is `(state_data, t, parameters)` and the function
+                returns the evolution rate and a realization of the noise.
+            compiled (bool):
+                Whether the loop is compiled, which requires `rhs` to be a
+                compiled function, too
+                
+        Returns:
+            Function with signature
+            `(state_data, t_start, steps, dt, work, parameters)` advancing the
+            state data by the given number of steps. `work` are the buffers
+            returned by :meth:`_get_work_buffers` and `parameters` is passed to
+            the right hand side. The function returns the final time.
+        """
         # obtain post-step action function
         modify_after_step = jit(self.pde.make_modify_after_step())
         
         if self.pde.is_sde:
             # handle stochastic version of the pde
-            
-            def stepper(state_data: np.ndarray, t_start: float, steps: int) \
-                    -> float:
-                """ compiled inner loop for speed """
+            def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                        dt: float, work: np.ndarray,
+                        parameters: np.ndarray) -> float:
+                """ inner loop of the Euler-Maruyama scheme """
                 for i in range(steps):
                     # calculate the right hand side
                     t = t_start + i * dt
-                    evolution_rate, noise_realization = rhs(state_data, t)
-                    state_data += dt * evolution_rate
-                    if noise_realization is not None:
-                        state_data += np.sqrt(dt) * noise_realization
+                    evolution_rate, noise = rhs(state_data, t, parameters)
+                    state_data += dt * evolution_rate + np.sqrt(dt) * noise
                     modify_after_step(state_data)
                     
-                return t + dt        
+                return t_start + steps * dt
 
-            self.info['stochastic'] = True
-            self._logger.info(f'Initialized explicit Euler-Maruyama stepper '
-                              'with dt=%g', dt)
+        elif compiled:
+            # update the state element-wise to avoid temporary arrays
+            def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                        dt: float, work: np.ndarray,
+                        parameters: np.ndarray) -> float:
+                """ compiled inner loop of the Euler scheme """
+                rate = work[0]
+                for i in range(steps):
+                    # calculate the right hand side
+                    t = t_start + i * dt
+                    rhs(state_data, t, rate, parameters)
+                    for j in range(state_data.size):
+                        state_data.flat[j] += dt * rate.flat[j]
+                    modify_after_step(state_data)
+
+                return t_start + steps * dt
             
         else:
-            # handle deterministic  version of the pde
-            def stepper(state_data: np.ndarray, t_start: float, steps: int) \
-                    -> float:
-                """ compiled inner loop for speed """
+            def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                        dt: float, work: np.ndarray,
+                        parameters: np.ndarray) -> float:
+                """ inner loop of the Euler scheme using numpy operations """
+                rate = work[0]
                 for i in range(steps):
                     # calculate the right hand side
                     t = t_start + i * dt
-                    state_data += dt * rhs(state_data, t)
+                    rhs(state_data, t, rate, parameters)
+                    rate *= dt
+                    state_data += rate
                     modify_after_step(state_data)
 
-                return t + dt
+                return t_start + steps * dt
+            
+        return jit(stepper) if compiled else stepper  # type: ignore
+    
+    
+    def _make_rk45_loop(self, rhs: Callable, compiled: bool) -> Callable:
+        """ make the inner loop of the Runge-Kutta scheme
         
-            self.info['stochastic'] = False
-            self._logger.info(f'Initialized explicit Euler stepper with dt=%g',
-                              dt)
+        Args:
+            rhs (callable):
+                Function with signature `(state_data, t, out, parameters)`
+                writing the evolution rate into `out`
+            compiled (bool):
+                Whether the loop is compiled, which requires `rhs` to be a
+                compiled function, too
+                
+        Returns:
+            Function with signature
+            `(state_data, t_start, steps, dt, work, parameters)` advancing the
+            state data by the given number of steps. `work` are the buffers
+            returned by :meth:`_get_work_buffers` and `parameters` is passed to
+            the right hand side. The function returns the final time.
+        """
+        # obtain post-step action function
+        modify_after_step = jit(self.pde.make_modify_after_step())
+        
+        if compiled:
+            # update the state element-wise to avoid temporary arrays
+            def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                        dt: float, work: np.ndarray,
+                        parameters: np.ndarray) -> float:
+                """ compiled inner loop of the Runge-Kutta scheme """
+                k1, k2, k3, k4, tmp = (work[0], work[1], work[2], work[3],
+                                       work[4])
+                for i in range(steps):
+                    # calculate the right hand side
+                    t = t_start + i * dt
+                    
+                    # calculate the intermediate values in Runge-Kutta
+                    rhs(state_data, t, k1, parameters)
+                    for j in range(state_data.size):
+                        tmp.flat[j] = state_data.flat[j] + 0.5 * dt * k1.flat[j]
+                    rhs(tmp, t + 0.5 * dt, k2, parameters)
+                    for j in range(state_data.size):
+                        tmp.flat[j] = state_data.flat[j] + 0.5 * dt * k2.flat[j]
+                    rhs(tmp, t + 0.5 * dt, k3, parameters)
+                    for j in range(state_data.size):
+                        tmp.flat[j] = state_data.flat[j] + dt * k3.flat[j]
+                    rhs(tmp, t + dt, k4, parameters)
+                    
+                    for j in range(state_data.size):
+                        state_data.flat[j] += dt / 6 * (
+                            k1.flat[j] + 2 * k2.flat[j] + 2 * k3.flat[j] +
+                            k4.flat[j])
+                    modify_after_step(state_data)
+    
+                return t_start + steps * dt
             
-        return stepper 
+        else:
+            def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                        dt: float, work: np.ndarray,
+                        parameters: np.ndarray) -> float:
+                """ inner loop of the Runge-Kutta scheme using numpy
+                operations """
+                k1, k2, k3, k4, tmp = work
+                for i in range(steps):
+                    # calculate the right hand side
+                    t = t_start + i * dt
+                    
+                    # calculate the intermediate values in Runge-Kutta
+                    rhs(state_data, t, k1, parameters)
+                    np.multiply(k1, 0.5 * dt, out=tmp)
+                    tmp += state_data
+                    rhs(tmp, t + 0.5 * dt, k2, parameters)
+                    np.multiply(k2, 0.5 * dt, out=tmp)
+                    tmp += state_data
+                    rhs(tmp, t + 0.5 * dt, k3, parameters)
+                    np.multiply(k3, dt, out=tmp)
+                    tmp += state_data
+                    rhs(tmp, t + dt, k4, parameters)
+                    
+                    # combine the intermediate values in place
+                    k2 += k3
+                    k2 *= 2
+                    k1 += k2
+                    k1 += k4
+                    k1 *= dt / 6
+                    state_data += k1
+                    modify_after_step(state_data)
+    
+                return t_start + steps * dt
+        
+        return jit(stepper) if compiled else stepper  # type: ignore
+
+
+    def _make_fixed_loop(self, rhs: Callable, compiled: bool) -> Callable:
+        """ make the inner loop of the chosen scheme with fixed time steps
+        
+        Args:
+            rhs (callable):
+                The right hand side of the PDE with the signature described in
+                :meth:`_make_euler_loop`
+            compiled (bool):
+                Whether the loop is compiled
+                
+        Returns:
+            Function with signature
+            `(state_data, t_start, steps, dt, work, parameters)`, which returns
+            the final time
+        """
+        if self.scheme == 'euler':
+            return self._make_euler_loop(rhs, compiled)
+        elif self.scheme in {'runge-kutta', 'rk', 'rk45'}:
+            if self.pde.is_sde:
+                raise RuntimeError('The Runge-Kutta scheme does not support '
+                                   'stochastic equations')
+            return self._make_rk45_loop(rhs, compiled)
+        else:
+            raise ValueError(f"Explicit scheme {self.scheme} is not supported")
+
+
+    def _make_error_estimator(self) -> Callable:
+        """ make a function estimating the relative error of a step
+        
+        Returns:
+            Function that takes the initial state, the proposed final state and
+            the difference between the two embedded solutions and returns the
+            maximal error relative to the tolerance. A step is acceptable if the
+            returned value is smaller than one.
+        """
+        atol, rtol = float(self.atol), float(self.rtol)
+        
+        def error_estimate(state_data: np.ndarray, state_new: np.ndarray,
+                           difference: np.ndarray) -> float:
+            """ determine scaled error of the step """
+            err = 0.
+            for j in range(state_data.size):
+                scale = atol + rtol * max(abs(state_data.flat[j]),
+                                          abs(state_new.flat[j]))
+                err = max(err, abs(difference.flat[j]) / scale)
+            return err
+        
+        if self.info['backend'] == 'numba':
+            error_estimate = jit(error_estimate)
+        
+        return error_estimate
+    
+    
+    def _make_dt_adjuster(self, order: int) -> Callable:
+        """ make a function determining the time step for the next step
+        
+        Args:
+            order (int):
+                The order of the lower-order scheme of the embedded pair, which
+                determines how the error scales with the time step
+        
+        Returns:
+            Function that takes the current time step and the scaled error and
+            returns a new time step
+        """
+        dt_min, dt_max = float(self.dt_min), float(self.dt_max)
+        exponent = -1 / (order + 1)
+        
+        def adjust_dt(dt: float, err: float) -> float:
+            """ adjust the time step based on the scaled error """
+            if err < 1e-10:
+                factor = 5.  # error is tiny => increase time step a lot
+            else:
+                factor = min(5., max(0.2, 0.9 * err ** exponent))
+            dt = min(dt_max, dt * factor)
+            if dt < dt_min:
+                raise RuntimeError('Time step below dt_min')
+            return dt
+        
+        if self.info['backend'] == 'numba':
+            adjust_dt = jit(adjust_dt)
+        
+        return adjust_dt
+    
+    
+    def _make_stage_combination(self, state: FieldBase) -> Callable:
+        """ make a function combining the stages of the adaptive schemes
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state defining the data shape
+        
+        Returns:
+            Function with signature `(out, base, factor, coeffs, stages)`,
+            which writes `base + factor * sum(coeffs[i] * stages[i])` into the
+            array `out` without allocating memory. Here, `stages` is a tuple of
+            arrays and `coeffs` a tuple of the same length. If `base` is `None`,
+            it is treated as zero.
+        """
+        if self.info['backend'] == 'numba':
+            @jit
+            def combine(out: np.ndarray, base: np.ndarray, factor: float,
+                        coeffs: Tuple[float, ...],
+                        stages: Tuple[np.ndarray, ...]) -> None:
+                """ compiled linear combination of the stages """
+                for j in range(out.size):
+                    value = 0.
+                    for i in range(len(stages)):
+                        value += coeffs[i] * stages[i].flat[j]
+                    if base is None:
+                        out.flat[j] = factor * value
+                    else:
+                        out.flat[j] = base.flat[j] + factor * value
+                        
+        else:
+            scratch = np.empty_like(state.data)
+            
+            def combine(out: np.ndarray, base: np.ndarray,  # type: ignore
+                        factor: float, coeffs: Tuple[float, ...],
+                        stages: Tuple[np.ndarray, ...]) -> None:
+                """ linear combination of the stages using numpy operations
+                """
+                np.multiply(stages[0], factor * coeffs[0], out=out)
+                for coeff, stage in zip(coeffs[1:], stages[1:]):
+                    np.multiply(stage, factor * coeff, out=scratch)
+                    out += scratch
+                if base is not None:
+                    out += base
+        
+        return combine  # type: ignore
+    
+    
+    def _make_adaptive_loop(self, single_step: Callable,
+                            order: int) -> Callable:
+        """ make the inner loop of an adaptive scheme
+        
+        Args:
+            single_step (callable):
+                Function with signature `(state_data, t, dt, work)` that writes
+                the state after a step of size `dt` into `work[0]` and the
+                difference between the two embedded solutions into `work[1]`.
+                The other work buffers can be used for intermediate results.
+            order (int):
+                The order of the lower-order scheme of the embedded pair
+        
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`. The function call signature is
+            `(state: numpy.ndarray, t_start: float, t_end: float, dt: float,
+            work: numpy.ndarray)` and it returns the final time, the time step
+            that should be used next, and the numbers of accepted and rejected
+            steps. Here, `work` are the buffers returned by
+            :meth:`_get_work_buffers`.
+        """
+        # obtain post-step action function
+        modify_after_step = jit(self.pde.make_modify_after_step())
+        error_estimate = self._make_error_estimator()
+        adjust_dt = self._make_dt_adjuster(order=order)
+        
+        def stepper(state_data: np.ndarray, t_start: float, t_end: float,
+                    dt: float, work: np.ndarray) \
+                -> Tuple[float, float, int, int]:
+            """ compiled inner loop for speed """
+            state_new, difference = work[0], work[1]
+            t = t_start
+            steps_accepted, steps_rejected = 0, 0
+            while t < t_end:
+                if t + dt >= t_end:
+                    # truncate the final step to arrive exactly at t_end
+                    dt_step, truncated = t_end - t, True
+                else:
+                    dt_step, truncated = dt, False
+
+                single_step(state_data, t, dt_step, work)
+                
+                err = error_estimate(state_data, state_new, difference)
+                if err <= 1:
+                    # accept the step
+                    t = t_end if truncated else t + dt_step
+                    state_data[...] = state_new
+                    modify_after_step(state_data)
+                    steps_accepted += 1
+                else:
+                    steps_rejected += 1
+                
+                # adjust the time step, but do not consider the truncated step
+                if not truncated or err > 1:
+                    dt = adjust_dt(dt_step, err)
+                
+            return t, dt, steps_accepted, steps_rejected
+        
+        return stepper
     
     
-    def _make_rk45_stepper(self, state: FieldBase, dt: float) -> Callable:
-        """ make a simple Euler stepper
+    def _make_adaptive_euler_stepper(self, state: FieldBase) -> Callable:
+        """ make an adaptive Euler stepper using Heun's method for error control
         
         Args:
             state (:class:`~pde.fields.FieldBase`):
                 An example for the state from which the grid and other
                 information can be extracted
-            dt (float):
-                Time step of the explicit stepping. If `None`, this solver
-                specifies 1e-3 as a default value.
                 
         Returns:
-            Function that can be called to advance the `state` from time
-            `t_start` to time `t_end`. The function call signature is
-            `(state: numpy.ndarray, t_start: float, t_end: float)`            
+            Function with the signature described in
+            :meth:`_make_adaptive_loop`
         """
         rhs = self._make_pde_rhs(state, backend=self.backend,
-                                 allow_stochastic=False)
+                                 allow_stochastic=False, with_out=True)
         self.info['stochastic'] = False
+        combine = self._make_stage_combination(state)
         
-        # obtain post-step action function
-        modify_after_step = jit(self.pde.make_modify_after_step())
+        def single_step(state_data: np.ndarray, t: float, dt: float,
+                        work: np.ndarray) -> None:
+            """ first order step and correction of second order """
+            state_new, difference, k1 = work[0], work[1], work[2]
+            rhs(state_data, t, k1)
+            combine(state_new, state_data, dt, (1.,), (k1,))
+            # evaluate the second stage in the buffer of the difference
+            rhs(state_new, t + dt, difference)
+            combine(difference, None, 0.5 * dt, (1., -1.), (difference, k1))
         
-        def stepper(state_data: np.ndarray, t_start: float, steps: int) \
-                -> float:
-            """ compiled inner loop for speed """
-            for i in range(steps):
-                # calculate the right hand side
-                t = t_start + i * dt
+        if self.info['backend'] == 'numba':
+            single_step = jit(single_step)
+        
+        self._logger.info(f'Initialized adaptive explicit Euler stepper')
+        return self._make_adaptive_loop(single_step, order=1)
+    
+    
+    def _make_adaptive_rk45_stepper(self, state: FieldBase) -> Callable:
+        """ make an adaptive Runge-Kutta-Fehlberg stepper
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
                 
-                # calculate the intermediate values in Runge-Kutta
-                k1 = dt * rhs(state_data, t)
-                k2 = dt * rhs(state_data + 0.5 * k1, t + 0.5 * dt)
-                k3 = dt * rhs(state_data + 0.5 * k2, t + 0.5 * dt)
-                k4 = dt * rhs(state_data + k3, t + dt)  
+        Returns:
+            Function with the signature described in
+            :meth:`_make_adaptive_loop`
+        """
+        rhs = self._make_pde_rhs(state, backend=self.backend,
+                                 allow_stochastic=False, with_out=True)
+        self.info['stochastic'] = False
+        combine = self._make_stage_combination(state)
+        
+        # coefficients of the Runge-Kutta-Fehlberg method
+        a2 = (1 / 4,)
+        a3 = (3 / 32, 9 / 32)
+        a4 = (1932 / 2197, -7200 / 2197, 7296 / 2197)
+        a5 = (439 / 216, -8., 3680 / 513, -845 / 4104)
+        a6 = (-8 / 27, 2., -3544 / 2565, 1859 / 4104, -11 / 40)
+        b5 = (16 / 135, 6656 / 12825, 28561 / 56430, -9 / 50, 2 / 55)
+        b4 = (25 / 216, 1408 / 2565, 2197 / 4104, -1 / 5, 0.)
+        e = (b5[0] - b4[0], b5[1] - b4[1], b5[2] - b4[2], b5[3] - b4[3],
+             b5[4] - b4[4])
+        c = (1 / 4, 3 / 8, 12 / 13, 1., 1 / 2)
+        
+        def single_step(state_data: np.ndarray, t: float, dt: float,
+                        work: np.ndarray) -> None:
+            """ fifth order step and error estimate of fourth order """
+            state_new, tmp = work[0], work[1]
+            k1, k2, k3, k4, k5, k6 = (work[2], work[3], work[4], work[5],
+                                      work[6], work[7])
+            
+            # calculate the intermediate values in Runge-Kutta
+            rhs(state_data, t, k1)
+            combine(tmp, state_data, dt, a2, (k1,))
+            rhs(tmp, t + c[0] * dt, k2)
+            combine(tmp, state_data, dt, a3, (k1, k2))
+            rhs(tmp, t + c[1] * dt, k3)
+            combine(tmp, state_data, dt, a4, (k1, k2, k3))
+            rhs(tmp, t + c[2] * dt, k4)
+            combine(tmp, state_data, dt, a5, (k1, k2, k3, k4))
+            rhs(tmp, t + c[3] * dt, k5)
+            combine(tmp, state_data, dt, a6, (k1, k2, k3, k4, k5))
+            rhs(tmp, t + c[4] * dt, k6)
+            
+            # the 5th order solution is propagated
+            combine(state_new, state_data, dt, b5, (k1, k3, k4, k5, k6))
+            # the difference is stored in the buffer of the intermediate state
+            combine(tmp, None, dt, e, (k1, k3, k4, k5, k6))
+        
+        if self.info['backend'] == 'numba':
+            single_step = jit(single_step)
+        
+        self._logger.info(f'Initialized adaptive Runge-Kutta-Fehlberg stepper')
+        return self._make_adaptive_loop(single_step, order=4)
+    
+    
+    def _make_adaptive_stepper(self, state: FieldBase, dt: float) -> Callable:
+        """ return a stepper function that adjusts the time step
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Initial time step of the adaptive stepping.
                 
-                state_data += (k1 + 2 * k2 + 2 * k3 + k4) / 6
-                modify_after_step(state_data)
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`.
+        """
+        if self.pde.is_sde:
+            raise RuntimeError('Adaptive time stepping does not support '
+                               'stochastic equations')
+        
+        self.info['dt_last'] = dt
+        self.info['steps_rejected'] = 0
+        
+        if self.scheme == 'euler':
+            inner_stepper = self._make_adaptive_euler_stepper(state)
+        elif self.scheme in {'runge-kutta', 'rk', 'rk45'}:
+            inner_stepper = self._make_adaptive_rk45_stepper(state)
+        else:
+            raise ValueError(f"Explicit scheme {self.scheme} is not supported")
 
-            return t + dt        
+        if self.info['backend'] == 'numba':
+            # compile inner step
+            inner_stepper = jit(inner_stepper)
+        work = self._work_buffers = self._get_work_buffers(state.data)
+            
+        def stepper(state: FieldBase, t_start: float, t_end: float) \
+                -> float:
+            """ use adaptive stepping to advance `state` from `t_start` to
+            `t_end` """
+            t_last, dt_next, accepted, rejected = inner_stepper(
+                state.data, t_start, t_end, self.info['dt_last'], work)
+            self.info['dt_last'] = dt_next
+            self.info['steps'] += accepted
+            self.info['steps_rejected'] += rejected
+            return t_last  # type: ignore
+        
+        return stepper
         
-        self._logger.info(f'Initialized explicit Runge-Kutta-45 stepper with '
-                          'dt=%g', dt)
-        return stepper 
 
+    def _make_fixed_stepper(self, state: FieldBase, dt: float) -> Callable:
+        """ return the inner stepper function using a fixed time step
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Time step of the explicit stepping
+                
+        Returns:
+            Function that can be called to advance the state data by a given
+            number of steps. The function call signature is
+            `(state_data: numpy.ndarray, t_start: float, steps: int,
+            work: numpy.ndarray)` and it returns the time after the last step.
+            Here, `work` are the work buffers stored in the attribute
+            `_work_buffers`, which are allocated once by this method.
+        """
+        is_sde = self.pde.is_sde and self.scheme == 'euler'
+        if is_sde:
+            rhs = self._make_pde_rhs(state, backend=self.backend,
+                                     allow_stochastic=True)
+        else:
+            rhs = self._make_pde_rhs(state, backend=self.backend,
+                                     allow_stochastic=False, with_out=True)
+        self.info['stochastic'] = is_sde
+        compiled = self.info['backend'] == 'numba'
+        
+        # the right hand side does not depend on runtime parameters
+        if is_sde:
+            def rhs_parameters(state_data: np.ndarray, t: float,
+                               parameters: np.ndarray):
+                return rhs(state_data, t)
+        else:
+            def rhs_parameters(state_data: np.ndarray, t: float,  # type: ignore
+                               out: np.ndarray, parameters: np.ndarray):
+                rhs(state_data, t, out)
+        if compiled:
+            rhs_parameters = jit(rhs_parameters)
+        
+        loop = self._make_fixed_loop(rhs_parameters, compiled=compiled)
+        self._work_buffers = self._get_work_buffers(state.data)
+        parameters = np.empty(0)
+        
+        def inner_stepper(state_data: np.ndarray, t_start: float, steps: int,
+                          work: np.ndarray) -> float:
+            """ advance the state data using the fixed time step """
+            return loop(state_data, t_start, steps,  # type: ignore
+                        dt, work, parameters)
+        
+        if compiled:
+            inner_stepper = jit(inner_stepper)
+            
+        if is_sde:
+            self._logger.info(f'Initialized explicit Euler-Maruyama stepper '
+                              'with dt=%g', dt)
+        elif self.scheme == 'euler':
+            self._logger.info(f'Initialized explicit Euler stepper with dt=%g',
+                              dt)
+        else:
+            self._logger.info(f'Initialized explicit Runge-Kutta-45 stepper '
+                              'with dt=%g', dt)
+        return inner_stepper
+    
 
     def make_stepper(self, state: FieldBase, dt=None) -> Callable:
         """ return a stepper function using an explicit scheme
@@ -160,7 +669,8 @@ class ExplicitSolver(SolverBase):
                 information can be extracted
             dt (float):
                 Time step of the explicit stepping. If `None`, this solver
-                specifies 1e-3 as a default value.
+                specifies 1e-3 as a default value. In the adaptive mode, this
+                value only sets the initial time step.
                 
         Returns:
             Function that can be called to advance the `state` from time
@@ -175,25 +685,38 @@ class ExplicitSolver(SolverBase):
         self.info['dt'] = dt
         self.info['steps'] = 0
         self.info['scheme'] = self.scheme
+        self.info['adaptive'] = self.adaptive
         
-        if self.scheme == 'euler':
-            inner_stepper = self._make_euler_stepper(state, dt)
-        elif self.scheme in {'runge-kutta', 'rk', 'rk45'}:
-            inner_stepper = self._make_rk45_stepper(state, dt)
-        else:
-            raise ValueError(f"Explicit scheme {self.scheme} is not supported")
-
-        if self.info['backend'] == 'numba':
-            # compile inner step
-            inner_stepper = jit(inner_stepper)
+        if self.adaptive:
+            return self._make_adaptive_stepper(state, dt)
+        
+        inner_stepper = self._make_fixed_stepper(state, dt)
+        work = self._work_buffers
+        
+        if self.compiled_trackers:
+            # evaluate the compiled trackers in the inner loop, which also
+            # counts the steps that have been taken
+            trackers = CompiledTrackerCollection(self.compiled_trackers, dt)
+            inner_stepper = trackers.make_stepper(
+                inner_stepper, info=self.info,
+                compiled=self.info['backend'] == 'numba')
+            
+            def stepper(state: FieldBase, t_start: float, t_end: float) \
+                    -> float:
+                """ advance `state` from `t_start` to `t_end` using the
+                compiled trackers """
+                steps = self._get_step_count(t_start, t_end, dt)
+                return inner_stepper(state.data, t_start, steps, work)
+            
+            return stepper
         
         def stepper(state: FieldBase, t_start: float, t_end: float) \
                 -> float:
-            """ use Euler stepping to advance `state` from `t_start` to
-            `t_end` """
+            """ advance `state` from `t_start` to `t_end` using fixed time
+            steps """
             # calculate number of steps (which is at least 1)
-            steps = max(1, int(np.ceil((t_end - t_start) / dt)))
-            t_last = inner_stepper(state.data, t_start, steps)
+            steps = self._get_step_count(t_start, t_end, dt)
+            t_last = inner_stepper(state.data, t_start, steps, work)
             self.info['steps'] += steps
             return t_last  # type: ignore        
             
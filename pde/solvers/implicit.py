@@ -1,17 +1,20 @@
 """
-Defines an implicit solver
+Defines implicit solvers
    
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
 """
 
-from typing import Callable, Tuple
+from typing import Callable, Tuple, List, Dict, Any
 
 import numpy as np
 import numba as nb
+from scipy import sparse
 
 from .base import SolverBase
 from ..pdes.base import PDEBase
 from ..fields.base import FieldBase
+from ..grids.operators.common import (estimate_sparse_jacobian,
+                                      krylov_tolerance)
 from ..tools.numba import jit
 
 
@@ -133,7 +136,7 @@ class ImplicitSolver(SolverBase):
             """ use Euler stepping to advance `state` from `t_start` to
             `t_end` """
             # calculate number of steps (which is at least 1)
-            steps = max(1, int(np.ceil((t_end - t_start) / dt)))
+            steps = self._get_step_count(t_start, t_end, dt)
             t_last, nfev = inner_stepper(state.data, t_start, steps)
             self.info['steps'] += steps
             self.info['function_evaluations'] += nfev
@@ -141,4 +144,270 @@ class ImplicitSolver(SolverBase):
             
         self._logger.info(f'Initialized implicit Euler stepper with dt=%g', dt)
         return stepper
-        
\ No newline at end of file
+        
+
+
+def make_jacobian_estimator(rhs: Callable, state: FieldBase,
+                            radius: int = 2) -> Callable:
+    """ make a function estimating the sparse Jacobian of the right hand side
+    
+    The Jacobian is estimated using finite differences, where support points
+    that do not interact are perturbed simultaneously. The number of
+    evaluations of `rhs` is thus independent of the grid size.
+    
+    Args:
+        rhs (callable):
+            The function evaluating the right hand side with signature
+            `(state_data, t)`
+        state (:class:`~pde.fields.FieldBase`):
+            An example for the state defining the grid and data types
+        radius (int):
+            The maximal distance (in support points) over which the right hand
+            side couples the data. The estimate misses couplings over larger
+            distances.
+    
+    Returns:
+        A function with signature `(state_data, t)` returning the Jacobian as a
+        sparse matrix in CSC format
+    """
+    shape = state.data.shape
+    
+    def estimate_jacobian(state_data: np.ndarray, t: float):
+        """ estimate the Jacobian of the right hand side """
+        def func(data: np.ndarray) -> np.ndarray:
+            """ evaluate the right hand side at time `t` """
+            return rhs(data.reshape(shape), t)
+        
+        return estimate_sparse_jacobian(func, state_data, state.grid,
+                                        radius)[0]
+        
+    return estimate_jacobian
+
+
+
+class NewtonKrylovSolver(SolverBase):
+    """ class for solving partial differential equations implicitly using
+    Newton's method with a Krylov subspace method for the linear systems
+    
+    The Jacobian-vector products required by the Krylov method are calculated
+    using finite differences of the right hand side. The linear systems are
+    preconditioned by an incomplete LU decomposition of an estimate of the
+    Jacobian, which is cached and only updated when Newton's method converges
+    slowly.
+    """
+
+    name = 'newton_krylov'
+
+
+    def __init__(self, pde: PDEBase,
+                 scheme: str = 'bdf2',
+                 linear_solver: str = 'gmres',
+                 maxiter: int = 10,
+                 tolerance: float = 1e-6,
+                 stencil_radius: int = 2,
+                 backend: str = 'auto'):
+        """ initialize the implicit solver
+        
+        Args:
+            pde (:class:`~pde.pdes.base.PDEBase`):
+                The instance describing the pde that needs to be solved
+            scheme (str):
+                The implicit scheme, which can be 'backward-euler' or 'bdf2' for
+                the second-order backward differentiation formula.
+            linear_solver (str):
+                The iterative solver for the linear systems, which can be
+                'gmres' or 'bicgstab'
+            maxiter (int):
+                The maximal number of Newton iterations per step
+            tolerance (float):
+                The maximal root mean squared residual permitted in each step
+            stencil_radius (int):
+                The maximal distance (in support points) over which the right
+                hand side couples the data. This is used to estimate the
+                Jacobian for the preconditioner. A value that is too small does
+                not affect the result, but slows down the solution of the
+                linear systems.
+            backend (str):
+                Determines how the function is created. Accepted  values are
+                'numpy` and 'numba'. Alternatively, 'auto' lets the code decide
+                for the most optimal backend.
+        """        
+        super().__init__(pde)
+        if scheme not in {'backward-euler', 'bdf2'}:
+            raise ValueError(f'Scheme `{scheme}` is not supported')
+        if linear_solver not in {'gmres', 'bicgstab'}:
+            raise ValueError(f'Linear solver `{linear_solver}` is not '
+                             'supported')
+        self.scheme = scheme
+        self.linear_solver = linear_solver
+        self.maxiter = maxiter
+        self.tolerance = tolerance
+        self.stencil_radius = stencil_radius
+        self.backend = backend
+    
+
+    def make_stepper(self, state: FieldBase, dt=None) -> Callable:
+        """ return a stepper function using an implicit scheme
+        
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Time step of the implicit stepping. If `None`, this solver
+                specifies 1e-3 as a default value.
+                
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`. The function call signature is
+            `(state: numpy.ndarray, t_start: float, t_end: float)`        
+        """
+        from scipy.sparse import linalg
+        
+        # support `None` as a default value, so the controller can signal that
+        # the solver should use a default time step
+        if dt is None:
+            dt = 1e-3
+        
+        self.info['dt'] = dt
+        self.info['steps'] = 0
+        self.info['scheme'] = self.scheme
+        self.info['linear_solver'] = self.linear_solver
+        self.info['stochastic'] = False
+        self.info['newton_iterations'] = 0
+        self.info['linear_iterations'] = 0
+        self.info['function_evaluations'] = 0
+        self.info['jacobian_evaluations'] = 0
+        
+        if self.pde.is_sde:
+            raise RuntimeError('Cannot use implicit stepper with stochastic '
+                               'equation')
+            
+        rhs_raw = self._make_pde_rhs(state, backend=self.backend,
+                                     allow_stochastic=False)
+        estimate_jacobian = make_jacobian_estimator(rhs_raw, state,
+                                                    self.stencil_radius)
+        shape = state.data.shape
+        size = state.data.size
+        maxiter = int(self.maxiter)
+        tolerance = self.tolerance
+        solve_linear = {'gmres': linalg.gmres,
+                        'bicgstab': linalg.bicgstab}[self.linear_solver]
+        linear_tolerance = krylov_tolerance(solve_linear, 0.1 * tolerance)
+        info = self.info
+        
+        def rhs(data: np.ndarray, t: float) -> np.ndarray:
+            """ evaluate the right hand side for flattened data """
+            info['function_evaluations'] += 1
+            return rhs_raw(data.reshape(shape), t).ravel()
+        
+        # cache for the Jacobian and the associated preconditioners
+        cache: Dict[str, Any] = {'jacobian': None, 'preconditioners': {},
+                                 'previous': None}
+        
+        def get_preconditioner(data: np.ndarray, t: float, gamma: float):
+            """ return the preconditioner for the matrix I - gamma * J """
+            if cache['jacobian'] is None:
+                cache['jacobian'] = estimate_jacobian(data.reshape(shape), t)
+                cache['preconditioners'] = {}
+                info['jacobian_evaluations'] += 1
+            if gamma not in cache['preconditioners']:
+                matrix = (sparse.identity(size, format='csc') -
+                          gamma * cache['jacobian'])
+                try:
+                    ilu = linalg.spilu(matrix.tocsc())
+                except RuntimeError:
+                    # factorization failed, e.g., since the matrix is singular
+                    preconditioner = None
+                else:
+                    preconditioner = linalg.LinearOperator((size, size),
+                                                           ilu.solve)
+                cache['preconditioners'][gamma] = preconditioner
+            return cache['preconditioners'][gamma]
+        
+        def newton(const: np.ndarray, guess: np.ndarray, t: float,
+                   gamma: float) -> Tuple[np.ndarray, int]:
+            """ solve `x - gamma * rhs(x, t) = const` using Newton's method """
+            x = guess.copy()
+            for iteration in range(1, maxiter + 1):
+                rate = rhs(x, t)
+                residual = x - gamma * rate - const
+                if np.sqrt(np.mean(residual**2)) < tolerance:
+                    return x, iteration - 1
+                
+                # define the linear operator using Jacobian-vector products
+                norm_x = np.linalg.norm(x)
+                
+                def matvec(v):
+                    norm_v = np.linalg.norm(v)
+                    if norm_v == 0:
+                        return np.zeros_like(v)
+                    eps = np.sqrt(np.finfo(float).eps) * (1 + norm_x) / norm_v
+                    jac_v = (rhs(x + eps * v, t) - rate) / eps
+                    return v - gamma * jac_v
+                
+                operator = linalg.LinearOperator((size, size), matvec)
+                
+                def count_iterations(*args):
+                    info['linear_iterations'] += 1
+                    
+                kwargs = {'callback': count_iterations}
+                if self.linear_solver == 'gmres':
+                    kwargs['callback_type'] = 'pr_norm'
+                delta, _ = solve_linear(
+                    operator, -residual, atol=0,
+                    M=get_preconditioner(x, t, gamma), **linear_tolerance,
+                    **kwargs)
+                x += delta
+                
+            # check the residual of the final iterate
+            residual = x - gamma * rhs(x, t) - const
+            if np.sqrt(np.mean(residual**2)) < tolerance:
+                return x, maxiter
+            raise ConvergenceError('Newton iteration did not converge')
+        
+        def single_step(data: np.ndarray, t: float) -> np.ndarray:
+            """ advance the flattened data by a single step """
+            previous = cache['previous']
+            if (self.scheme == 'bdf2' and previous is not None and
+                    np.isclose(previous[0], t)):
+                # second-order backward differentiation formula
+                const = (4 * data - previous[1]) / 3
+                gamma = 2 * dt / 3
+                guess = 2 * data - previous[1]  # linear extrapolation
+            else:
+                # backward Euler scheme
+                const, gamma, guess = data, dt, data
+            
+            try:
+                result, iterations = newton(const, guess, t + dt, gamma)
+            except ConvergenceError:
+                # try again with an updated Jacobian
+                cache['jacobian'] = None
+                result, iterations = newton(const, guess, t + dt, gamma)
+            info['newton_iterations'] += iterations
+            if iterations > maxiter // 2:
+                cache['jacobian'] = None  # slow convergence => update Jacobian
+            
+            # store the current data, so it can be used in the next step
+            cache['previous'] = (t + dt, data)
+            return result
+        
+        def stepper(state: FieldBase, t_start: float, t_end: float) \
+                -> float:
+            """ use implicit stepping to advance `state` from `t_start` to
+            `t_end` """
+            # calculate number of steps (which is at least 1)
+            steps = self._get_step_count(t_start, t_end, dt)
+            
+            data = state.data.ravel().copy()
+            for i in range(steps):
+                data = single_step(data, t_start + i * dt)
+            state.data[...] = data.reshape(shape)
+            
+            self.info['steps'] += steps
+            return t_start + steps * dt
+            
+        self._logger.info(f'Initialized Newton-Krylov {self.scheme} stepper '
+                          'with dt=%g', dt)
+        return stepper
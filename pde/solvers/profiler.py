@@ -0,0 +1,210 @@
+"""
+Defines a class collecting detailed timing information of simulations
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+import contextlib
+import functools
+import inspect
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple, Any, Iterator  # @UnusedImport
+
+import numpy as np
+
+from ..grids.base import GridBase
+
+
+try:
+    from numba.core import event as numba_event
+except ImportError:
+    numba_event = None  # numba versions before 0.55 do not report events
+
+
+
+class SimulationProfiler():
+    """ collects detailed timing information of a simulation
+
+    The profiler measures the wall time of code blocks, which are identified
+    by paths of names separated by semicolons. The time numba spends on
+    compiling functions is reported separately in a sub-block `compile`. Since
+    compiled code cannot be instrumented, the operators used by the simulation
+    are recorded when they are requested from the grid and their execution
+    time is measured separately by :meth:`benchmark_operators`.
+
+    Attributes:
+        timings (dict):
+            The time spent in each block, excluding the time of sub-blocks
+        counts (dict):
+            The number of times each block has been executed
+        operators (dict):
+            The average time of a single call of each operator
+    """
+
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.operators: Dict[str, float] = {}
+        self._operators: List[Tuple[GridBase, str, Callable]] = []
+        # time and compilation time of the sub-blocks of all active blocks
+        self._active: List[List[float]] = []
+        self._t_start = time.perf_counter()
+        self.total = 0.
+
+
+    @contextlib.contextmanager
+    def measure(self, path: str) -> Iterator[None]:
+        """ context manager measuring the time spent in a block
+
+        Blocks can be nested, in which case the time spent in the inner block
+        is only attributed to the inner block. The path of the inner block
+        should thus extend the path of the outer block, so the times can be
+        aggregated by flame graph tools.
+
+        Args:
+            path (str): The path identifying the block
+        """
+        if numba_event is None:
+            compilation: Any = contextlib.suppress()  # no-op context
+        else:
+            compilation = numba_event.install_listener(
+                'numba:compile', numba_event.TimingListener())
+
+        sub_blocks = [0., 0.]  # total and compilation time of sub-blocks
+        self._active.append(sub_blocks)
+        t_start = time.perf_counter()
+        try:
+            with compilation as listener:
+                yield
+        finally:
+            elapsed = time.perf_counter() - t_start
+            self._active.pop()
+            if listener is not None and listener.done:
+                compile_time = listener.duration
+            else:
+                compile_time = 0.
+            # the listener also reports compilations within sub-blocks
+            own_compile_time = max(compile_time - sub_blocks[1], 0.)
+            if own_compile_time > 0:
+                self.timings[path + ';compile'] += own_compile_time
+            self.timings[path] += elapsed - sub_blocks[0] - own_compile_time
+            self.counts[path] += 1
+            if self._active:
+                # report the time to the enclosing block
+                self._active[-1][0] += elapsed
+                self._active[-1][1] += compile_time
+
+
+    def wrap(self, path: str, func: Callable) -> Callable:
+        """ wrap a function, so the time spent in each call is measured
+
+        Args:
+            path (str): The path identifying the block
+            func (callable): The function that is measured
+
+        Returns:
+            callable: The wrapped function
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.measure(path):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+    @contextlib.contextmanager
+    def record_operators(self) -> Iterator[None]:
+        """ context manager recording all operators requested from grids """
+        def listener(grid, name, bc, operator):
+            self._operators.append((grid, name, operator))
+
+        GridBase._operator_listeners.append(listener)
+        try:
+            yield
+        finally:
+            GridBase._operator_listeners.remove(listener)
+
+
+    def benchmark_operators(self, duration: float = 0.01) -> Dict[str, float]:
+        """ measure the execution time of the recorded operators
+
+        Args:
+            duration (float):
+                The approximate time in seconds spent on measuring each
+                operator
+
+        Returns:
+            dict: The average time of a single call of each operator
+        """
+        rng = np.random.default_rng()
+        seen = set()
+        for grid, name, operator in self._operators:
+            if id(operator) in seen:
+                continue
+            seen.add(id(operator))
+
+            # determine the rank of the data the operator acts on
+            for cls in inspect.getmro(grid.__class__)[:-1]:
+                if name in cls._operators:  # type: ignore
+                    rank = cls._operators[name].rank_in  # type: ignore
+                    break
+            arr = rng.random((grid.dim,) * rank + grid.shape)
+
+            operator(arr)  # make sure the operator is compiled
+            calls, t_start = 0, time.perf_counter()
+            while True:
+                operator(arr)
+                calls += 1
+                elapsed = time.perf_counter() - t_start
+                if elapsed > duration or calls >= 10000:
+                    break
+
+            # distinguish operators that only differ in boundary conditions
+            key, i = name, 1
+            while key in self.operators:
+                i += 1
+                key = f'{name} ({i})'
+            self.operators[key] = elapsed / calls
+
+        return self.operators
+
+
+    def finish(self) -> None:
+        """ stop the profiler and measure the operators """
+        self.total = time.perf_counter() - self._t_start
+        # the remaining time is spent in the controller itself
+        self.timings['controller'] = self.total - sum(self.timings.values())
+        self.benchmark_operators()
+
+
+    @property
+    def results(self) -> Dict[str, Any]:
+        """ dict: summary of the profiling information """
+        compilation = sum(duration for path, duration in self.timings.items()
+                          if path.endswith(';compile'))
+        return {'total': self.total,
+                'compilation': compilation,
+                'timings': dict(self.timings),
+                'counts': dict(self.counts),
+                'operators': self.operators}
+
+
+    def write_folded(self, filename: str) -> None:
+        """ write the timings in the folded format used by flame graph tools
+
+        Each line contains a path of semicolon-separated names followed by the
+        time in microseconds spent in this block, excluding sub-blocks. The
+        resulting file can for instance be visualized using `flamegraph.pl` or
+        `speedscope`.
+
+        Args:
+            filename (str): The path of the file that is written
+        """
+        with open(filename, 'w') as fp:
+            for path, duration in sorted(self.timings.items()):
+                microseconds = int(round(1e6 * duration))
+                if microseconds > 0:
+                    fp.write(f'simulation;{path} {microseconds}\n')
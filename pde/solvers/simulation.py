@@ -0,0 +1,300 @@
+"""
+Defines a simulation whose compiled stepper can be reused for many runs
+
+.. autosummary::
+   :nosignatures:
+
+   CompiledSimulation
+   CompiledSimulationSolver
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+import logging
+from typing import Callable, Dict, Any, Optional, Tuple, Union  # @UnusedImport
+
+import numpy as np
+
+from .base import SolverBase
+from .controller import Controller, TRangeType
+from .explicit import ExplicitSolver
+from ..fields.base import FieldBase
+from ..pdes.base import PDEBase
+from ..trackers.base import TrackerCollectionDataType
+from ..tools.numba import jit
+
+
+
+class CompiledSimulation():
+    """ simulation of a PDE whose compiled stepper is reused for many runs
+
+    The stepper of an explicit scheme is compiled once for the grid and the
+    boundary conditions of the PDE. In contrast to
+    :class:`~pde.solvers.explicit.ExplicitSolver`, the time step and the values
+    of the runtime parameters of the PDE, which are listed in
+    :attr:`~pde.pdes.base.PDEBase.runtime_parameters`, are passed as arguments
+    to the compiled stepper. Consequently, simulations with different initial
+    states, time steps, and parameters do not need to compile anything.
+
+    Instances can be pickled, e.g., to send them to worker processes, which
+    compile the stepper again when it is used for the first time. The disk
+    cache of numba, which can be enabled by setting
+    :data:`pde.tools.numba.NUMBA_CACHE`, avoids this compilation since the
+    compiled functions do not depend on the parameter values.
+
+    Example:
+        A parameter scan can be implemented as ::
+
+            simulation = CompiledSimulation(CahnHilliardPDE(), state).warmup()
+            for width in [0.5, 1, 2]:
+                result = simulation.run(
+                    state, t_range=10, dt=1e-3,
+                    parameters={'interface_width': width})
+    """
+
+
+    def __init__(self, pde: PDEBase, state: FieldBase,
+                 scheme: str = 'euler'):
+        """
+        Args:
+            pde (:class:`~pde.pdes.base.PDEBase`):
+                The partial differential equation that should be solved. Its
+                current attributes determine the default values of the runtime
+                parameters.
+            state (:class:`~pde.fields.base.FieldBase`):
+                An example for the state, which defines the grid and the data
+                types. This state is also used as the initial state if no other
+                state is given.
+            scheme (str):
+                Defines the explicit scheme to use. Supported values are
+                'euler', 'runge-kutta' (or 'rk' for short).
+        """
+        if scheme not in {'euler', 'runge-kutta', 'rk', 'rk45'}:
+            raise ValueError(f'Explicit scheme {scheme} is not supported')
+        if pde.is_sde and scheme != 'euler':
+            raise RuntimeError('Stochastic equations are only supported by '
+                               'the Euler scheme')
+
+        self.pde = pde
+        self.state = state.copy()
+        self.scheme = scheme
+        self._stepper: Optional[Callable] = None
+        self._work_buffers: Optional[np.ndarray] = None
+        self._logger = logging.getLogger(self.__class__.__name__)
+
+
+    def __getstate__(self):
+        # compiled functions are created again after unpickling
+        state = self.__dict__.copy()
+        state['_stepper'] = state['_work_buffers'] = None
+        return state
+
+
+    def _make_stepper(self) -> Tuple[Callable, np.ndarray]:
+        """ create the compiled stepper
+
+        The inner loops of the schemes are provided by
+        :class:`~pde.solvers.explicit.ExplicitSolver`, which also allocates the
+        work buffers.
+
+        Returns:
+            tuple: The stepper with the signature
+            `(state_data, t_start, steps, dt, work, parameters)`, which
+            advances the state data by the given number of steps and returns
+            the final time, and the work buffers that need to be passed to it
+        """
+        state = self.state
+        # the in-place kernel already has the signature used by the loops
+        rhs = self.pde._make_pde_rhs_out_numba(state)
+
+        if self.pde.check_implementation:
+            # compare to the numpy implementation for the current parameters
+            parameters = self.pde.get_parameters()
+            self.pde._check_rhs_implementation(
+                state, lambda state_data, t, out: rhs(state_data, t, out,
+                                                      parameters),
+                with_out=True)
+
+        if self.pde.is_sde:
+            noise_realization = self.pde._make_noise_realization_numba(state)
+
+            @jit
+            def rhs_loop(state_data: np.ndarray, t: float,
+                         parameters: np.ndarray):
+                """ evolution rate and realization of the noise """
+                rate = np.empty_like(state_data)
+                rhs(state_data, t, rate, parameters)
+                return rate, noise_realization(state_data, t)
+
+        else:
+            rhs_loop = rhs
+
+        explicit = ExplicitSolver(self.pde, scheme=self.scheme,
+                                  backend='numba')
+        stepper = explicit._make_fixed_loop(rhs_loop, compiled=True)
+        work_buffers = explicit._get_work_buffers(state.data)
+
+        self._logger.info('Created compiled stepper for '
+                          f'{self.pde.__class__.__name__}')
+        return stepper, work_buffers
+
+
+    @property
+    def stepper(self) -> Callable:
+        """ callable: the compiled stepper with the signature
+        `(state_data, t_start, steps, dt, work, parameters)`, which returns the
+        final time. Here, `work` are the buffers given by
+        :attr:`work_buffers`. """
+        if self._stepper is None:
+            self._stepper, self._work_buffers = self._make_stepper()
+        return self._stepper
+
+
+    @property
+    def work_buffers(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the work buffers that are passed to
+        :attr:`stepper` """
+        if self._work_buffers is None:
+            self._stepper, self._work_buffers = self._make_stepper()
+        return self._work_buffers
+
+
+    def warmup(self) -> "CompiledSimulation":
+        """ compile all functions required for running simulations
+
+        The compilation is triggered by advancing a copy of the example state
+        by a single tiny step.
+
+        Returns:
+            :class:`CompiledSimulation`: The instance itself
+        """
+        state_data = self.state.data.copy()
+        self.stepper(state_data, 0., 1, 1e-10, self.work_buffers,
+                     self.pde.get_parameters())
+        return self
+
+
+    def run(self, state: FieldBase = None,
+            t_range: TRangeType = 1,
+            dt: float = 1e-3,
+            parameters: Dict[str, float] = None,
+            tracker: TrackerCollectionDataType = None,
+            ret_info: bool = False) \
+                -> Union[FieldBase, Tuple[FieldBase, Dict[str, Any]]]:
+        """ run a simulation using the compiled stepper
+
+        Args:
+            state (:class:`~pde.fields.base.FieldBase`, optional):
+                The initial state, which needs to be compatible with the
+                example state given at construction. If omitted, the example
+                state is used.
+            t_range (float or tuple):
+                Sets the time range for which the PDE is solved. If only a
+                single value `t_end` is given, the time range is assumed to be
+                `[0, t_end]`.
+            dt (float):
+                Time step of the explicit stepping
+            parameters (dict, optional):
+                Values of runtime parameters of the PDE that differ from the
+                values stored in the PDE
+            tracker:
+                Defines trackers that process the state of the simulation at
+                fixed time intervals. Multiple trackers can be specified as a
+                list.
+            ret_info (bool):
+                Flag determining whether diagnostic information about the solver
+                process should be returned.
+
+        Returns:
+            :class:`~pde.fields.base.FieldBase`:
+            The state at the final time point. In the case `ret_info == True`, a
+            tuple with the final state and a dictionary with additional
+            information is returned.
+        """
+        if state is None:
+            state = self.state
+        else:
+            self.state.assert_field_compatible(state)
+        if parameters is None:
+            parameters = {}
+
+        solver = CompiledSimulationSolver(
+            self, self.pde.get_parameters(**parameters))
+        controller = Controller(solver, t_range=t_range, tracker=tracker)
+        final_state = controller.run(state, dt)
+
+        if ret_info:
+            info = controller.info.copy()
+            info.pop('solver_class')  # remove redundant information
+            info['solver'] = solver.info.copy()
+            return final_state, info
+        else:
+            return final_state
+
+
+
+class CompiledSimulationSolver(SolverBase, register=False):
+    """ solver using the stepper of a :class:`CompiledSimulation`
+
+    This solver is created by :meth:`CompiledSimulation.run` and passes the
+    time step and the values of the runtime parameters to the compiled
+    stepper.
+    """
+
+
+    def __init__(self, simulation: CompiledSimulation,
+                 parameters: np.ndarray):
+        """
+        Args:
+            simulation (:class:`CompiledSimulation`):
+                The simulation providing the compiled stepper
+            parameters (:class:`numpy.ndarray`):
+                The values of the runtime parameters of the PDE
+        """
+        super().__init__(simulation.pde)
+        self.simulation = simulation
+        self.parameters = parameters
+
+
+    def make_stepper(self, state: FieldBase, dt=None) -> Callable:
+        """ return a stepper function using the compiled stepper
+
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Time step of the explicit stepping. If `None`, this solver
+                specifies 1e-3 as a default value.
+
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`. The function call signature is
+            `(state: numpy.ndarray, t_start: float, t_end: float)`
+        """
+        if dt is None:
+            dt = 1e-3
+        dt = float(dt)
+
+        self.info['dt'] = dt
+        self.info['steps'] = 0
+        self.info['scheme'] = self.simulation.scheme
+        self.info['backend'] = 'numba'
+        self.info['stochastic'] = self.pde.is_sde
+        self.info['parameters'] = dict(zip(self.pde.runtime_parameters,
+                                           self.parameters.tolist()))
+
+        inner_stepper = self.simulation.stepper
+        work = self.simulation.work_buffers
+        parameters = self.parameters
+
+        def stepper(state: FieldBase, t_start: float, t_end: float) -> float:
+            """ advance `state` from `t_start` to `t_end` """
+            # calculate number of steps (which is at least 1)
+            steps = self._get_step_count(t_start, t_end, dt)
+            t_last = inner_stepper(state.data, float(t_start), steps, dt, work,
+                                   parameters)
+            self.info['steps'] += steps
+            return t_last  # type: ignore
+
+        return stepper
@@ -0,0 +1,169 @@
+"""
+Defines a semi-implicit solver working in Fourier space
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+from typing import Callable, Tuple
+
+import numpy as np
+
+from .base import SolverBase
+from ..pdes.base import PDEBase
+from ..fields.base import FieldBase, DataFieldBase
+from ..grids.cartesian import CartesianGridBase
+from ..tools.spectral import np_rfftn, np_irfftn, get_wave_vectors
+
+
+
+def _phi_functions(z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    r""" evaluate the functions used by exponential time differencing
+
+    The functions are :math:`\phi_1(z) = (e^z - 1)/z` and
+    :math:`\phi_2(z) = (e^z - 1 - z)/z^2`. A Taylor expansion is used for small
+    arguments to avoid cancellation errors.
+
+    Args:
+        z (:class:`numpy.ndarray`): The arguments of the functions
+
+    Returns:
+        tuple: The values of :math:`\phi_1` and :math:`\phi_2`
+    """
+    z = np.asarray(z, dtype=np.double)
+    small = np.abs(z) < 0.1
+    z_large = np.where(small, 1, z)  # avoid divisions by zero
+    phi1 = np.where(small, 1 + z / 2 + z**2 / 6 + z**3 / 24 + z**4 / 120,
+                    np.expm1(z_large) / z_large)
+    phi2 = np.where(small, 0.5 + z / 6 + z**2 / 24 + z**3 / 120 + z**4 / 720,
+                    (np.expm1(z_large) - z_large) / z_large**2)
+    return phi1, phi2
+
+
+
+class SpectralSolver(SolverBase):
+    """ class for solving stiff partial differential equations in Fourier space
+
+    The solver splits the evolution rate into a linear part, declared by
+    :meth:`~pde.pdes.base.PDEBase.linear_operator_spectrum`, and the remaining
+    part, given by :meth:`~pde.pdes.base.PDEBase.evolution_rate_nonlinear`. The
+    linear part is treated implicitly or exactly in Fourier space, while the
+    non-linear part is evaluated explicitly. This removes the stability limit
+    imposed by stiff high-order derivatives, so much larger time steps can be
+    used than with :class:`~pde.solvers.explicit.ExplicitSolver`. The solver
+    only supports scalar fields on Cartesian grids that are periodic along all
+    axes.
+    """
+
+    name = 'spectral'
+
+
+    def __init__(self, pde: PDEBase, scheme: str = 'etdrk2'):
+        """ initialize the spectral solver
+
+        Args:
+            pde (:class:`~pde.pdes.base.PDEBase`):
+                The instance describing the pde that needs to be solved
+            scheme (str):
+                Defines the scheme to use. Supported values are 'imex' for a
+                semi-implicit Euler scheme, 'etd1' for first-order exponential
+                time differencing, and 'etdrk2' for the second-order
+                exponential Runge-Kutta scheme of Cox and Matthews.
+        """
+        super().__init__(pde)
+        if scheme not in {'imex', 'etd1', 'etdrk2'}:
+            raise ValueError(f'Scheme `{scheme}` is not supported')
+        self.scheme = scheme
+
+
+    def make_stepper(self, state: FieldBase, dt=None) -> Callable:
+        """ return a stepper function using a semi-implicit scheme
+
+        Args:
+            state (:class:`~pde.fields.FieldBase`):
+                An example for the state from which the grid and other
+                information can be extracted
+            dt (float):
+                Time step of the stepping. If `None`, this solver specifies
+                1e-3 as a default value.
+
+        Returns:
+            Function that can be called to advance the `state` from time
+            `t_start` to time `t_end`. The function call signature is
+            `(state: numpy.ndarray, t_start: float, t_end: float)`
+        """
+        if self.pde.is_sde:
+            raise RuntimeError('The spectral solver does not support '
+                               'stochastic equations')
+        if not isinstance(state, DataFieldBase) or state.rank != 0:
+            raise ValueError('The spectral solver only supports scalar fields')
+        grid = state.grid
+        if not isinstance(grid, CartesianGridBase) or not all(grid.periodic):
+            raise ValueError('The spectral solver requires Cartesian grids '
+                             'that are periodic along all axes')
+
+        # support `None` as a default value, so the controller can signal that
+        # the solver should use a default time step
+        if dt is None:
+            dt = 1e-3
+
+        self.info['dt'] = dt
+        self.info['steps'] = 0
+        self.info['function_evaluations'] = 0
+        self.info['scheme'] = self.scheme
+        self.info['stochastic'] = False
+
+        # determine the linear operator in Fourier space
+        shape = grid.shape
+        ks = get_wave_vectors(tuple(shape),
+                              tuple(float(dx) for dx in grid.discretization))
+        k2s = sum(k**2 for k in ks)
+        linear = np.broadcast_to(self.pde.linear_operator_spectrum(k2s),
+                                 k2s.shape)
+
+        # determine the coefficients of the scheme
+        if self.scheme == 'imex':
+            factor = 1 / (1 - dt * linear)
+        else:
+            exp_z = np.exp(dt * linear)
+            phi1, phi2 = _phi_functions(dt * linear)
+            coeff1, coeff2 = dt * phi1, dt * phi2
+        evaluations = 2 if self.scheme == 'etdrk2' else 1
+
+        field = state.copy()
+
+        def nonlinear(data: np.ndarray, t: float) -> np.ndarray:
+            """ evaluate the non-linear part in Fourier space """
+            field.data = data
+            return np_rfftn(self.pde.evolution_rate_nonlinear(field, t).data)
+
+        def stepper(state: FieldBase, t_start: float, t_end: float) -> float:
+            """ use semi-implicit stepping to advance `state` from `t_start`
+            to `t_end` """
+            # calculate number of steps (which is at least 1)
+            steps = self._get_step_count(t_start, t_end, dt)
+
+            data = state.data
+            data_k = np_rfftn(data)
+            for i in range(steps):
+                t = t_start + i * dt
+                rate_k = nonlinear(data, t)
+                if self.scheme == 'imex':
+                    data_k = factor * (data_k + dt * rate_k)
+                elif self.scheme == 'etd1':
+                    data_k = exp_z * data_k + coeff1 * rate_k
+                else:
+                    # predictor step using the exponential Euler scheme
+                    pred_k = exp_z * data_k + coeff1 * rate_k
+                    pred = np_irfftn(pred_k, shape)
+                    data_k = pred_k + coeff2 * (nonlinear(pred, t + dt) -
+                                                rate_k)
+                data = np_irfftn(data_k, shape)
+
+            state.data[...] = data
+            self.info['steps'] += steps
+            self.info['function_evaluations'] += evaluations * steps
+            return t_start + steps * dt
+
+        self._logger.info(f'Initialized spectral {self.scheme} stepper with '
+                          'dt=%g', dt)
+        return stepper
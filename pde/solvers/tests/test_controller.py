@@ -0,0 +1,112 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import logging
+import time
+
+import numpy as np
+import pytest
+
+from ...fields import ScalarField
+from ...grids import UnitGrid
+from ...pdes import DiffusionPDE
+from ...trackers import trackers
+from ...tools.numba import random_seed
+from .. import Controller, ExplicitSolver
+from ..profiler import SimulationProfiler
+
+
+
+def test_checkpoint_resume(tmp_path):
+    """ test resuming a stochastic simulation from a checkpoint """
+    path = tmp_path / 'checkpoint.pkl'
+    field = ScalarField.random_uniform(UnitGrid([16]), -1, 1)
+    eq = DiffusionPDE(noise=0.1)
+    
+    def run(t_range, **kwargs):
+        """ helper function running a simulation """
+        tracker = trackers.CallbackTracker(lambda state, t: None, interval=0.25)
+        controller = Controller(ExplicitSolver(eq), t_range=t_range,
+                                tracker=tracker, checkpoint=path,
+                                checkpoint_interval=0.3)
+        return controller, controller.run(field, dt=0.01, **kwargs)
+    
+    # uninterrupted simulation
+    random_seed(0)
+    ctrl1, res1 = run(1)
+    
+    # simulation that is interrupted and then resumed from a checkpoint
+    random_seed(0)
+    run(0.5)
+    random_seed(1)  # the random state needs to be restored from the checkpoint
+    ctrl2, res2 = run(1, resume_from=path)
+    
+    assert ctrl2.info['resumed_at'] == 0.3
+    assert ctrl1.solver.info['steps'] == ctrl2.solver.info['steps']
+    np.testing.assert_array_equal(res1.data, res2.data)
+    
+    # no checkpoint intervals are created without checkpoints
+    controller = Controller(ExplicitSolver(eq), t_range=1, tracker=None)
+    assert controller.checkpoint_interval is None
+    
+    
+    
+def test_profiler(tmp_path):
+    """ test collecting detailed timing information """
+    field = ScalarField.random_uniform(UnitGrid([16]))
+    tracker = trackers.CallbackTracker(lambda state: None, interval=0.1)
+    controller = Controller(ExplicitSolver(DiffusionPDE()), t_range=1,
+                            tracker=tracker, profile=True)
+    controller.run(field, dt=0.01)
+    
+    profile = controller.diagnostics['profile']
+    assert profile['counts']['trackers;CallbackTracker'] == 11
+    assert profile['counts']['stepper'] >= 10
+    assert set(profile['operators']) == {'laplace'}
+    assert profile['total'] == pytest.approx(sum(profile['timings'].values()))
+    assert controller.trackers.profiler is None
+    
+    path = tmp_path / 'profile.folded'
+    controller.profiler.write_folded(path)
+    lines = path.read_text().splitlines()
+    assert any(line.startswith('simulation;stepper ') for line in lines)
+    
+    # profiling is disabled by default
+    controller = Controller(ExplicitSolver(DiffusionPDE()), t_range=1,
+                            tracker=None)
+    controller.run(field, dt=0.01)
+    assert 'profile' not in controller.diagnostics
+    assert controller.profiler is None
+    
+    
+    
+def test_profiler_nested_blocks():
+    """ test that the time of nested blocks is only attributed once """
+    profiler = SimulationProfiler()
+    with profiler.measure('outer'):
+        time.sleep(0.02)
+        with profiler.measure('outer;inner'):
+            time.sleep(0.05)
+    assert profiler.timings['outer;inner'] >= 0.05
+    assert 0.02 <= profiler.timings['outer'] < 0.05
+    assert profiler.counts == {'outer': 1, 'outer;inner': 1}
+    
+
+
+def test_compilation_count(caplog):
+    """ test counting the compilations of a simulation """
+    field = ScalarField.random_uniform(UnitGrid([16]))
+    controller = Controller(ExplicitSolver(DiffusionPDE()), t_range=0.1,
+                            tracker=None)
+    controller.run(field, dt=0.01)
+    info = controller.solver.info['compilation']
+    assert info['count'] > 0
+    assert info['time'] > 0
+    
+    # warn when many functions are compiled
+    controller.compilation_warning_threshold = 0
+    controller.solver = ExplicitSolver(DiffusionPDE(diffusivity=2))
+    with caplog.at_level(logging.WARNING):
+        controller.run(field, dt=0.01)
+    assert 'Compiled' in caplog.text
@@ -0,0 +1,99 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import pytest
+import numpy as np
+
+from ...fields import ScalarField, FieldCollection
+from ...grids import UnitGrid
+from ...pdes import DiffusionPDE, PDE
+from ...trackers import ConsistencyTracker
+from .. import Controller, DistributedSolver, ExplicitSolver
+
+
+
+@pytest.mark.parametrize('scheme', ['euler', 'runge-kutta'])
+@pytest.mark.parametrize('periodic', [True, False])
+def test_distributed_solver(scheme, periodic):
+    """ compare the distributed solver to the explicit solver """
+    grid = UnitGrid([16, 8], periodic=[periodic, True])
+    field = ScalarField.random_uniform(grid, -1, 1)
+    eq = DiffusionPDE()
+    
+    c1 = Controller(ExplicitSolver(eq, scheme=scheme), t_range=1,
+                    tracker=None)
+    s1 = c1.run(field, dt=1e-2)
+    
+    solver = DistributedSolver(eq, num_processes=2, scheme=scheme)
+    # the tracker is called at fixed times, so the steps are not split
+    tracker = ConsistencyTracker(interval=0.1)
+    c2 = Controller(solver, t_range=1, tracker=tracker)
+    s2 = c2.run(field, dt=1e-2)
+    assert solver.info['num_processes'] == 2
+    assert solver.info['steps'] == 100
+    assert not solver._processes
+                               
+    np.testing.assert_allclose(s1.data, s2.data)
+    
+
+
+def test_distributed_collection():
+    """ test the distributed solver with nested operators and collections """
+    grid = UnitGrid([24])
+    state = FieldCollection.scalar_random_uniform(2, grid)
+    eq = PDE({'a': 'laplace(a**3 - a - laplace(a)) - b', 'b': 'a - b'})
+    
+    s1 = eq.solve(state, t_range=0.1, dt=1e-3, tracker=None)
+    solver = DistributedSolver(eq, num_processes=3, exchange_interval=2)
+    s2 = Controller(solver, t_range=0.1, tracker=None).run(state, dt=1e-3)
+    
+    np.testing.assert_allclose(s1.data, s2.data)
+    
+    
+    
+def test_distributed_spawn(monkeypatch):
+    """ test the distributed solver with spawned processes """
+    from .. import distributed
+    monkeypatch.setattr(distributed.mp, 'get_all_start_methods',
+                        lambda: ['spawn'])
+    
+    grid = UnitGrid([8])
+    field = ScalarField.random_uniform(grid, -1, 1)
+    eq = DiffusionPDE()
+    
+    s1 = eq.solve(field, t_range=0.1, dt=1e-2, tracker=None)
+    solver = DistributedSolver(eq, num_processes=2)
+    s2 = Controller(solver, t_range=0.1, tracker=None).run(field, dt=1e-2)
+    np.testing.assert_allclose(s1.data, s2.data)
+    
+    
+    
+def test_distributed_process_died():
+    """ test that the distributed solver notices stopped processes """
+    grid = UnitGrid([8])
+    field = ScalarField.random_uniform(grid, -1, 1)
+    
+    solver = DistributedSolver(DiffusionPDE(), num_processes=2)
+    stepper = solver.make_stepper(field, dt=1e-2)
+    try:
+        stepper(field, 0, 0.1)
+        solver._processes[1].kill()
+        solver._processes[1].join()
+        with pytest.raises(RuntimeError, match='block 1'):
+            stepper(field, 0.1, 0.2)
+    finally:
+        solver.finalize()
+    
+    
+    
+def test_distributed_stochastic():
+    """ test the distributed solver with stochastic equations """
+    eq = DiffusionPDE(noise=1)
+    with pytest.raises(ValueError):
+        DistributedSolver(eq, num_processes=2, exchange_interval=2)
+    
+    field = ScalarField(UnitGrid([8]))
+    solver = DistributedSolver(eq, num_processes=2)
+    res = Controller(solver, t_range=1, tracker=None).run(field, dt=1e-2)
+    assert res.data.std() > 0
@@ -60,3 +60,37 @@ def test_unsupported_stochastic_solvers():
         eq.solve(field, 1, method='explicit', scheme='runge-kutta')
     with pytest.raises(RuntimeError):
         eq.solve(field, 1, method='scipy', scheme='runge-kutta')
+
+
+
+@pytest.mark.parametrize('scheme', ['euler', 'runge-kutta'])
+@pytest.mark.parametrize('backend', ['numba', 'numpy'])
+def test_adaptive_solver(scheme, backend):
+    """ test the adaptive explicit solvers """
+    field = ScalarField.random_uniform(UnitGrid([16]), -1, 1)
+    eq = DiffusionPDE()
+    
+    c1 = Controller(ExplicitSolver(eq, scheme='runge-kutta'), t_range=1,
+                    tracker=None)
+    s1 = c1.run(field, dt=1e-3)
+    
+    solver = ExplicitSolver(eq, scheme=scheme, backend=backend, adaptive=True)
+    c2 = Controller(solver, t_range=1, tracker=['consistency'])
+    with np.errstate(under='ignore'):
+        s2 = c2.run(field, dt=1e-3)
+    
+    np.testing.assert_allclose(s1.data, s2.data, rtol=1e-2, atol=1e-2)
+    assert c2.info['t_final'] == 1
+    assert solver.info['adaptive']
+    assert 0 < solver.info['steps'] < 1000
+    assert solver.info['steps_rejected'] >= 0
+    assert solver.info['dt_last'] > 1e-3
+
+
+
+def test_adaptive_stochastic():
+    """ test that adaptive solvers reject stochastic equations """
+    field = ScalarField.random_uniform(UnitGrid([16]), -1, 1)
+    eq = DiffusionPDE(noise=1)
+    with pytest.raises(RuntimeError):
+        eq.solve(field, 1, dt=1e-3, method='explicit', adaptive=True)
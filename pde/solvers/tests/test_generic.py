@@ -8,7 +8,8 @@ import pytest
 from ...fields import ScalarField
 from ...grids import UnitGrid
 from ...pdes import DiffusionPDE
-from .. import Controller, ExplicitSolver, ImplicitSolver, ScipySolver
+from .. import (Controller, ExplicitSolver, ImplicitSolver,
+                NewtonKrylovSolver, ScipySolver)
 from .. import registered_solvers
 
 
@@ -30,7 +31,7 @@ def test_solver_in_pde_class():
 
 
 @pytest.mark.parametrize('solver_class', [ExplicitSolver, ImplicitSolver,
-                                          ScipySolver])
+                                          NewtonKrylovSolver, ScipySolver])
 def test_compare_solvers(solver_class):
     """ compare several solvers """
     field = ScalarField.random_uniform(UnitGrid([8, 8]), -1, 1)
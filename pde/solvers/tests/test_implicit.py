@@ -0,0 +1,72 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import numpy as np
+import pytest
+
+from ...fields import ScalarField, FieldCollection
+from ...grids import UnitGrid
+from ...pdes import DiffusionPDE, PDE
+from .. import Controller, ExplicitSolver, NewtonKrylovSolver
+from ..implicit import make_jacobian_estimator
+
+
+
+@pytest.mark.parametrize('periodic', [True, False])
+def test_jacobian_estimator(periodic):
+    """ compare the sparse Jacobian to a dense finite difference estimate """
+    grid = UnitGrid([7, 5], periodic=periodic)
+    state = FieldCollection.scalar_random_uniform(2, grid)
+    eq = PDE({'a': 'laplace(a**3 - laplace(a)) + b', 'b': 'a * b'})
+    rhs = eq.make_pde_rhs(state, backend='numpy')
+    
+    jacobian = make_jacobian_estimator(rhs, state)(state.data, 0).toarray()
+    
+    # dense estimate of the jacobian
+    data = state.data.ravel()
+    rate = rhs(state.data, 0).ravel()
+    expect = np.empty((data.size, data.size))
+    for i in range(data.size):
+        eps = 1e-7 * (1 + abs(data[i]))
+        perturbed = data.copy()
+        perturbed[i] += eps
+        expect[:, i] = (rhs(perturbed.reshape(state.data.shape), 0).ravel() -
+                        rate) / eps
+    np.testing.assert_allclose(jacobian, expect, atol=1e-4)
+    
+    
+
+@pytest.mark.parametrize('scheme', ['backward-euler', 'bdf2'])
+@pytest.mark.parametrize('linear_solver', ['gmres', 'bicgstab'])
+def test_newton_krylov_solver(scheme, linear_solver):
+    """ test the Newton-Krylov solver with large time steps """
+    grid = UnitGrid([32], periodic=True)
+    field = ScalarField.random_uniform(grid, -1, 1)
+    eq = PDE({'c': 'laplace(c) + c - c**3'})
+    
+    c1 = Controller(ExplicitSolver(eq), t_range=2, tracker=None)
+    s1 = c1.run(field, dt=1e-3)
+    
+    solver = NewtonKrylovSolver(eq, scheme=scheme, linear_solver=linear_solver)
+    c2 = Controller(solver, t_range=2, tracker=None)
+    s2 = c2.run(field, dt=0.1)
+    
+    assert solver.info['steps'] == 20
+    assert solver.info['newton_iterations'] > 0
+    assert solver.info['linear_iterations'] > 0
+    assert solver.info['jacobian_evaluations'] < 20
+    atol = 0.2 if scheme == 'backward-euler' else 0.05
+    np.testing.assert_allclose(s1.data, s2.data, atol=atol)
+    
+    
+    
+def test_newton_krylov_wrong_input():
+    """ test wrong arguments to the Newton-Krylov solver """
+    with pytest.raises(ValueError):
+        NewtonKrylovSolver(DiffusionPDE(), scheme='unknown')
+    with pytest.raises(ValueError):
+        NewtonKrylovSolver(DiffusionPDE(), linear_solver='unknown')
+    with pytest.raises(RuntimeError):
+        solver = NewtonKrylovSolver(DiffusionPDE(noise=1))
+        solver.make_stepper(ScalarField(UnitGrid([8])))
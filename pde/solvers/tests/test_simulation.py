@@ -0,0 +1,80 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import pickle
+
+import numpy as np
+import pytest
+
+from ...fields import ScalarField, FieldCollection
+from ...grids import UnitGrid
+from ...pdes import AllenCahnPDE, DiffusionPDE, WavePDE
+from ...tools.numba import random_seed
+from .. import CompiledSimulation, Controller, ExplicitSolver
+from ..base import SolverBase
+
+
+
+def test_compiled_simulation():
+    """ test running a compiled simulation with different parameters """
+    state = ScalarField.random_uniform(UnitGrid([16]), -1, 1)
+    simulation = CompiledSimulation(AllenCahnPDE(), state).warmup()
+    
+    for width in [0.5, 2]:
+        result, info = simulation.run(state, t_range=0.25, dt=2**-6,
+                                      parameters={'interface_width': width},
+                                      ret_info=True)
+        assert info['solver']['compilation']['count'] == 0
+        assert info['solver']['parameters'] == {'interface_width': width}
+        
+        eq = AllenCahnPDE(interface_width=width)
+        controller = Controller(ExplicitSolver(eq), t_range=0.25, tracker=None)
+        expected = controller.run(state, dt=2**-6)
+        np.testing.assert_allclose(result.data, expected.data)
+        
+    with pytest.raises(ValueError):
+        simulation.run(state, t_range=0.1, parameters={'width': 1})
+        
+    # simulations can be sent to other processes
+    simulation2 = pickle.loads(pickle.dumps(simulation))
+    np.testing.assert_allclose(simulation2.run(state, t_range=0.1).data,
+                               simulation.run(state, t_range=0.1).data)
+    
+    
+    
+def test_compiled_simulation_rk():
+    """ test a compiled simulation of a field collection """
+    grid = UnitGrid([8, 8])
+    state = FieldCollection([ScalarField.random_uniform(grid),
+                             ScalarField(grid)])
+    simulation = CompiledSimulation(WavePDE(), state, scheme='rk')
+    result = simulation.run(t_range=0.25, dt=2**-6, parameters={'speed': 2})
+    
+    controller = Controller(ExplicitSolver(WavePDE(speed=2), scheme='rk'),
+                            t_range=0.25, tracker=None)
+    expected = controller.run(state, dt=2**-6)
+    np.testing.assert_allclose(result.data, expected.data)
+    
+    
+    
+def test_compiled_simulation_sde():
+    """ test a compiled simulation of a stochastic equation """
+    state = ScalarField.random_uniform(UnitGrid([8]))
+    eq = DiffusionPDE(noise=0.1)
+    simulation = CompiledSimulation(eq, state)
+    random_seed(0)
+    result = simulation.run(t_range=0.25, dt=2**-6,
+                            parameters={'diffusivity': 2})
+    
+    controller = Controller(ExplicitSolver(DiffusionPDE(2, noise=0.1)),
+                            t_range=0.25, tracker=None)
+    random_seed(0)
+    expected = controller.run(state, dt=2**-6)
+    np.testing.assert_allclose(result.data, expected.data)
+    
+    
+    
+def test_compiled_simulation_solver_registry():
+    """ test that the helper solver cannot be created by name """
+    assert 'CompiledSimulationSolver' not in SolverBase.registered_solvers
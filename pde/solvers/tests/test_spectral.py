@@ -0,0 +1,69 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import pytest
+import numpy as np
+
+from ...fields import ScalarField
+from ...grids import CartesianGrid, UnitGrid
+from ...pdes import (SwiftHohenbergPDE, KuramotoSivashinskyPDE,
+                     CahnHilliardPDE, DiffusionPDE)
+from ...tools.spectral import np_rfftn, np_irfftn, get_wave_vectors
+from .. import Controller, ExplicitSolver, SpectralSolver
+
+
+
+@pytest.mark.parametrize('pde', [SwiftHohenbergPDE(), KuramotoSivashinskyPDE(),
+                                 CahnHilliardPDE()])
+def test_linear_operator_spectrum(pde):
+    """ test whether the split into linear and non-linear part is correct """
+    grid = CartesianGrid([[0, 8 * np.pi]] * 2, 128, periodic=True)
+    x, y = grid.cell_coords[..., 0], grid.cell_coords[..., 1]
+    state = ScalarField(grid, np.sin(x / 4) + 0.5 * np.cos(y / 2))
+    
+    ks = get_wave_vectors(grid.shape, tuple(grid.discretization))
+    k2s = sum(k**2 for k in ks)
+    linear = np.broadcast_to(pde.linear_operator_spectrum(k2s), k2s.shape)
+    rate_linear = np_irfftn(linear * np_rfftn(state.data), grid.shape)
+    rate = pde.evolution_rate_nonlinear(state).data + rate_linear
+    np.testing.assert_allclose(rate, pde.evolution_rate(state).data,
+                               atol=1e-2)
+
+
+
+@pytest.mark.parametrize('scheme', ['imex', 'etd1', 'etdrk2'])
+def test_spectral_solver(scheme):
+    """ compare the spectral solver to the explicit solver """
+    grid = CartesianGrid([[0, 16 * np.pi]], 128, periodic=True)
+    state = ScalarField.random_uniform(grid, -0.1, 0.1)
+    eq = SwiftHohenbergPDE()
+    
+    c1 = Controller(ExplicitSolver(eq), t_range=5, tracker=None)
+    s1 = c1.run(state, dt=1e-3)
+    
+    solver = SpectralSolver(eq, scheme=scheme)
+    c2 = Controller(solver, t_range=5, tracker=None)
+    s2 = c2.run(state, dt=0.01)
+    assert solver.info['steps'] == 500
+    np.testing.assert_allclose(s1.data, s2.data, atol=1e-2)
+    
+    # large time steps remain stable
+    c3 = Controller(SpectralSolver(eq, scheme=scheme), t_range=50,
+                    tracker=None)
+    assert np.all(np.isfinite(c3.run(state, dt=1).data))
+        
+        
+        
+def test_spectral_solver_wrong_input():
+    """ test situations that the spectral solver cannot handle """
+    with pytest.raises(ValueError):
+        SpectralSolver(SwiftHohenbergPDE(), scheme='unknown')
+    
+    solver = SpectralSolver(SwiftHohenbergPDE())
+    with pytest.raises(ValueError):
+        solver.make_stepper(ScalarField(UnitGrid([8], periodic=False)))
+    
+    solver = SpectralSolver(DiffusionPDE())
+    with pytest.raises(NotImplementedError):
+        solver.make_stepper(ScalarField(UnitGrid([8], periodic=True)))
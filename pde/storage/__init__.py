@@ -6,10 +6,13 @@ Module defining classes for storing simulation data.
 
    ~memory.get_memory_storage
    ~memory.MemoryStorage
+   ~memory.RingBufferStorage
    ~file.FileStorage
+   ~memmap.MemmapStorage
    
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de> 
 """
 
-from .memory import MemoryStorage, get_memory_storage
+from .memory import MemoryStorage, RingBufferStorage, get_memory_storage
 from .file import FileStorage
+from .memmap import MemmapStorage
@@ -124,12 +124,76 @@ class StorageBase(metaclass=ABCMeta):
             if 'field_attributes' in self.info:
                 attrs_serialized = self.info['field_attributes']
                 attrs = FieldBase.unserialize_attributes(attrs_serialized)
+                if 'grid' not in attrs and 'fields' in attrs:
+                    # field collections store the grid with each field
+                    attrs = attrs['fields'][0]
                 self._grid = attrs['grid']
             else:
                 self._logger.warning('`grid` attribute was not stored')
         return self._grid
     
     
+    @property
+    def view(self) -> "StorageView":
+        """ :class:`StorageView`: lazy view on the stored data
+        
+        Indexing the view selects time points, fields of collections, and parts
+        of the data without reading any data. Only the selected part is read
+        when the data of the resulting view is accessed. For instance,
+        `storage.view[:, 1, :, 5].data` returns the time series of a line of
+        the second field in a collection.
+        """
+        if self._field is None and len(self) > 0:
+            self._init_field_type(0)
+        return StorageView(self)
+        
+    
+    def _init_field_type(self, t_index: int) -> None:
+        """ determine the type of the stored field
+        
+        This sets the attribute `_field` to an instance of the field class,
+        which is used as a template for creating fields from stored data.
+        
+        Args:
+            t_index (int):
+                The index of the data used for determining the field type
+        """
+        if self.grid is None:
+            raise RuntimeError('Could not load grid from data. Please set '
+                               'the `_grid` attribute to the grid that has '
+                               'been used for the stored data.')
+        
+        if 'field_attributes' in self.info:
+            # field type was stored in data
+            attrs_serialized = self.info['field_attributes']
+            attrs = FieldBase.unserialize_attributes(attrs_serialized)
+            self._field = FieldBase.from_state(attrs)
+            
+        else:
+            # try to determine field type automatically
+
+            # obtain data shape by removing the first axis (associated with
+            # the time series and the last axes (associated with the spatial
+            # dimensions). What is left should be the (local) data stored
+            # at each grid point for each time step. Note that self.data
+            # might be a list of arrays
+            local_shape = self.data[t_index].shape[:-self.grid.num_axes]
+            dim = self.grid.dim
+            if len(local_shape) == 0:  # rank 0
+                self._field = ScalarField(self.grid)
+            elif local_shape == (dim,):  # rank 1
+                self._field = VectorField(self.grid)
+            elif local_shape == (dim, dim):  # rank 2
+                self._field = Tensor2Field(self.grid)
+            else:
+                raise RuntimeError('`field` attribute was not stored in '
+                                   f'file and the data shape {local_shape} '
+                                   'could not be interpreted automatically')
+            self._logger.warning('`field` attribute was not stored. We '
+                                 'guessed that the data is of type '
+                                 f'{self._field.__class__.__name__}.')
+
+
     def _get_field(self, t_index: int) -> FieldBase:
         """ return the field corresponding to the given time index
         
@@ -148,42 +212,7 @@ class StorageBase(metaclass=ABCMeta):
             raise IndexError("Time index out of range") 
         
         if self._field is None:
-            # we need to determine the field type
-            
-            if self.grid is None:
-                raise RuntimeError('Could not load grid from data. Please set '
-                                   'the `_grid` attribute to the grid that has '
-                                   'been used for the stored data.')
-            
-            if 'field_attributes' in self.info:
-                # field type was stored in data
-                attrs_serialized = self.info['field_attributes']
-                attrs = FieldBase.unserialize_attributes(attrs_serialized)
-                self._field = FieldBase.from_state(attrs)
-                
-            else:
-                # try to determine field type automatically
-
-                # obtain data shape by removing the first axis (associated with
-                # the time series and the last axes (associated with the spatial
-                # dimensions). What is left should be the (local) data stored
-                # at each grid point for each time step. Note that self.data
-                # might be a list of arrays
-                local_shape = self.data[t_index].shape[:-self.grid.num_axes]
-                dim = self.grid.dim
-                if len(local_shape) == 0:  # rank 0
-                    self._field = ScalarField(self.grid)
-                elif local_shape == (dim,):  # rank 1
-                    self._field = VectorField(self.grid)
-                elif local_shape == (dim, dim):  # rank 2
-                    self._field = Tensor2Field(self.grid)
-                else:
-                    raise RuntimeError('`field` attribute was not stored in '
-                                       f'file and the data shape {local_shape} '
-                                       'could not be interpreted automatically')
-                self._logger.warning('`field` attribute was not stored. We '
-                                     'guessed that the data is of type '
-                                     f'{self._field.__class__.__name__}.')
+            self._init_field_type(t_index)
                     
         # create the field with the data of the given index
         return self._field.copy(data=self.data[t_index])
@@ -335,6 +364,227 @@ class StorageBase(metaclass=ABCMeta):
         
         
             
+class StorageView():
+    """ lazy view on a part of the data in a storage
+    
+    A view stores a selection of time points, of a field in a collection, and
+    of the data axes without reading any data. Indexing a view returns a new
+    view that combines both selections, so only the final selection is read
+    when the data is accessed using :attr:`data`. Views are created using
+    :attr:`StorageBase.view`.
+    
+    The first index selects time points. If the storage contains a
+    :class:`~pde.fields.FieldCollection`, an integer as the second index
+    selects a field of the collection. The remaining indices select the data
+    axes of the field, i.e., the tensor components followed by the spatial
+    axes. Only integers and slices are supported as indices.
+    
+    Example:
+        The time series of a single line of the second field of a collection
+        can be read using ::
+        
+            storage.view[:, 1, :, 5].data
+    """
+    
+    
+    def __init__(self, storage: "StorageBase", time=None,
+                 field_index: int = None, index: Tuple = None):
+        """
+        Args:
+            storage (:class:`StorageBase`):
+                The storage whose data is viewed
+            time (int or range, optional):
+                The selected time points
+            field_index (int, optional):
+                The index of the selected field of a collection
+            index (tuple, optional):
+                The selection (an integer or a range) for each data axis
+        """
+        self.storage = storage
+        self.field_index = field_index
+        self._time = range(len(storage)) if time is None else time
+        if index is None:
+            index = tuple(range(n) for n in self._field_shape)
+        self._index = index
+        
+        
+    @property
+    def _field_shape(self) -> Tuple[int, ...]:
+        """ tuple: the data shape of the viewed field """
+        if self.field_index is None:
+            return self.storage.data_shape
+        else:
+            field = self.storage._field[self.field_index]  # type: ignore
+            return field.data.shape  # type: ignore
+        
+        
+    @staticmethod
+    def _compose(selection, key):
+        """ select a part of an earlier selection
+        
+        Args:
+            selection (range): The earlier selection
+            key (int or slice): The new selection applied to `selection`
+            
+        Returns:
+            int or range: The combined selection
+        """
+        if isinstance(key, (int, np.integer)):
+            return selection[int(key)]
+        elif isinstance(key, slice):
+            return selection[key]
+        else:
+            raise TypeError(f'Unsupported index {key!r}')
+        
+        
+    @staticmethod
+    def _as_index(selection) -> Tuple[Union[int, slice], bool]:
+        """ convert a selection to an index that can be used for reading
+        
+        Args:
+            selection (int or range): The selection
+            
+        Returns:
+            tuple: The index with positive step size and a flag indicating
+            whether the resulting axis needs to be reversed
+        """
+        if isinstance(selection, int):
+            return selection, False
+        elif len(selection) == 0:
+            return slice(0, 0), False
+        elif selection.step > 0:
+            return slice(selection.start, selection.stop, selection.step), False
+        else:
+            # read data in increasing order, which is supported by all backends
+            sel = selection[::-1]
+            return slice(sel.start, sel.stop, sel.step), True
+        
+        
+    def __getitem__(self, key) -> "StorageView":
+        """ return a view on a part of the current view """
+        keys = list(key) if isinstance(key, tuple) else [key]
+        
+        # select time points
+        time = self._time
+        if keys and not isinstance(time, int):
+            time = self._compose(time, keys.pop(0))
+        
+        # select a field of a collection
+        full_index = tuple(range(n) for n in self._field_shape)
+        if (keys and self.field_index is None and self._index == full_index and
+                isinstance(keys[0], (int, np.integer)) and
+                self.storage.has_collection):
+            view = self.__class__(self.storage, time, int(keys.pop(0)))
+            return view._select_axes(keys)
+        
+        view = self.__class__(self.storage, time, self.field_index,
+                              self._index)
+        return view._select_axes(keys)
+    
+    
+    def _select_axes(self, keys: List) -> "StorageView":
+        """ select data axes of the current view
+        
+        Args:
+            keys (list): Indices for the data axes that have not been dropped
+            
+        Returns:
+            :class:`StorageView`: The view with the selection applied
+        """
+        index = list(self._index)
+        axes = [i for i, sel in enumerate(index) if not isinstance(sel, int)]
+        if len(keys) > len(axes):
+            raise IndexError('Too many indices for storage view')
+        for axis, key in zip(axes, keys):
+            index[axis] = self._compose(index[axis], key)
+        return self.__class__(self.storage, self._time, self.field_index,
+                              tuple(index))
+        
+        
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """ tuple: the shape of the data of this view """
+        return tuple(len(sel) for sel in (self._time,) + self._index
+                     if not isinstance(sel, int))
+        
+        
+    def __len__(self):
+        return self.shape[0]
+        
+        
+    @property
+    def times(self):
+        """ the selected time points """
+        index, flip = self._as_index(self._time)
+        times = np.asarray(self.storage.times[index])
+        return times[::-1] if flip else times
+    
+        
+    @property
+    def data(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the selected data, which is read lazily """
+        # determine the index into the stored data
+        if self.field_index is None:
+            num_local = 0  # number of axes that are selected in memory
+            selections = self._index
+            data_index: Tuple = ()
+        else:
+            field = self.storage._field[self.field_index]  # type: ignore
+            num_local = field.rank
+            selections = self._index[num_local:]
+            dof = self.storage._field._slices[self.field_index]  # type: ignore
+            data_index = (dof,)
+        indices = [self._as_index(sel) for sel in (self._time,) + selections]
+        data_index = (indices[0][0],) + data_index + \
+                     tuple(index for index, _ in indices[1:])
+        
+        # read the data from the storage
+        data = self.storage.data
+        if isinstance(data, list):
+            if isinstance(data_index[0], int):
+                result = np.asarray(data[data_index[0]])[data_index[1:]]
+            else:
+                frames = [np.asarray(frame)[data_index[1:]]
+                          for frame in data[data_index[0]]]
+                if frames:
+                    result = np.array(frames)
+                else:
+                    empty = np.empty((0,) + self.storage.data_shape)
+                    result = empty[(slice(None),) + data_index[1:]]
+        else:
+            result = np.asarray(data[data_index])
+            
+        # reverse axes that were read in increasing order
+        flips = [flip for (index, flip) in indices
+                 if not isinstance(index, int)]
+        if self.field_index is not None:
+            # insert the axis of the degrees of freedom
+            flips.insert(0 if isinstance(self._time, int) else 1, False)
+        for axis, flip in enumerate(flips):
+            if flip:
+                result = np.flip(result, axis=axis)
+        
+        if self.field_index is not None:
+            # select the tensor components of the field in memory
+            axis = 0 if isinstance(self._time, int) else 1
+            result = result.reshape(result.shape[:axis] +
+                                    field.data.shape[:num_local] +
+                                    result.shape[axis + 1:])
+            for sel in self._index[:num_local]:
+                if isinstance(sel, int):
+                    result = np.take(result, sel, axis=axis)
+                else:
+                    result = np.take(result, list(sel), axis=axis)
+                    axis += 1
+                
+        return result  # type: ignore
+    
+    
+    def __array__(self, dtype=None):
+        return np.asarray(self.data, dtype=dtype)
+        
+        
+        
 class StorageTracker(TrackerBase):
     """ Tracker that stores data in special storage classes 
     
@@ -7,8 +7,11 @@ format (hdf).
 
 import json
 import logging
+import multiprocessing as mp
+import traceback
 from pathlib import Path
-from typing import Optional, Tuple, Any  # @UnusedImport
+from queue import Full
+from typing import Optional, Tuple, List, Dict, Union, Any  # @UnusedImport
 
 import numpy as np
 
@@ -18,15 +21,118 @@ from ..tools.misc import ensure_directory_exists, hdf_write_attributes
 
 
 
+def _import_hdf5plugin(compression: str):
+    """ import the package providing additional compression filters
+    
+    Importing :mod:`hdf5plugin` registers its filters with :mod:`h5py`, which
+    is necessary for writing and reading datasets compressed by them.
+    
+    Args:
+        compression (str): The compression method requiring the package
+        
+    Returns:
+        The module :mod:`hdf5plugin`
+    """
+    try:
+        import hdf5plugin
+    except ImportError:
+        raise ImportError(f'Compression `{compression}` requires the package '
+                          '`hdf5plugin`')
+    return hdf5plugin
+
+
+
+def _run_writer(storage: "FileStorage", queue, conn) -> None:
+    """ write the frames received through a queue into the file
+    
+    This function is executed in a separate process when
+    :class:`FileStorage` writes data asynchronously.
+    
+    Args:
+        storage (:class:`FileStorage`):
+            The storage, whose file has been prepared for writing
+        queue (:class:`multiprocessing.Queue`):
+            The queue through which frames and commands are received
+        conn (:class:`multiprocessing.connection.Connection`):
+            Connection for sending replies to the main process
+    """
+    error = None
+    try:
+        storage._is_writing = False  # allow opening the file
+        storage._open('appending')
+        storage._is_writing = True
+    except Exception:
+        error = traceback.format_exc()
+        conn.send(('error', error))
+    
+    while True:
+        item = queue.get()
+        if item is None:
+            break  # stop writing
+        
+        if error is None:
+            try:
+                if item[0] == 'frame':
+                    storage._write_frame(item[1], item[2])
+                elif item[0] == 'flush':
+                    storage._write_batch()
+                    storage._file.flush()
+                    conn.send(('flushed', storage._data_length))
+            except Exception:
+                error = traceback.format_exc()
+                conn.send(('error', error))
+        elif item[0] == 'flush':
+            conn.send(('error', error))
+            
+    if error is None:
+        try:
+            storage._sync_datasets()
+            hdf_write_attributes(storage._file, storage.info)
+            storage._file.flush()
+            storage.close()
+        except Exception:
+            error = traceback.format_exc()
+    if error is None:
+        conn.send(('done', storage.info))
+    else:
+        conn.send(('error', error))
+    
+
+
 class FileStorage(StorageBase):
-    """ store discretized fields in a hdf5 file """
+    """ store discretized fields in a hdf5 file
+    
+    Datasets without a fixed length grow geometrically while data is written
+    and are trimmed to their actual length when writing ends. If `write_async`
+    is enabled, the frames are written by a separate process, so the simulation
+    continues while the data is compressed and written. The file can only be
+    read after :meth:`end_writing` has been called.
+    """
+    
+    chunk_bytes: int = 2**20
+    """ int: the approximate size of automatically determined chunks """
+    
+    writer_timeout: float = 1
+    """ float: interval in seconds after which the liveness of the process
+    writing asynchronously is checked while waiting for it """
+    
+    compression_methods = {'gzip', 'lzf', 'zstd', 'blosc'}
+    """ set: the supported compression methods. The methods `zstd` and `blosc`
+    require the optional package :mod:`hdf5plugin` """
     
     def __init__(self, filename: str,
                  info: InfoDict = None,
                  write_mode: str = 'truncate_once',
                  max_length: Optional[int] = None,
-                 compression: bool = True,
-                 keep_opened: bool = True):
+                 compression: Union[bool, str] = True,
+                 compression_level: Optional[int] = None,
+                 shuffle: bool = False,
+                 precision: Union[None, float, str] = None,
+                 keep_opened: bool = True,
+                 chunks: Optional[Tuple[int, ...]] = None,
+                 batch_size: int = 1,
+                 write_async: bool = False,
+                 queue_size: int = 4):
         """
         Args:
             filename (str):
@@ -46,25 +152,82 @@ class FileStorage(StorageBase):
                 files, but is also less flexible. Giving `max_length = None`,
                 allows for arbitrarily large data, which might lead to larger
                 files.
-            compression (bool):
+            compression (bool or str):
                 Whether to store the data in compressed form. Automatically
-                enabled chunked storage.
+                enabled chunked storage. `True` selects 'gzip', while fast
+                alternatives are 'lzf' and, if :mod:`hdf5plugin` is installed,
+                'zstd' and 'blosc'. The blosc compressor can be chosen using
+                the syntax 'blosc:<cname>', e.g., 'blosc:zstd'.
+            compression_level (int, optional):
+                The compression level passed to the codec. `None` uses the
+                default of the respective codec.
+            shuffle (bool):
+                Whether the bytes of the values are shuffled before compression,
+                which often improves the compression of floating point data.
+            precision (float or str, optional):
+                Enables lossy storage of the field data. A number specifies the
+                absolute precision; values are then rounded to a multiple of
+                the largest power of two not exceeding `precision`, so the
+                trailing bits compress well. The value 'float32' stores the data
+                with single precision. The times are always stored exactly.
             keep_opened (bool):
                 Flag indicating whether the file should be kept opened after
                 each writing. If `False`, the file will be closed after writing
                 a dataset. This keeps the file in a consistent state, but also
                 requires more work before data can be written.
+            chunks (tuple, optional):
+                The shape of the chunks in which the data is stored. The first
+                entry gives the number of time points in a chunk and the
+                remaining entries determine the chunk size along the axes of
+                the data. Missing entries and entries larger than the data
+                imply that the chunk spans the entire axis. Chunks that span
+                many time points and only part of space speed up reading time
+                series at single locations. If `None`, a chunk shape with
+                roughly :attr:`chunk_bytes` bytes is determined automatically.
+            batch_size (int):
+                The number of frames that are kept in memory before they are
+                written to the file in a single operation. Frames that have not
+                been written yet only become visible in the file after
+                :meth:`flush` or :meth:`end_writing` has been called.
+            write_async (bool):
+                Flag indicating whether the data is written by a separate
+                process. The main process then only copies the data, which lets
+                the simulation continue while the data is written.
+            queue_size (int):
+                The maximal number of frames that are waiting to be written
+                when `write_async` is enabled. Appending data blocks while the
+                queue is full.
         """
         super().__init__(info=info, write_mode=write_mode)
         self.filename = Path(filename)
+        if compression is True:
+            compression = 'gzip'
+        elif not compression:
+            compression = None
+        elif compression.split(':')[0] not in self.compression_methods:
+            raise ValueError(f'Unknown compression `{compression}`. Supported '
+                             f'are {sorted(self.compression_methods)}')
+        if precision is not None and precision != 'float32':
+            precision = float(precision)
+            if precision <= 0:
+                raise ValueError('Precision must be positive')
         self.compression = compression
+        self.compression_level = compression_level
+        self.shuffle = shuffle
+        self.precision = precision
         self.keep_opened = keep_opened
+        self.chunks = chunks
+        self.batch_size = max(1, int(batch_size))
+        self.write_async = write_async
+        self.queue_size = queue_size
         
         self._logger = logging.getLogger(self.__class__.__name__)
+        self._writer: Any = None  # process writing data asynchronously
         self._file: Any = None
         self._is_writing = False
         self._data_length: int = None  # type: ignore
         self._max_length: Optional[int] = max_length
+        self._batch: List[Tuple[np.ndarray, float]] = []
         
         if self.filename.is_file() and self.filename.stat().st_size > 0:
             try:
@@ -75,6 +238,16 @@ class FileStorage(StorageBase):
                                      'for reading')
 
     
+    def __getstate__(self):
+        """ return the state for pickling, which excludes the opened file """
+        if self._is_writing:
+            raise RuntimeError('Cannot pickle storage while writing data')
+        state = self.__dict__.copy()
+        state['_file'] = state['_times'] = state['_data'] = None
+        state['_data_length'] = None
+        return state
+    
+    
     @property
     def _file_state(self) -> str:
         """ str: the state that the file is currently in """
@@ -92,34 +265,162 @@ class FileStorage(StorageBase):
     def close(self) -> None:
         """ close the currently opened file """
         if self._file is not None:
+            if self._file_state == 'writing':
+                self._sync_datasets()  # write pending data and trim datasets
             self._logger.info(f'Close file `{self.filename}`')
             self._file.close()
             self._file = None
             self._data_length = None  # type: ignore
         
     
-    def _create_hdf_dataset(self, name: str, shape: Tuple[int, ...] = tuple()):
+    def _get_chunk_shape(self, shape: Tuple[int, ...]) -> Tuple[int, ...]:
+        """ determine the shape of the chunks of a dataset
+        
+        Args:
+            shape (tuple): Data shape of a single frame in the dataset
+            
+        Returns:
+            tuple: The chunk shape including the time axis
+        """
+        if self.chunks is not None:
+            # use the chunk shape supplied by the user
+            chunks = tuple(self.chunks)[:len(shape) + 1]
+            chunks += (None,) * (len(shape) + 1 - len(chunks))
+            sizes = (self._max_length or chunks[0] or 1,) + shape
+            return tuple(size if c is None else max(1, min(int(c), size))
+                         for c, size in zip(chunks, sizes))
+        
+        # determine chunks automatically by splitting the leading axes of the
+        # data until a single frame fits into a chunk
+        item_size = np.dtype(np.double).itemsize
+        space = list(shape)
+        for i in range(len(space)):
+            while (space[i] > 1 and
+                    item_size * np.prod(space) > self.chunk_bytes):
+                space[i] = (space[i] + 1) // 2
+        
+        # fill the remaining space with several time points
+        frames = self.chunk_bytes // (item_size * int(np.prod(space)))
+        frames = int(min(max(frames, 1), 1024))
+        if self._max_length:
+            frames = min(frames, self._max_length)
+        return (frames,) + tuple(space)
+    
+    
+    def _get_compression_kwargs(self) -> Dict[str, Any]:
+        """ determine the arguments that set the compression of datasets
+        
+        Returns:
+            dict: Arguments for :meth:`h5py.Group.create_dataset`
+        """
+        if self.compression is None:
+            kwargs: Dict[str, Any] = {}
+        
+        elif self.compression == 'gzip':
+            kwargs = {'compression': 'gzip',
+                      'compression_opts': self.compression_level}
+        
+        elif self.compression == 'lzf':
+            kwargs = {'compression': 'lzf'}
+            
+        else:
+            hdf5plugin = _import_hdf5plugin(self.compression)
+            
+            if self.compression == 'zstd':
+                level = 3 if self.compression_level is None \
+                          else self.compression_level
+                kwargs = dict(hdf5plugin.Zstd(clevel=level))
+            else:
+                # blosc with an optional name of the internal compressor
+                cname = self.compression.partition(':')[2] or 'lz4'
+                level = 5 if self.compression_level is None \
+                          else self.compression_level
+                blosc_shuffle = (hdf5plugin.Blosc.SHUFFLE if self.shuffle
+                                 else hdf5plugin.Blosc.NOSHUFFLE)
+                kwargs = dict(hdf5plugin.Blosc(cname=cname, clevel=level,
+                                               shuffle=blosc_shuffle))
+                return kwargs  # blosc shuffles the data internally
+            
+        if self.shuffle and kwargs:
+            kwargs['shuffle'] = True
+        return kwargs
+            
+    
+    def _create_hdf_dataset(self, name: str, shape: Tuple[int, ...] = tuple(),
+                            lossy: bool = False):
         """ create a hdf5 dataset with the given name and data_shape
         
         Args:
             name (str): Identifier of the hdf5 dataset
             shape (tuple): Data shape of the dataset
+            lossy (bool): Whether the lossy storage determined by
+                :attr:`precision` is applied to the dataset
         """
-        if self.compression:
-            kwargs = {'chunks': (1,) + shape,
-                      'compression': 'gzip'}
+        kwargs = self._get_compression_kwargs()
+        if kwargs or self.chunks is not None or not self._max_length:
+            # chunked storage is necessary for compressed or resizable datasets
+            kwargs['chunks'] = self._get_chunk_shape(shape)
+        if lossy and self.precision == 'float32':
+            dtype = np.single
         else:
-            kwargs = {}
+            dtype = np.double
         
         if self._max_length:
             shape = (self._max_length,) + shape
-            return self._file.create_dataset(name, shape=shape, dtype=np.double,
-                                             **kwargs)
+            dataset = self._file.create_dataset(name, shape=shape, dtype=dtype,
+                                                **kwargs)
+        else:
+            dataset = self._file.create_dataset(name, shape=(0,) + shape,
+                                                dtype=dtype,
+                                                maxshape=(None,) + shape,
+                                                **kwargs)
+            
+        # record the storage settings
+        dataset.attrs['compression'] = json.dumps(self.compression)
+        dataset.attrs['shuffle'] = json.dumps(self.shuffle)
+        if lossy:
+            dataset.attrs['precision'] = json.dumps(self.precision)
+        return dataset
+        
+        
+    def _load_compression_filters(self) -> None:
+        """ load the filters required for reading the opened datasets
+        
+        The compression method of a dataset is stored in its attributes. The
+        methods provided by :mod:`hdf5plugin` are only available after the
+        package has been imported.
+        
+        Raises:
+            ImportError: if the package providing the filters is missing. The
+            file is closed in this case.
+        """
+        for dataset in [self._times, self._data]:
+            compression = json.loads(dataset.attrs.get('compression', 'null'))
+            if compression is None or compression in {'gzip', 'lzf'}:
+                continue  # these filters are always available in h5py
+            try:
+                _import_hdf5plugin(compression)
+            except ImportError:
+                self._file.close()
+                self._file = None
+                raise
+        
+        
+    def _quantize(self, data: np.ndarray) -> np.ndarray:
+        """ round data to the absolute precision given by :attr:`precision`
+        
+        Args:
+            data (:class:`numpy.ndarray`): The data that will be stored
+            
+        Returns:
+            :class:`numpy.ndarray`: The data, possibly rounded
+        """
+        if isinstance(self.precision, float):
+            # round to a power of two, so the trailing bits are zero
+            step = 2.**np.floor(np.log2(self.precision))
+            return np.round(data / step) * step  # type: ignore
         else:
-            return self._file.create_dataset(name, shape=(0,) + shape,
-                                             dtype=np.double,
-                                             maxshape=(None,) + shape,
-                                             **kwargs)
+            return data
         
                 
     def _open(self, mode: str = 'reading', info: InfoDict = None) -> None:
@@ -147,6 +448,7 @@ class FileStorage(StorageBase):
             self._file = h5py.File(self.filename, mode="r")
             self._times = self._file['times']
             self._data = self._file['data']
+            self._load_compression_filters()
             for k, v in self._file.attrs.items():
                 self.info[k] = json.loads(v)
             if info:
@@ -173,6 +475,7 @@ class FileStorage(StorageBase):
                 # extract data from datasets in the existing file
                 self._times = self._file['times']
                 self._data = self._file['data']
+                self._load_compression_filters()
                 
                 # extract information
                 for k, v in self._file.attrs.items():
@@ -184,7 +487,8 @@ class FileStorage(StorageBase):
             else:
                 # create new datasets
                 self._times = self._create_hdf_dataset("times")
-                self._data = self._create_hdf_dataset("data", self.data_shape)
+                self._data = self._create_hdf_dataset("data", self.data_shape,
+                                                      lossy=True)
                 self._data_length = 0
                     
             if info:
@@ -202,7 +506,8 @@ class FileStorage(StorageBase):
             self._logger.info(f'Open file `{self.filename}` for writing')
             self._file = h5py.File(self.filename, "w")
             self._times = self._create_hdf_dataset("times")
-            self._data = self._create_hdf_dataset("data", self.data_shape)
+            self._data = self._create_hdf_dataset("data", self.data_shape,
+                                                  lossy=True)
             if info:
                 self.info.update(info)
             self._data_length = 0  # start writing from the beginning
@@ -216,6 +521,9 @@ class FileStorage(StorageBase):
 
     def __len__(self):
         """ return the number of stored items, i.e., time steps """
+        if self._writer is not None:
+            return self._data_length  # data is written asynchronously
+        
         # determine size of data in HDF5 file
         try:
             length = len(self.times)
@@ -232,6 +540,9 @@ class FileStorage(StorageBase):
     @property
     def times(self):
         """ :class:`numpy.ndarray`: The times at which data is available """
+        if self._writer is not None:
+            raise RuntimeError('Data can only be read after writing ended')
+        self._sync_datasets()
         self._open('reading')
         return self._times
         
@@ -239,6 +550,9 @@ class FileStorage(StorageBase):
     @property
     def data(self):
         """  :class:`numpy.ndarray`: The actual data for all time """        
+        if self._writer is not None:
+            raise RuntimeError('Data can only be read after writing ended')
+        self._sync_datasets()
         self._open('reading')
         return self._data
     
@@ -259,7 +573,8 @@ class FileStorage(StorageBase):
                  
             if 'data' in self._file:
                 del self._file['data']
-            self._data = self._create_hdf_dataset("data", self.data_shape)
+            self._data = self._create_hdf_dataset("data", self.data_shape,
+                                                  lossy=True)
             self._data_length = 0  # start writing from start
             
         elif self.filename.is_file():
@@ -314,13 +629,160 @@ class FileStorage(StorageBase):
                              'Possible values are `truncate_once`, '
                              '`truncate`, and `append`')
             
-        if not self.keep_opened:
+        if self.write_async:
+            # store the current length, so the writing process can continue
+            self.info['data_length'] = self._data_length
+        if not self.keep_opened or self.write_async:
             # store extra information as attributes
             hdf_write_attributes(self._file, self.info)
+        
+        if self.write_async:
+            # hand the file over to a separate process. We use a process
+            # instead of a thread since h5py holds the global interpreter lock
+            # while compressing and writing data
+            data_length = self._data_length
+            self.close()
+            self._times = self._data = None
+            
+            if 'fork' in mp.get_all_start_methods():
+                ctx = mp.get_context('fork')
+            else:
+                ctx = mp.get_context('spawn')
+            queue = ctx.Queue(maxsize=self.queue_size)
+            conn_main, conn_writer = ctx.Pipe()
+            process = ctx.Process(target=_run_writer,
+                                  args=(self, queue, conn_writer), daemon=True)
+            # spawned processes receive a pickled copy of the storage, which
+            # is only possible before the storage is in writing mode
+            process.start()
+            conn_writer.close()
+            self._writer = (process, queue, conn_main)
+            self._data_length = data_length
             
         self._is_writing = True
 
             
+    def _write_frame(self, data: np.ndarray, time: Optional[float]) -> None:
+        """ add a single frame to the batch, which is written when it is full
+        
+        Args:
+            data (:class:`numpy.ndarray`): The actual data
+            time (float, optional): The time point associated with the data
+        """
+        # determine the time of the new data
+        if time is None:
+            if self._batch:
+                time = self._batch[-1][1] + 1
+            elif self._data_length > 0:
+                time = self._times[self._data_length - 1] + 1
+            else:
+                time = 0
+        
+        self._batch.append((np.array(data, copy=True), time))
+        if len(self._batch) >= self.batch_size:
+            self._write_batch()
+            
+            
+    def _write_batch(self) -> None:
+        """ write all frames of the current batch in a single operation """
+        if not self._batch:
+            return  # nothing to write
+        batch, self._batch = self._batch, []
+        start = self._data_length
+        end = start + len(batch)
+        
+        # grow the datasets geometrically to avoid frequent resizing
+        if end > len(self._data):
+            max_length = self._data.maxshape[0]
+            if max_length is None:
+                length = max(end, 2 * len(self._data))
+            elif end > max_length:
+                raise ValueError(f'Cannot store more than {max_length} items')
+            else:
+                length = min(2 * len(self._data), max_length)
+            self._data.resize((length,) + self.data_shape)
+            self._times.resize((length,))
+        
+        self._data[start:end] = self._quantize(np.array([data for data, _ in
+                                                         batch]))
+        self._times[start:end] = [time for _, time in batch]
+
+        self._data_length = end
+        self.info['data_length'] = self._data_length
+        
+        
+    def _sync_datasets(self) -> None:
+        """ write pending data and trim the datasets to their actual length """
+        if (self._file is None or self._file_state != 'writing' or
+                self._data_length is None):
+            return  # there is nothing to write
+        self._write_batch()
+        if (self._data.maxshape[0] is None and
+                len(self._data) > self._data_length):
+            self._data.resize((self._data_length,) + self.data_shape)
+            self._times.resize((self._data_length,))
+        
+            
+    def _check_writer(self) -> None:
+        """ raise an error if the asynchronous writer reported a problem """
+        if self._writer is not None and self._writer[2].poll():
+            try:
+                status, msg = self._writer[2].recv()
+            except EOFError:
+                return  # the writer terminated without reporting an error
+            if status == 'error':
+                raise RuntimeError('Asynchronous writing failed:\n' + msg)
+            
+            
+    def _writer_died_error(self) -> RuntimeError:
+        """ return the error describing why the asynchronous writer stopped """
+        self._check_writer()  # raise the error reported by the writer
+        exitcode = self._writer[0].exitcode
+        return RuntimeError('Asynchronous writing failed: the writer process '
+                            f'terminated with exit code {exitcode}')
+            
+            
+    def _send_to_writer(self, item) -> None:
+        """ send an item to the asynchronous writer
+        
+        Args:
+            item: The frame or the command that is sent to the writer
+        
+        Raises:
+            RuntimeError: if the writer reported an error or is not running
+        """
+        process, queue, _ = self._writer
+        while True:
+            self._check_writer()
+            if not process.is_alive():
+                raise self._writer_died_error()
+            try:
+                queue.put(item, timeout=self.writer_timeout)
+            except Full:
+                continue  # check the writer again while the queue is full
+            else:
+                break
+            
+            
+    def _receive_from_writer(self) -> Tuple[str, Any]:
+        """ wait for a reply of the asynchronous writer
+        
+        Returns:
+            tuple: The status and the associated message
+        
+        Raises:
+            RuntimeError: if the writer is not running
+        """
+        process, _, conn = self._writer
+        while not conn.poll(self.writer_timeout):
+            if not process.is_alive() and not conn.poll():
+                raise self._writer_died_error()
+        try:
+            return conn.recv()  # type: ignore
+        except EOFError:
+            raise self._writer_died_error()
+            
+            
     def append(self, data: np.ndarray, time: Optional[float] = None) -> None:
         """ append a new data set
         
@@ -328,6 +790,13 @@ class FileStorage(StorageBase):
             data (:class:`numpy.ndarray`): The actual data
             time (float, optional): The time point associated with the data
         """
+        if self._writer is not None:
+            # send a copy of the data to the process writing the file
+            self._send_to_writer(('frame', np.array(data, copy=True), time))
+            self._data_length += 1
+            self.info['data_length'] = self._data_length
+            return
+        
         if self.keep_opened:
             if not self._is_writing or self._data_length is None:
                 raise RuntimeError('Writing not initialized. Call '
@@ -337,26 +806,26 @@ class FileStorage(StorageBase):
             # need to reopen the file
             self._open('appending')
         
-        # write the new data
-        if self._data_length >= len(self._data):
-            self._data.resize((self._data_length + 1,) + self.data_shape)
-        self._data[self._data_length] = data
-        
-        # write the new time 
-        if time is None:
-            if len(self._times) == 0:
-                time = 0 
-            else:
-                time = self._times[self._data_length - 1] + 1
-        if self._data_length >= len(self._times):
-            self._times.resize((self._data_length + 1,))
-        self._times[self._data_length] = time
-
-        self._data_length += 1      
-        self.info['data_length'] = self._data_length
+        self._write_frame(data, time)
         
         if not self.keep_opened:
             self.close()
+            
+            
+    def flush(self) -> None:
+        """ make sure all appended data has been written to the file
+        
+        When data is written asynchronously, this blocks until all frames that
+        have been appended so far have been written. 
+        """
+        if self._writer is not None:
+            self._send_to_writer(('flush',))
+            status, msg = self._receive_from_writer()
+            if status == 'error':
+                raise RuntimeError('Asynchronous writing failed:\n' + msg)
+        elif self._file is not None and self._file_state != 'reading':
+            self._write_batch()
+            self._file.flush()
 
         
     def end_writing(self) -> None:
@@ -369,7 +838,28 @@ class FileStorage(StorageBase):
             return  # writing mode was already ended
         self._logger.debug('End writing')
         
-        # store extra information as attributes
+        if self._writer is not None:
+            # let the writing process finish and store the attributes
+            process = self._writer[0]
+            try:
+                self._send_to_writer(None)
+                status, msg = self._receive_from_writer()
+            finally:
+                process.join(self.writer_timeout)
+                if process.is_alive():
+                    process.terminate()
+                self._writer = None
+                self._is_writing = False
+            if status == 'error':
+                raise RuntimeError('Asynchronous writing failed:\n' + msg)
+            self.info.update(msg)
+            self._data_length = None  # type: ignore
+            return
+        
+        # write pending data and store extra information as attributes
+        if self._file is None:
+            self._open('appending')
+        self._sync_datasets()
         hdf_write_attributes(self._file, self.info)
         self._file.flush()
         self.close()
@@ -0,0 +1,294 @@
+"""
+Defines a class storing data in a raw binary file that is memory-mapped.
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Optional, List, Any
+
+import numpy as np
+
+from .base import StorageBase, InfoDict
+from ..fields import FieldCollection
+from ..fields.base import FieldBase
+from ..tools.misc import ensure_directory_exists
+
+
+
+class MemmapStorage(StorageBase):
+    """ store discretized fields in a memory-mapped binary file
+
+    The field data is stored as a raw array of double precision numbers, which
+    is mapped into memory using :class:`numpy.memmap`. The times and all other
+    information are stored in a JSON sidecar file next to the data file. Fields
+    returned by the storage are views into the mapped memory, so reading data
+    does not load or copy the data. Consequently, large time series can be
+    analyzed without fitting into memory and several processes can share the
+    same data. By default, the data is mapped in copy-on-write mode, so
+    modifying the returned fields does not alter the stored data.
+    """
+
+    def __init__(self, filename: str,
+                 info: InfoDict = None,
+                 write_mode: str = 'truncate_once',
+                 max_length: Optional[int] = None,
+                 mmap_mode: str = 'c'):
+        """
+        Args:
+            filename (str):
+                The path to the file where the data is stored. The sidecar file
+                is stored at the same path with the additional suffix `.json`.
+            info (dict):
+                Supplies extra information that is stored in the storage
+            write_mode (str):
+                Determines how new data is added to already existing data.
+                Possible values are: 'append' (data is always appended),
+                'truncate' (data is cleared every time this storage is used
+                for writing), or 'truncate_once' (data is cleared for the first
+                writing, but appended subsequently). Alternatively, specifying
+                'readonly' will disable writing completely.
+            max_length (int, optional):
+                Number of entries for which space is preallocated in the file.
+                If more items are written, the file is enlarged geometrically.
+            mmap_mode (str):
+                The mode in which the data is mapped for reading. Possible
+                values are 'r' (read-only), 'c' (copy-on-write), and 'r+'
+                (modifications are written to the file).
+        """
+        super().__init__(info=info, write_mode=write_mode)
+        if mmap_mode not in {'r', 'c', 'r+'}:
+            raise ValueError(f'Unsupported mmap_mode `{mmap_mode}`')
+        self.filename = Path(filename)
+        self.mmap_mode = mmap_mode
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._max_length = max_length
+        self._times: List[float] = []
+        self._memmap: Any = None  # the currently mapped data
+        self._is_writing = False
+
+        if self._sidecar_path.is_file():
+            self._read_sidecar()
+
+
+    @property
+    def _sidecar_path(self) -> Path:
+        """ :class:`~pathlib.Path`: the path to the file with the meta data """
+        return self.filename.with_name(self.filename.name + '.json')
+
+
+    def _read_sidecar(self) -> None:
+        """ read the information from the sidecar file """
+        with self._sidecar_path.open() as fp:
+            content = json.load(fp)
+        self._times = content['times']
+        self._data_shape = tuple(content['data_shape'])
+        self.info.update(content['info'])
+
+
+    def _write_sidecar(self) -> None:
+        """ write the information to the sidecar file """
+        content = {'times': [float(t) for t in self._times],
+                   'data_shape': self.data_shape,
+                   'info': self.info}
+        with self._sidecar_path.open('w') as fp:
+            json.dump(content, fp)
+
+
+    @property
+    def _frame_size(self) -> int:
+        """ int: the number of bytes needed to store a single frame """
+        return int(np.prod(self.data_shape)) * np.dtype(np.double).itemsize
+
+
+    def _map(self, length: int, mode: str) -> None:
+        """ map the data file into memory
+
+        Args:
+            length (int): The number of frames that are mapped
+            mode (str): The mode with which the memory is mapped
+        """
+        self._memmap = None  # release an earlier map
+        if length == 0:
+            return  # empty files cannot be mapped
+        self._memmap = np.memmap(self.filename, dtype=np.double, mode=mode,
+                                 shape=(length,) + self.data_shape)
+
+
+    def _resize(self, length: int) -> None:
+        """ resize the data file and map the resized file for writing
+
+        Args:
+            length (int): The number of frames that the file can hold
+        """
+        if self._memmap is not None:
+            self._memmap.flush()
+        self._memmap = None
+        with self.filename.open('r+b') as fp:
+            fp.truncate(length * self._frame_size)
+        self._map(length, mode='r+')
+
+
+    def close(self) -> None:
+        """ release the memory map """
+        if self._memmap is not None and self._memmap.mode == 'r+':
+            self._memmap.flush()
+        self._memmap = None
+
+
+    def __len__(self):
+        """ return the number of stored items, i.e., time steps """
+        return len(self._times)
+
+
+    @property
+    def times(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: The times at which data is available """
+        return np.array(self._times)
+
+
+    @property
+    def data(self) -> np.ndarray:
+        """ :class:`numpy.memmap`: The actual data for all times """
+        if self._is_writing:
+            if self._memmap is None:
+                return np.empty((0,) + self.data_shape)
+            return self._memmap[:len(self)]
+
+        if len(self) == 0:
+            if self._data_shape is None:
+                return np.empty((0,))
+            return np.empty((0,) + self.data_shape)
+        if self._memmap is None or len(self._memmap) != len(self):
+            self._map(len(self), mode=self.mmap_mode)
+        return self._memmap
+
+
+    def _get_field(self, t_index: int) -> FieldBase:
+        """ return the field corresponding to the given time index
+
+        The returned field uses a view into the mapped memory, so the data is
+        not copied.
+
+        Args:
+            t_index (int):
+                The index of the data to load
+
+        Returns:
+            :class:`~pde.fields.FieldBase`:
+            The field class containing the grid and data
+        """
+        if not 0 <= t_index < len(self):
+            raise IndexError("Time index out of range")
+        if self._field is None:
+            self._init_field_type(t_index)
+
+        data = self.data[t_index]
+        if isinstance(self._field, FieldCollection):
+            fields = [f.__class__(f.grid, label=f.label) for f in self._field]
+            return FieldCollection(fields, data=data, label=self._field.label)
+        else:
+            field = self._field.__class__(self._field.grid,  # type: ignore
+                                          label=self._field.label)
+            field._data = data
+            return field
+
+
+    def clear(self, clear_data_shape: bool = False) -> None:
+        """ truncate the storage by removing all stored data.
+
+        Args:
+            clear_data_shape (bool): Flag determining whether the data shape is
+                also deleted.
+        """
+        self._memmap = None
+        self._times = []
+        if self._is_writing:
+            self._resize(self._max_length or 0)
+            self._write_sidecar()
+        else:
+            for path in [self.filename, self._sidecar_path]:
+                if path.is_file():
+                    path.unlink()
+        super().clear(clear_data_shape=clear_data_shape)
+
+
+    def start_writing(self, field: FieldBase, info: InfoDict = None) -> None:
+        """ initialize the storage for writing data
+
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be written to extract the grid
+                and the data_shape
+            info (dict):
+                Supplies extra information that is stored in the storage
+        """
+        if self._is_writing:
+            raise RuntimeError(f'{self.__class__.__name__} is already in '
+                               'writing mode')
+
+        # handle the different write modes
+        if self.write_mode == 'truncate_once':
+            self.clear(clear_data_shape=True)
+            self.write_mode = 'append'  # do not truncate in subsequent calls
+
+        elif self.write_mode == 'truncate':
+            self.clear(clear_data_shape=True)
+
+        elif self.write_mode == 'readonly':
+            raise RuntimeError('Cannot write in read-only mode')
+
+        elif self.write_mode != 'append':
+            raise ValueError(f'Unknown write mode `{self.write_mode}`. '
+                             'Possible values are `truncate_once`, '
+                             '`truncate`, and `append`')
+
+        super().start_writing(field, info=info)
+        if info is not None:
+            self.info.update(info)
+
+        # prepare the data file, preallocating space if requested
+        ensure_directory_exists(self.filename.parent)
+        self.filename.touch()
+        length = max(len(self), self._max_length or 0)
+        self._resize(length)
+        self._write_sidecar()
+        self._is_writing = True
+
+
+    def append(self, data: np.ndarray, time: Optional[float] = None) -> None:
+        """ append a new data set
+
+        Args:
+            data (:class:`numpy.ndarray`): The actual data
+            time (float, optional): The time point associated with the data
+        """
+        if not self._is_writing:
+            raise RuntimeError('Writing not initialized. Call '
+                               f'`{self.__class__.__name__}.start_writing`')
+
+        # enlarge the file geometrically if necessary
+        index = len(self)
+        if self._memmap is None or index >= len(self._memmap):
+            self._resize(max(2 * index, 1))
+
+        self._memmap[index] = data
+        if time is None:
+            time = 0 if index == 0 else self._times[-1] + 1
+        self._times.append(time)
+
+
+    def end_writing(self) -> None:
+        """ finalize the storage after writing """
+        if not self._is_writing:
+            return  # writing mode was already ended
+        self._logger.debug('End writing')
+
+        # trim the file to the actual data and store the meta data
+        self._resize(max(len(self), self._max_length or 0))
+        self.close()
+        self._write_sidecar()
+        self._is_writing = False
@@ -201,6 +201,240 @@ class MemoryStorage(StorageBase):
 
 
 
+def _rotate_in_place(arr: np.ndarray, shift: int,
+                     scratch: np.ndarray) -> None:
+    """ rotate an array along its first axis without allocating memory
+    
+    This is equivalent to `arr[:] = np.roll(arr, -shift, axis=0)`, but the
+    elements are moved in blocks that do not overlap, so numpy does not need to
+    create temporary copies.
+    
+    Args:
+        arr (:class:`numpy.ndarray`): The array that is rotated in place
+        shift (int): The index of the element that is moved to the front
+        scratch (:class:`numpy.ndarray`): Temporary storage, which must hold at
+            least half of the elements of `arr`
+    """
+    size = len(arr)
+    shift %= size
+    if shift == 0:
+        return
+    elif shift <= size - shift:
+        # store the leading elements and move the rest forward
+        scratch[:shift] = arr[:shift]
+        for i in range(0, size - shift, shift):
+            j = min(i + shift, size - shift)
+            arr[i:j] = arr[i + shift:j + shift]
+        arr[size - shift:] = scratch[:shift]
+    else:
+        # store the trailing elements and move the rest backward
+        tail = size - shift
+        scratch[:tail] = arr[shift:]
+        for j in range(shift, 0, -tail):
+            i = max(j - tail, 0)
+            arr[i + tail:j + tail] = arr[i:j]
+        arr[:tail] = scratch[:tail]
+    
+    
+    
+class RingBufferStorage(StorageBase):
+    """ store the most recent discretized fields in a preallocated buffer
+    
+    The data is kept in a single contiguous array with room for `capacity`
+    frames, so the memory consumption does not grow during long simulations.
+    Once the buffer is full, new frames replace the oldest ones. Alternatively,
+    older frames can be decimated, so the buffer covers the entire simulation
+    with a resolution that decreases with the age of the frames.
+    """
+    
+    
+    def __init__(self, capacity: int,
+                 info: InfoDict = None,
+                 write_mode: str = 'truncate_once',
+                 decimation: int = 1):
+        """
+        Args:
+            capacity (int):
+                The maximal number of frames that are stored
+            info (dict):
+                Supplies extra information that is stored in the storage
+            write_mode (str):
+                Determines how new data is added to already existing data.
+                Possible values are: 'append' (data is always appended),
+                'truncate' (data is cleared every time this storage is used
+                for writing), or 'truncate_once' (data is cleared for the first
+                writing, but appended subsequently). Alternatively, specifying
+                'readonly' will disable writing completely.
+            decimation (int):
+                Determines what happens when the buffer is full. For the default
+                value of 1, the oldest frame is replaced. For larger values,
+                only every `decimation`-th frame of the older half of the buffer
+                is kept, which frees space for new frames.
+        """
+        super().__init__(info=info, write_mode=write_mode)
+        if capacity < 2:
+            raise ValueError('Capacity must be at least 2')
+        if decimation < 1:
+            raise ValueError('Decimation must be a positive integer')
+        self.capacity = int(capacity)
+        self.decimation = int(decimation)
+        self._buffer: Optional[np.ndarray] = None
+        self._scratch: Optional[np.ndarray] = None
+        self._times = np.empty(self.capacity)
+        self._times_scratch: Optional[np.ndarray] = None
+        self._start = 0  # index of the oldest frame in the buffer
+        self._length = 0  # number of stored frames
+        
+        
+    def __len__(self):
+        """ return the number of stored items, i.e., time steps """
+        return self._length
+    
+    
+    def _make_contiguous(self) -> None:
+        """ move the oldest frame to the beginning of the buffer
+        
+        The buffer is rotated in place, so only the shorter of the two segments
+        needs to be stored temporarily in a scratch array that is allocated
+        once and then reused.
+        """
+        if self._start != 0:
+            if self._scratch is None:
+                half = self.capacity // 2
+                self._scratch = np.empty((half,) + self.data_shape)
+                self._times_scratch = np.empty(half)
+            _rotate_in_place(self._buffer, self._start,  # type: ignore
+                             self._scratch)
+            _rotate_in_place(self._times, self._start,
+                             self._times_scratch)  # type: ignore
+            self._start = 0
+    
+    
+    @property
+    def buffer(self) -> Optional[np.ndarray]:
+        """ :class:`numpy.ndarray`: the underlying buffer of all frames
+        
+        The frames are not necessarily ordered in time. Use :attr:`data` to
+        obtain the frames in temporal order.
+        """
+        return self._buffer
+    
+    
+    @property
+    def times(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: The times at which data is available """
+        self._make_contiguous()
+        return self._times[:self._length]
+
+
+    @property
+    def data(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: The stored data ordered in time
+        
+        This is a view into the buffer, which is reordered in place if the
+        buffer wrapped around.
+        """
+        if self._buffer is None:
+            return np.empty((0,))
+        self._make_contiguous()
+        return self._buffer[:self._length]
+        
+        
+    def clear(self, clear_data_shape: bool = False) -> None:
+        """ truncate the storage by removing all stored data.
+        
+        Args:
+            clear_data_shape (bool): Flag determining whether the data shape is
+                also deleted.
+        """
+        self._start = self._length = 0
+        if clear_data_shape:
+            self._buffer = self._scratch = None
+        super().clear(clear_data_shape=clear_data_shape)
+
+
+    def start_writing(self, field: FieldBase, info: InfoDict = None) -> None:
+        """ initialize the storage for writing data
+        
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be written to extract the grid
+                and the data_shape
+            info (dict):
+                Supplies extra information that is stored in the storage
+        """
+        # handle the different write modes
+        if self.write_mode == 'truncate_once':
+            self.clear(clear_data_shape=True)
+            self.write_mode = 'append'  # do not truncate in subsequent calls
+            
+        elif self.write_mode == 'truncate':
+            self.clear(clear_data_shape=True)
+
+        elif self.write_mode == 'readonly':
+            raise RuntimeError('Cannot write in read-only mode')
+        
+        elif self.write_mode != 'append':        
+            raise ValueError(f'Unknown write mode `{self.write_mode}`. '
+                             'Possible values are `truncate_once`, '
+                             '`truncate`, and `append`')
+            
+        super().start_writing(field, info=info)
+        if info is not None:
+            self.info.update(info)
+        
+        # allocate the buffer
+        if self._buffer is None:
+            self._buffer = np.empty((self.capacity,) + self.data_shape)
+                    
+            
+    def _decimate(self) -> None:
+        """ thin out the older half of the frames in a full buffer """
+        self._make_contiguous()
+        half = self.capacity // 2
+        kept = range(0, half, self.decimation)
+        num = len(kept)
+        self._buffer[:num] = self._buffer[:half:self.decimation]  # type: ignore
+        self._buffer[num:num + self.capacity - half] = \
+                                            self._buffer[half:]  # type: ignore
+        self._times[:num] = self._times[:half:self.decimation]
+        self._times[num:num + self.capacity - half] = self._times[half:]
+        self._length = num + self.capacity - half
+            
+            
+    def append(self, data: np.ndarray, time: Optional[float] = None) -> None:
+        """ append a new data set
+        
+        Args:
+            data (:class:`numpy.ndarray`): The actual data
+            time (float, optional): The time point associated with the data
+        """
+        assert data.shape == self.data_shape
+        if self._buffer is None:
+            raise RuntimeError('Writing not initialized. Call '
+                               f'`{self.__class__.__name__}.start_writing`')
+        if time is None:
+            if self._length == 0:
+                time = 0
+            else:
+                last = (self._start + self._length - 1) % self.capacity
+                time = self._times[last] + 1
+        
+        if self._length == self.capacity:
+            if self.decimation > 1:
+                self._decimate()
+            else:
+                # overwrite the oldest frame
+                self._start = (self._start + 1) % self.capacity
+                self._length -= 1
+        
+        index = (self._start + self._length) % self.capacity
+        self._buffer[index] = data
+        self._times[index] = time
+        self._length += 1
+
+
+
 @contextmanager
 def get_memory_storage(field: FieldBase, info: InfoDict = None):
     """ a context manager that can be used to create a MemoryStorage
@@ -2,6 +2,8 @@
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
+import json
+
 import pytest
 import numpy as np
 
@@ -173,4 +175,173 @@ def test_keep_opened(tmp_path):
     assert len(storage2) == 3
     np.testing.assert_allclose(storage2.times, np.arange(3))
     
-                        
\ No newline at end of file
+                            
+    
+
+@skipUnlessModule("h5py")
+@pytest.mark.parametrize('max_length', [None, 5])
+def test_write_async(max_length, tmp_path):
+    """ test writing data asynchronously """
+    grid = UnitGrid([8])
+    fields = [ScalarField.random_uniform(grid) for _ in range(4)]
+
+    storages = {}
+    for write_async in [True, False]:
+        path = tmp_path / f'test_write_async_{write_async}.hdf5'
+        storage = FileStorage(path, max_length=max_length,
+                              write_async=write_async, queue_size=2)
+        storage.start_writing(fields[0])
+        for i, field in enumerate(fields[:2]):
+            storage.append(field.data, i)
+        storage.flush()
+        for field in fields[2:]:
+            storage.append(field.data)
+        assert len(storage) == 4
+        storage.end_writing()
+        assert len(storage) == 4
+        storages[write_async] = storage
+
+    for storage in storages.values():
+        np.testing.assert_allclose(storage.times[:4], np.arange(4))
+        for field, data in zip(fields, storage.data[:4]):
+            np.testing.assert_allclose(field.data, data)
+        storage.close()
+        
+    # append data asynchronously to the existing file
+    storage = FileStorage(storages[True].filename, write_mode='append',
+                          write_async=True)
+    storage.start_writing(fields[0])
+    storage.append(fields[0].data, 4)
+    storage.end_writing()
+    np.testing.assert_allclose(storage.times[:5], np.arange(5))
+    np.testing.assert_allclose(storage.data[4], fields[0].data)
+    
+    
+
+@skipUnlessModule("h5py")
+def test_write_async_spawn(tmp_path, monkeypatch):
+    """ test writing asynchronously using a spawned process """
+    from .. import file
+    monkeypatch.setattr(file.mp, 'get_all_start_methods', lambda: ['spawn'])
+    
+    fields = [ScalarField.random_uniform(UnitGrid([8])) for _ in range(3)]
+    storage = FileStorage(tmp_path / 'test_write_async_spawn.hdf5',
+                          write_async=True)
+    storage.start_writing(fields[0])
+    for i, field in enumerate(fields):
+        storage.append(field.data, i)
+    storage.end_writing()
+    
+    assert len(storage) == 3
+    for field, data in zip(fields, storage.data):
+        np.testing.assert_allclose(field.data, data)
+    storage.close()
+    
+    
+
+@skipUnlessModule("h5py")
+def test_write_async_writer_died(tmp_path):
+    """ test that a terminated writer process raises an error """
+    field = ScalarField(UnitGrid([8]))
+    storage = FileStorage(tmp_path / 'test_writer_died.hdf5',
+                          write_async=True, queue_size=1)
+    storage.writer_timeout = 0.1
+    storage.start_writing(field)
+    storage.append(field.data, 0)
+    process = storage._writer[0]
+    process.terminate()
+    process.join()
+    
+    with pytest.raises(RuntimeError):
+        for i in range(3):
+            storage.append(field.data, i + 1)
+    with pytest.raises(RuntimeError):
+        storage.end_writing()
+    assert storage._writer is None
+    
+    
+    
+
+@skipUnlessModule("h5py")
+@pytest.mark.parametrize('chunks', [None, (4, 3), (100,)])
+def test_chunks_and_batches(chunks, tmp_path):
+    """ test storing data in chunks spanning several frames """
+    path = tmp_path / 'test_chunks_and_batches.hdf5'
+    grid = UnitGrid([8, 4])
+    field = ScalarField.random_uniform(grid)
+    
+    storage = FileStorage(path, chunks=chunks, batch_size=3)
+    storage.start_writing(field)
+    for i in range(5):
+        storage.append(field.data + i, i)
+    storage.flush()
+    assert len(storage) == 5
+    for i in range(5, 7):
+        storage.append(field.data + i)
+    storage.end_writing()
+    
+    assert storage.data.shape == (7, 8, 4)
+    np.testing.assert_allclose(storage.times, np.arange(7))
+    np.testing.assert_allclose(storage.data[:, 2, 1], field.data[2, 1] + 
+                               np.arange(7))
+    if chunks is None:
+        assert storage.data.chunks == (1024, 8, 4)
+    elif chunks == (4, 3):
+        assert storage.data.chunks == (4, 3, 4)
+    else:
+        assert storage.data.chunks == (100, 8, 4)
+    storage.close()
+    
+    
+
+@skipUnlessModule("h5py")
+@pytest.mark.parametrize('compression', [False, 'gzip', 'lzf'])
+@pytest.mark.parametrize('precision', [None, 'float32', 1e-3])
+def test_compression_precision(compression, precision, tmp_path):
+    """ test different compression codecs and lossy storage """
+    path = tmp_path / 'test_compression_precision.hdf5'
+    field = ScalarField.random_uniform(UnitGrid([16]))
+    
+    storage = FileStorage(path, compression=compression, shuffle=True,
+                          precision=precision)
+    storage.start_writing(field)
+    storage.append(field.data, 0.1)
+    storage.end_writing()
+    storage.close()
+    
+    storage = FileStorage(path)
+    np.testing.assert_allclose(storage.times, [0.1])
+    atol = {None: 0, 'float32': 1e-7, 1e-3: 5e-4}[precision]
+    np.testing.assert_allclose(storage.data[0], field.data, atol=atol)
+    assert storage.data.attrs['precision'] == json.dumps(precision)
+    if precision == 1e-3:
+        # data is rounded to multiples of a power of two
+        np.testing.assert_allclose(storage.data[0] * 1024,
+                                   np.round(storage.data[0] * 1024))
+    storage.close()
+
+    with pytest.raises(ValueError):
+        FileStorage(path, compression='unknown')
+    
+    
+    
+@skipUnlessModule("h5py")
+def test_compression_plugin_missing(tmp_path, monkeypatch):
+    """ test reading files whose compression requires a missing package """
+    import sys
+    import h5py
+    path = tmp_path / 'test_compression_plugin_missing.hdf5'
+    field = ScalarField.random_uniform(UnitGrid([16]))
+    
+    storage = FileStorage(path, compression='gzip')
+    storage.start_writing(field)
+    storage.append(field.data, 0.1)
+    storage.end_writing()
+    storage.close()
+    
+    # pretend that the data was compressed using a filter of `hdf5plugin`
+    with h5py.File(path, 'a') as fp:
+        fp['data'].attrs['compression'] = json.dumps('zstd')
+    monkeypatch.setitem(sys.modules, 'hdf5plugin', None)
+    with pytest.raises(ImportError, match='hdf5plugin'):
+        FileStorage(path)
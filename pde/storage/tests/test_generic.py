@@ -6,7 +6,7 @@ import functools
 
 import numpy as np
 
-from .. import MemoryStorage, FileStorage
+from .. import MemoryStorage, FileStorage, MemmapStorage
 from ...grids import UnitGrid
 from ...fields import ScalarField, VectorField, Tensor2Field, FieldCollection
 from ...pdes import DiffusionPDE
@@ -22,7 +22,9 @@ def test_storage_write(tmp_path):
 
     file = tmp_path / "test_storage_write.hdf5"
     
-    storage_classes = {'MemoryStorage': MemoryStorage}
+    storage_classes = {'MemoryStorage': MemoryStorage,
+                       'MemmapStorage': functools.partial(
+                                MemmapStorage, tmp_path / "test_storage.dat")}
     if module_available("h5py"):
         storage_classes['FileStorage'] = functools.partial(FileStorage, file)
     
@@ -142,3 +144,37 @@ def test_storing_collection(tmp_path):
         assert storage.extract_field(1)[0] == f2
         assert storage.extract_field(2)[0] == f3
 
+    
+    
+    
+def test_storage_view(tmp_path):
+    """ test lazy views on the stored data """
+    grid = UnitGrid([5, 4])
+    fc = FieldCollection([ScalarField.random_uniform(grid),
+                          VectorField.random_uniform(grid)])
+    
+    storages = [MemoryStorage(), MemmapStorage(tmp_path / "test_view.dat")]
+    if module_available("h5py"):
+        storages.append(FileStorage(tmp_path / "test_view.hdf5"))
+    
+    for storage in storages:
+        storage.start_writing(fc)
+        for i in range(6):
+            storage.append(fc.data + i, i)
+        storage.end_writing()
+        data = np.array([np.asarray(d) for d in storage.data])
+        
+        view = storage.view
+        np.testing.assert_allclose(view.data, data)
+        np.testing.assert_allclose(view[2:].times, np.arange(2, 6))
+        np.testing.assert_allclose(view[::-2, 1].data, data[::-2, 1:3])
+        np.testing.assert_allclose(view[3, 0, 2].data, data[3, 0, 2])
+        np.testing.assert_allclose(view[3, 1, 0, :, 1].data, data[3, 1, :, 1])
+        
+        # compose views
+        v = view[1:5, 1, :, 2]
+        assert v.shape == (4, 2, 4)
+        np.testing.assert_allclose(v[::-1, 1, 1:].data,
+                                   data[1:5, 2, 2, 1:][::-1])
+        np.testing.assert_allclose(view[:, 1][:, ::-1, 2].data,
+                                   data[:, 2:0:-1, 2])
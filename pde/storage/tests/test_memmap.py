@@ -0,0 +1,68 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import numpy as np
+
+from .. import MemmapStorage
+from ...grids import UnitGrid
+from ...fields import ScalarField, VectorField, FieldCollection
+from ...pdes import DiffusionPDE
+
+
+
+def test_memmap_storage(tmp_path):
+    """ test writing and reading memory-mapped data """
+    path = tmp_path / 'test_memmap_storage.dat'
+    grid = UnitGrid([8, 8])
+    state = ScalarField.random_uniform(grid, 0.2, 0.3)
+    storage = MemmapStorage(path, max_length=2, info={'a': 1})
+    DiffusionPDE().solve(state, t_range=0.11, dt=0.001,
+                         tracker=storage.tracker(interval=0.05))
+    assert len(storage) == 3
+    assert path.stat().st_size == 3 * state.data.nbytes
+
+    # read the data in a new storage
+    storage2 = MemmapStorage(path)
+    np.testing.assert_allclose(storage2.times, [0, 0.05, 0.1])
+    assert storage2.info['a'] == 1
+    assert storage2.grid == grid
+    np.testing.assert_allclose(storage2.data, storage.data)
+    
+    # fields are views into the mapped memory
+    field = storage2[2]
+    assert isinstance(field, ScalarField)
+    expected = storage.data[2].copy()
+    np.testing.assert_allclose(field.data, expected)
+    assert np.shares_memory(field.data, storage2.data)
+    
+    # modifications do not change the file in copy-on-write mode
+    field.data[...] = 0
+    np.testing.assert_allclose(MemmapStorage(path)[2].data, expected)
+    
+    # append more data
+    storage2.write_mode = 'append'
+    storage2.start_writing(state)
+    storage2.append(state.data)
+    storage2.end_writing()
+    np.testing.assert_allclose(MemmapStorage(path).times, [0, 0.05, 0.1, 1.1])
+    
+    
+    
+def test_memmap_collection(tmp_path):
+    """ test storing field collections in memory-mapped files """
+    path = tmp_path / 'test_memmap_collection.dat'
+    grid = UnitGrid([4, 3])
+    fc = FieldCollection([ScalarField.random_uniform(grid, label='a'),
+                          VectorField.random_uniform(grid, label='b')])
+    
+    storage = MemmapStorage(path)
+    storage.start_writing(fc)
+    storage.append(fc.data, 0)
+    storage.end_writing()
+
+    field = MemmapStorage(path)[0]
+    assert isinstance(field, FieldCollection)
+    assert field[1].label == 'b'
+    np.testing.assert_allclose(field.data, fc.data)
+    np.testing.assert_allclose(field[1].data, fc[1].data)
@@ -5,7 +5,7 @@
 import pytest
 import numpy as np
 
-from .. import MemoryStorage
+from .. import MemoryStorage, RingBufferStorage
 from ...grids import UnitGrid
 from ...fields import ScalarField, VectorField, Tensor2Field, FieldCollection
 
@@ -67,4 +67,42 @@ def test_field_type_guessing():
     with pytest.raises(RuntimeError):
         s[0]
 
-    
\ No newline at end of file
+    
+        
+        
+@pytest.mark.parametrize('decimation', [1, 2])
+def test_ring_buffer_storage(decimation):
+    """ test storing the most recent fields in a ring buffer """
+    field = ScalarField(UnitGrid([3]))
+    s = RingBufferStorage(4, decimation=decimation)
+    s.start_writing(field)
+    for i in range(7):
+        s.append(np.full(3, i), i)
+    
+    if decimation == 1:
+        np.testing.assert_allclose(s.times, [3, 4, 5, 6])
+    else:
+        np.testing.assert_allclose(s.times, [0, 4, 5, 6])
+    np.testing.assert_allclose(s.data[:, 0], s.times)
+    assert s.data.base is s.buffer
+    assert s[-1 + len(s)] == ScalarField(field.grid, 6)
+    
+    # continue appending after reading the data
+    s.append(np.full(3, 7))
+    assert s.times[-1] == 7
+    np.testing.assert_allclose(s.data[:, 0], s.times)
+    
+    
+    
+@pytest.mark.parametrize('capacity', [2, 5, 6])
+def test_ring_buffer_rotation(capacity):
+    """ test reordering the ring buffer for all possible offsets """
+    field = ScalarField(UnitGrid([2]))
+    for num in range(capacity, 2 * capacity):
+        s = RingBufferStorage(capacity)
+        s.start_writing(field)
+        for i in range(num):
+            s.append(np.full(2, i), i)
+        expect = np.arange(num - capacity, num)
+        np.testing.assert_allclose(s.times, expect)
+        np.testing.assert_allclose(s.data[:, 1], expect)
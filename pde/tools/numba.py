@@ -4,10 +4,13 @@ Helper functions for just-in-time compilation with numba
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
+import hashlib
 import logging
 import os
+import time
 import warnings
 from functools import wraps
+from types import CodeType, FunctionType
 from typing import Callable, Dict, Any, Optional, Tuple, TypeVar
 
 import numpy as np
@@ -22,12 +25,26 @@ except ImportError:
     # assume older numba module structure
     from numba.dispatcher import Dispatcher
 
+try:
+    from numba.core.caching import FunctionCache
+    from numba.core.serialize import dumps
+except ImportError:
+    # assume older numba module structure
+    from numba.caching import FunctionCache
+    from numba.serialize import dumps
+
+try:
+    from numba.core import event as numba_event
+except ImportError:
+    numba_event = None  # numba versions before 0.55 do not report events
+
 
 
 # global settings for numba
 NUMBA_PARALLEL = True   # enable parallel numba
 NUMBA_FASTMATH = True   # enable fastmath switch (ignores NaNs!)
 NUMBA_DEBUG = False     # enable additional debug information
+NUMBA_CACHE = False     # cache compiled functions on disk (see `jit`)
     
     
 # numba version as a list of integers
@@ -82,6 +99,7 @@ def numba_environment() -> Dict[str, Any]:
             'parallel': NUMBA_PARALLEL,
             'fastmath': NUMBA_FASTMATH,
             'debug': NUMBA_DEBUG,
+            'cache': NUMBA_CACHE,
             'using_svml': nb.config.USING_SVML,
             'threading_layer': threading_layer,
             'omp_num_threads': os.environ.get('OMP_NUM_THREADS'),
@@ -106,6 +124,7 @@ def _numba_get_signature(parallel: bool = False, **kwargs) -> Dict[str, Any]:
     kwargs.setdefault('nopython', True)
     kwargs.setdefault('fastmath', NUMBA_FASTMATH)
     kwargs.setdefault('debug', NUMBA_DEBUG)
+    kwargs.setdefault('cache', NUMBA_CACHE)
     
     # make sure parallel numba is only enabled in restricted cases 
     kwargs['parallel'] = parallel and NUMBA_PARALLEL
@@ -132,13 +151,115 @@ else:
             return lambda arr, i: arr.flat[i]
 
     
+
+
+def _get_closure_key(function: Callable) -> Tuple:
+    """ return a description of a function that is stable across processes
+    
+    Compiled functions in the closure are described by their code and their own
+    closure, since numba serializes them including a random identifier.
+    
+    Args:
+        function: The function that is described
+        
+    Returns:
+        tuple: The name, the code, and the values of the closure variables
+    """
+    def describe_code(code: CodeType) -> Tuple:
+        """ helper function describing the code of a function """
+        consts = tuple(describe_code(c) if isinstance(c, CodeType) else c
+                       for c in code.co_consts)
+        return (code.co_code, consts, code.co_names)
+    
+    def describe(value):
+        """ helper function describing a single closure variable """
+        if isinstance(value, Dispatcher):
+            return ('dispatcher', _get_closure_key(value.py_func),
+                    value.targetoptions)
+        elif isinstance(value, FunctionType):
+            return ('function', _get_closure_key(value))
+        elif isinstance(value, (tuple, list)):
+            return tuple(describe(v) for v in value)
+        else:
+            return value
+    
+    closure = function.__closure__ or ()  # type: ignore
+    return (function.__qualname__,  # type: ignore
+            describe_code(function.__code__),  # type: ignore
+            tuple(describe(cell.cell_contents) for cell in closure))
+    
+    
+    
+class _ClosureFunctionCache(FunctionCache):
+    """ disk cache of numba identifying closures by the values of their
+    variables, including the compiled functions they call """
+    
+    def _index_key(self, sig, codegen):
+        # omitted arguments are identified by the memory address of their
+        # default value, which changes between processes
+        sig = tuple(('omitted', repr(arg.value))
+                    if isinstance(arg, nb.types.Omitted) else arg
+                    for arg in sig)
+        closure_bytes = dumps(_get_closure_key(self._py_func))
+        return (sig, codegen.magic_tuple(),
+                (hashlib.sha256(self._py_func.__code__.co_code).hexdigest(),
+                 hashlib.sha256(closure_bytes).hexdigest()))
+    
+    
+    
+def _apply_jit(decorator: Callable, function: Callable,
+               jit_kwargs: Dict[str, Any], signature=None) -> Callable:
+    """ compile a function, using the disk cache if requested and supported
+    
+    Args:
+        decorator: The numba decorator, e.g., :func:`nb.jit`
+        function: The function to be compiled
+        jit_kwargs (dict): Keyword arguments for the decorator
+        signature: Signature(s) for which the function is compiled directly
+        
+    Returns:
+        The compiled function
+    """
+    jit_kwargs = jit_kwargs.copy()
+    if not jit_kwargs.pop('cache', False) or nb.config.DISABLE_JIT:
+        if signature is None:
+            return decorator(**jit_kwargs)(function)  # type: ignore
+        else:
+            return decorator(signature, **jit_kwargs)(function)  # type: ignore
+        
+    # the cache needs to be set before the function is compiled
+    dispatcher = decorator(**jit_kwargs)(function)
+    try:
+        dumps(_get_closure_key(function))
+        dispatcher._cache = _ClosureFunctionCache(function)
+    except Exception:
+        # the closure cannot be serialized or numba cannot locate a cache
+        # directory for the source file
+        logging.getLogger(__name__).debug('Cannot cache `%s`',
+                                          function.__name__)
+        
+    if signature is not None:
+        # compile the function eagerly, like numba does
+        signatures = signature if isinstance(signature, list) else [signature]
+        for sig in signatures:
+            dispatcher.compile(sig)
+        dispatcher.disable_compile()
+    return dispatcher  # type: ignore
+    
+    
     
 @decorator_arguments
 def jit(function: TFunc,
         signature=None,
         parallel: bool = False, **kwargs) -> TFunc:
     """ apply nb.jit with predefined arguments
-    
+
+    If the module variable `NUMBA_CACHE` is set, the compiled functions are
+    cached on disk, so later processes do not need to compile them again. This
+    also works for closures, which are identified by the values of the closure
+    variables, like the grid and the boundary conditions captured by operators.
+    Functions whose closure cannot be serialized are compiled without cache.
+
     Args:
         signature: Signature of the function to compile
         parallel (bool): Allow parallel compilation of the function
@@ -155,7 +276,8 @@ def jit(function: TFunc,
     name = function.__name__  # type: ignore
     logging.getLogger(__name__).info('Compile `%s` with parallel=%s',
                                      name, jit_kwargs['parallel'])
-    return nb.jit(signature, **jit_kwargs)(function)  # type: ignore
+    return _apply_jit(nb.jit, function, jit_kwargs,  # type: ignore
+                      signature=signature)
 
 
         
@@ -230,7 +352,6 @@ def jit_allocate_out(func: Callable,
                                          func.__name__, jit_kwargs['parallel'])
     
         if num_args == 1:
-            @nb.generated_jit(**jit_kwargs)
             @wraps(func)
             def wrapper(arr, out=None):
                 """ wrapper deciding whether the underlying function is called
@@ -271,7 +392,6 @@ def jit_allocate_out(func: Callable,
                     return func    
             
         elif num_args == 2:
-            @nb.generated_jit(**jit_kwargs)
             @wraps(func)
             def wrapper(a, b, out=None):
                 """ wrapper deciding whether the underlying function is called
@@ -308,7 +428,150 @@ def jit_allocate_out(func: Callable,
         else:
             raise NotImplementedError('Only 1 or 2 arguments are supported')
                  
-        return wrapper  # type: ignore
+        return _apply_jit(nb.generated_jit, wrapper, jit_kwargs)
+
+
+
+class CompilationCounter():
+    """ counts the functions that numba compiles while the counter is active
+
+    Functions loaded from the disk cache are not counted. The counter can be
+    activated multiple times, e.g., using it as a context manager, and
+    accumulates the compilations of all periods.
+
+    Attributes:
+        count (int): The number of compiled functions
+        time (float): The total time in seconds spent compiling functions
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.
+        self._depth = 0
+        self._t_start = 0.
+        if numba_event is None:
+            self._listener = None
+        else:
+            counter = self
+
+            class Listener(numba_event.Listener):
+                """ helper class receiving the compilation events """
+                def on_start(self, event):
+                    if counter._depth == 0:
+                        counter._t_start = time.perf_counter()
+                    counter._depth += 1
+
+                def on_end(self, event):
+                    counter._depth -= 1
+                    counter.count += 1
+                    if counter._depth == 0:
+                        # only count the time of the outermost compilation
+                        counter.time += time.perf_counter() - counter._t_start
+
+            self._listener = Listener()
+
+
+    def start(self) -> None:
+        """ start counting compilations """
+        if self._listener is not None:
+            numba_event.register('numba:compile', self._listener)
+
+
+    def stop(self) -> None:
+        """ stop counting compilations """
+        if self._listener is not None:
+            numba_event.unregister('numba:compile', self._listener)
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+    @property
+    def results(self) -> Dict[str, Any]:
+        """ dict: the number of compilations and the time spent on them """
+        return {'count': self.count, 'time': self.time}
+
+
+
+
+@jit
+def _random_seed_compiled(seed: int) -> None:
+    """ sets the seed of the random number generator used by numba """
+    np.random.seed(seed)
+    
+    
+    
+def random_seed(seed: int = 0) -> None:
+    """ sets the seed of the random number generator of numpy and numba
+    
+    Args:
+        seed (int): Sets random seed
+    """
+    np.random.seed(seed)
+    if not nb.config.DISABLE_JIT:
+        _random_seed_compiled(seed)
+    
+    
+    
+def _get_numba_helperlib():
+    """ return the private numba module giving access to the random state
+    
+    Returns:
+        The module or `None` if it is not available in this version of numba
+    """
+    if nb.config.DISABLE_JIT:
+        return None
+    try:
+        from numba import _helperlib
+    except ImportError:
+        _helperlib = None
+    methods = ['rnd_get_np_state_ptr', 'rnd_get_state', 'rnd_set_state']
+    if all(hasattr(_helperlib, method) for method in methods):
+        return _helperlib
+    else:
+        logging.getLogger(__name__).warning(
+            'The state of the random number generator of numba cannot be '
+            'accessed, so compiled code will not be reproducible')
+        return None
+    
+    
+    
+def get_random_state() -> Dict[str, Any]:
+    """ return the state of the random number generators of numpy and numba
+    
+    The state of numba is only included if it can be accessed in the installed
+    version of numba.
+    
+    Returns:
+        dict: The state, which can be restored using :func:`set_random_state`
+    """
+    state: Dict[str, Any] = {'numpy': np.random.get_state()}
+    helperlib = _get_numba_helperlib()
+    if helperlib is not None:
+        ptr = helperlib.rnd_get_np_state_ptr()
+        state['numba'] = helperlib.rnd_get_state(ptr)
+    return state
+    
+    
+    
+def set_random_state(state: Dict[str, Any]) -> None:
+    """ restore the state of the random number generators of numpy and numba
+    
+    Args:
+        state (dict): The state returned by :func:`get_random_state`
+    """
+    np.random.set_state(state['numpy'])
+    if 'numba' in state:
+        helperlib = _get_numba_helperlib()
+        if helperlib is not None:
+            ptr = helperlib.rnd_get_np_state_ptr()
+            helperlib.rnd_set_state(ptr, state['numba'])
     
 
 
@@ -6,12 +6,15 @@ Functions making use of spectral decompositions
    :nosignatures:
 
    make_colored_noise
+   get_wave_vectors
+   enable_fft_cache
 
 
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
 
+import functools
 from typing import Callable, Tuple
 
 import numpy as np
@@ -19,9 +22,11 @@ import numpy as np
 try:
     from pyfftw.interfaces.numpy_fft import rfftn as np_rfftn
     from pyfftw.interfaces.numpy_fft import irfftn as np_irfftn
+    from pyfftw.interfaces import cache as _pyfftw_cache
 except ImportError:
     from numpy.fft import rfftn as np_rfftn
     from numpy.fft import irfftn as np_irfftn
+    _pyfftw_cache = None
 
 
 
@@ -99,3 +104,71 @@ def make_colored_noise(shape: Tuple[int, ...],
         
     return noise_colored
 
+
+
+
+@functools.lru_cache()
+def get_wave_vectors(shape: Tuple[int, ...],
+                     dx: Tuple[float, ...],
+                     zero_nyquist: bool = False) -> Tuple[np.ndarray, ...]:
+    r""" return the wave vectors associated with the real Fourier transform
+    
+    The wave vectors are given in the layout of the output of
+    :func:`numpy.fft.rfftn`, i.e., only non-negative wave numbers are included
+    along the last axis. The result is cached, so repeated calls for the same
+    grid do not recalculate the arrays.
+    
+    Args:
+        shape (tuple of ints):
+            Number of supports points in each spatial dimension
+        dx (tuple of floats):
+            Discretization along each dimension
+        zero_nyquist (bool):
+            Whether the wave number of the Nyquist mode of axes with an even
+            number of support points is set to zero. This is necessary for odd
+            derivatives of real functions, since the sign of this mode is
+            ambiguous.
+        
+    Returns:
+        tuple: The wave vector components :math:`k_i` (including the factor
+        :math:`2\pi`) along each axis. The arrays can be broadcasted to the
+        shape of the transformed data.
+    """
+    dim = len(shape)
+    result = []
+    for i in range(dim):
+        if i == dim - 1:
+            k = 2 * np.pi * np.fft.rfftfreq(shape[i], dx[i])
+        else:
+            k = 2 * np.pi * np.fft.fftfreq(shape[i], dx[i])
+        if zero_nyquist and shape[i] % 2 == 0:
+            k[shape[i] // 2] = 0
+        
+        # reshape array so it can be broadcasted along the correct axis
+        k = k.reshape((-1,) + (1,) * (dim - i - 1))
+        k.flags.writeable = False  # protect the cached data
+        result.append(k)
+    return tuple(result)
+
+
+
+def enable_fft_cache(keepalive_time: float = 60) -> bool:
+    """ keep the plans of fast Fourier transforms in memory
+    
+    This only affects the optional package :mod:`pyfftw`, which otherwise
+    determines a new plan for every transform. The cache is global and also
+    affects other code using the interfaces of :mod:`pyfftw`, so it needs to be
+    enabled explicitly.
+    
+    Args:
+        keepalive_time (float):
+            The time in seconds after which unused plans are removed
+        
+    Returns:
+        bool: Whether the cache has been enabled, which requires :mod:`pyfftw`
+    """
+    if _pyfftw_cache is None:
+        return False
+    _pyfftw_cache.enable()
+    _pyfftw_cache.set_keepalive_time(keepalive_time)
+    return True
@@ -2,9 +2,16 @@
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
+import pickle
+import threading
+
+import numba as nb
 import numpy as np
+import pytest
 
-from ..numba import numba_environment, flat_idx, jit_allocate_out
+from .. import numba as numba_module
+from ..numba import (numba_environment, flat_idx, jit, jit_allocate_out,
+                     CompilationCounter, _get_closure_key)
 
 
 
@@ -47,4 +54,52 @@ def test_jit_allocate_out_2arg():
     g = jit_allocate_out(out_shape=a.shape, num_args=2)(f)
     np.testing.assert_equal(g(a, b), c)
     np.testing.assert_equal(jit_allocate_out(num_args=2)(f)(a, b), c)
-    
\ No newline at end of file
+    
+    
+    
+
+def test_jit_cache(tmp_path, monkeypatch):
+    """ test caching compiled closures on disk """
+    monkeypatch.setattr(numba_module, 'NUMBA_CACHE', True)
+    monkeypatch.setattr(nb.config, 'CACHE_DIR', str(tmp_path))
+    
+    def make_function(value):
+        """ helper creating a closure calling another compiled closure """
+        @jit
+        def g(x):
+            return x + value
+        
+        @jit('f8(f8)')
+        def f(x):
+            return 2 * g(x)
+        
+        return f
+    
+    with CompilationCounter() as counter:
+        f1 = make_function(1)
+        assert f1(1) == 4
+        assert sum(f1.stats.cache_misses.values()) == 1
+        assert counter.count == 2
+        
+        # the cached version is used for the same closure variables
+        f2 = make_function(1)
+        assert f2(1) == 4
+        assert sum(f2.stats.cache_hits.values()) == 1
+        assert counter.count == 2
+        
+        # different closure variables require compilation
+        f3 = make_function(2)
+        assert f3(1) == 6
+        assert sum(f3.stats.cache_misses.values()) == 1
+        assert counter.count == 4
+    assert counter.results['time'] > 0
+    
+    # functions whose closure cannot be serialized are not cached
+    lock = threading.Lock()
+    
+    def h(x):
+        return x if lock else x
+    
+    with pytest.raises(Exception):
+        pickle.dumps(_get_closure_key(h))
+    assert jit(h).stats.cache_path is None
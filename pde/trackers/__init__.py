@@ -12,9 +12,22 @@ analyze, store, or output it.  The trackers defined in this module are:
    ~trackers.PrintTracker
    ~trackers.PlotTracker
    ~trackers.DataTracker
+   ~trackers.ColumnDataTracker
    ~trackers.SteadyStateTracker
    ~trackers.RuntimeTracker
    ~trackers.ConsistencyTracker
+   ~shared_memory.SharedMemoryTracker
+
+Some trackers are compiled, so solvers can evaluate them in their inner loop
+without returning to python:
+
+.. autosummary::
+   :nosignatures:
+
+   ~compiled.CompiledConsistencyTracker
+   ~compiled.CompiledMaterialConservationTracker
+   ~compiled.CompiledSteadyStateTracker
+   ~compiled.CompiledReductionTracker
    
 Multiple trackers can be collected in a :class:`~base.TrackerCollection`,
 which provides methods for handling them efficiently.
@@ -36,3 +49,7 @@ of the following classes:
 from .intervals import (ConstantIntervals, LogarithmicIntervals,
                         RealtimeIntervals)
 from .trackers import *
+from .shared_memory import SharedMemoryTracker, SharedMemoryReader
+from .compiled import (CompiledConsistencyTracker,
+                       CompiledMaterialConservationTracker,
+                       CompiledSteadyStateTracker, CompiledReductionTracker)
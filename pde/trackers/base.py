@@ -150,6 +150,9 @@ class TrackerCollection():
         self.tracker_action_times = []
         self.time_next_action = np.inf
         
+        # a profiler that can be set to measure the time spent in trackers
+        self.profiler: Optional[Any] = None
+        
         
     @classmethod
     def from_data(cls, data: TrackerCollectionDataType, **kwargs) \
@@ -227,7 +230,12 @@ class TrackerCollection():
         for i, t_next in enumerate(self.tracker_action_times):
             if t > t_next or np.isclose(t, t_next, atol=atol, rtol=0):
                 try:
-                    self.trackers[i].handle(state, t)
+                    if self.profiler is None:
+                        self.trackers[i].handle(state, t)
+                    else:
+                        name = self.trackers[i].__class__.__name__
+                        with self.profiler.measure(f'trackers;{name}'):
+                            self.trackers[i].handle(state, t)
                 except StopIteration as err:
                     # stop iteration after all trackers have been handled
                     stop_iteration_err = err
@@ -0,0 +1,586 @@
+"""
+Trackers that are compiled and evaluated inside the loop of the solver
+
+Ordinary trackers are called from python, so the compiled stepper needs to
+return every time a tracker is handled. The trackers defined here are compiled
+with numba instead, so solvers supporting them (like the fixed-step
+:class:`~pde.solvers.explicit.ExplicitSolver`) can evaluate them inside their
+inner loop every few steps. The simulation then only returns to python when a
+tracker stops the simulation or when the buffer of recorded values is full.
+With other solvers, or with intervals that are not given as constant
+durations, the trackers are called from python like ordinary trackers.
+
+.. autosummary::
+   :nosignatures:
+
+   CompiledConsistencyTracker
+   CompiledMaterialConservationTracker
+   CompiledSteadyStateTracker
+   CompiledReductionTracker
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+from abc import abstractmethod
+from typing import Callable, List, Sequence, Union, Dict, Any  # @UnusedImport
+
+import numpy as np
+
+from .base import TrackerBase, InfoDict, FinishedSimulation
+from .intervals import IntervalData, ConstantIntervals
+from ..fields.base import FieldBase
+from ..tools.docstrings import fill_in_docstring
+from ..tools.numba import jit
+
+
+# status codes returned by the compiled check functions
+STATUS_CONTINUE = 0
+STATUS_FINISHED = 1  # the simulation finished successfully
+STATUS_ABORT = 2  # the simulation needs to be aborted
+STATUS_FLUSH = -1  # the buffer of recorded values needs to be emptied
+
+
+
+class CompiledTrackerBase(TrackerBase):
+    """ base class for trackers that can be evaluated in compiled code
+
+    Subclasses implement :meth:`_make_check`, which returns a function with
+    the signature `(state_data, t, work, out)` that can be compiled by numba.
+    Here, `work` is the array returned by :meth:`_get_work`, which can be used
+    to keep information between calls, and `out` is an array of length
+    `num_values` into which values that should be recorded are written. The
+    function returns one of the status codes defined in this module.
+    """
+
+    num_values: int = 0
+    """ int: number of values that the tracker records in each call """
+
+    in_loop: bool = False
+    """ bool: flag set by the controller when the solver evaluates the tracker
+    in its inner loop """
+
+
+    @abstractmethod
+    def _make_check(self, field: FieldBase) -> Callable:
+        """ create the function evaluating the tracker
+
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+
+        Returns:
+            Function with signature `(state_data, t, work, out)` returning an
+            integer status code
+        """
+
+
+    def _get_work(self, field: FieldBase) -> np.ndarray:
+        """ create the work array that is passed to the check function
+
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+
+        Returns:
+            :class:`numpy.ndarray`: A one-dimensional array using the data
+            type of the field
+        """
+        return np.empty(0, dtype=field.data.dtype)
+
+
+    def _get_stop_message(self, status: int) -> str:
+        """ str: the message associated with stopping the simulation """
+        return f'{self.__class__.__name__} stopped the simulation'
+
+
+    def _record(self, times: np.ndarray, values: np.ndarray) -> None:
+        """ store values recorded by the check function
+
+        Args:
+            times (:class:`numpy.ndarray`): The times of the recorded values
+            values (:class:`numpy.ndarray`): The recorded values
+        """
+        pass
+
+
+    def initialize(self, field: FieldBase, info: InfoDict = None) -> float:
+        """
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+            info (dict):
+                Extra information from the simulation
+
+        Returns:
+            float: The first time the tracker needs to handle data
+        """
+        # fast math is disabled since checks need to detect non-finite values
+        self.check = jit(fastmath=False)(self._make_check(field))
+        self.work = self._get_work(field)
+        t_first = super().initialize(field, info)
+        # trackers evaluated by the solver never need to be handled in python
+        return np.inf if self.in_loop else t_first
+
+
+    def handle(self, field: FieldBase, t: float) -> None:
+        """ handle data supplied to this tracker
+
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                The current state of the simulation
+            t (float):
+                The associated time
+        """
+        out = np.empty(self.num_values)
+        status = self.check(field.data, t, self.work, out)
+        if self.num_values > 0:
+            self._record(np.array([t]), out[np.newaxis, :])
+        self.handle_status(status)
+
+
+    def handle_status(self, status: int) -> None:
+        """ raise the exception associated with a status code
+
+        Args:
+            status (int): The status code returned by the check function
+        """
+        if status == STATUS_FINISHED:
+            raise FinishedSimulation(self._get_stop_message(status))
+        elif status == STATUS_ABORT:
+            raise StopIteration(self._get_stop_message(status))
+
+
+
+class CompiledConsistencyTracker(CompiledTrackerBase):
+    """ Compiled tracker aborting the simulation when the state is not finite
+    """
+
+    name = 'consistency_compiled'
+
+
+    def _make_check(self, field: FieldBase) -> Callable:
+        """ create the function evaluating the tracker """
+
+        def check(state_data: np.ndarray, t: float, work: np.ndarray,
+                  out: np.ndarray) -> int:
+            """ check whether all values are finite """
+            for j in range(state_data.size):
+                if not np.isfinite(state_data.flat[j]):
+                    return STATUS_ABORT
+            return STATUS_CONTINUE
+
+        return check
+
+
+    def _get_stop_message(self, status: int) -> str:
+        return 'Field was not finite'
+
+
+
+class CompiledMaterialConservationTracker(CompiledTrackerBase):
+    """ Compiled tracker ensuring that the integrals of all components are
+    conserved """
+
+    name = 'material_conservation_compiled'
+
+
+    @fill_in_docstring
+    def __init__(self, interval: IntervalData = 1,
+                 atol: float = 1e-4,
+                 rtol: float = 1e-4):
+        """
+        Args:
+            interval:
+                {ARG_TRACKER_INTERVAL}
+            atol (float):
+                Absolute tolerance for deviations of the integrals
+            rtol (float):
+                Relative tolerance for deviations of the integrals
+        """
+        super().__init__(interval=interval)
+        self.atol = atol
+        self.rtol = rtol
+
+
+    def _get_integrals(self, field: FieldBase) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the integrals of all components """
+        volumes = field.grid.cell_volumes.ravel()
+        data = field.data.reshape(-1, volumes.size)
+        return (data * volumes).sum(axis=1)  # type: ignore
+
+
+    def _get_work(self, field: FieldBase) -> np.ndarray:
+        return self._get_integrals(field)  # reference values
+
+
+    def _make_check(self, field: FieldBase) -> Callable:
+        """ create the function evaluating the tracker """
+        volumes = np.array(field.grid.cell_volumes.ravel())
+        num_cells = volumes.size
+        num_comps = field.data.size // num_cells
+        atol, rtol = float(self.atol), float(self.rtol)
+
+        def check(state_data: np.ndarray, t: float, work: np.ndarray,
+                  out: np.ndarray) -> int:
+            """ compare the integrals to their reference values """
+            data = state_data.reshape((num_comps, num_cells))
+            for c in range(num_comps):
+                integral = work[c] * 0
+                for k in range(num_cells):
+                    integral += data[c, k] * volumes[k]
+                if abs(integral - work[c]) > atol + rtol * abs(work[c]):
+                    return STATUS_ABORT
+            return STATUS_CONTINUE
+
+        return check
+
+
+    def _get_stop_message(self, status: int) -> str:
+        return 'Material is not conserved'
+
+
+
+class CompiledSteadyStateTracker(CompiledTrackerBase):
+    """ Compiled tracker finishing the simulation once steady state is reached
+
+    Steady state is reached when the state did not change between two
+    subsequent calls within the given tolerances, which are scaled by the
+    interval between calls.
+    """
+
+    name = 'steady_state_compiled'
+
+
+    @fill_in_docstring
+    def __init__(self, interval: IntervalData = 1,
+                 atol: float = 1e-8,
+                 rtol: float = 1e-5):
+        """
+        Args:
+            interval:
+                {ARG_TRACKER_INTERVAL}
+            atol (float): Absolute tolerance that must be reached to abort the
+                simulation
+            rtol (float): Relative tolerance that must be reached to abort the
+                simulation
+        """
+        super().__init__(interval=interval)
+        self.atol = atol
+        self.rtol = rtol
+
+
+    def _get_work(self, field: FieldBase) -> np.ndarray:
+        # the state of the last call, which is initially undefined
+        return np.full(field.data.size, np.nan, dtype=field.data.dtype)
+
+
+    def _make_check(self, field: FieldBase) -> Callable:
+        """ create the function evaluating the tracker """
+        # scale with the interval to make test independent of it
+        dt = getattr(self.interval, 'dt', 1)
+        atol, rtol = float(self.atol * dt), float(self.rtol * dt)
+
+        def check(state_data: np.ndarray, t: float, work: np.ndarray,
+                  out: np.ndarray) -> int:
+            """ compare the state with the state of the last call """
+            steady = True
+            for j in range(state_data.size):
+                value = state_data.flat[j]
+                if not abs(value - work[j]) <= atol + rtol * abs(work[j]):
+                    steady = False
+                work[j] = value
+            return STATUS_FINISHED if steady else STATUS_CONTINUE
+
+        return check
+
+
+    def _get_stop_message(self, status: int) -> str:
+        return 'Reached stationary state'
+
+
+
+# reductions that can be selected by name in CompiledReductionTracker
+_REDUCTIONS: Dict[str, Callable[[np.ndarray], float]] = {
+    'min': lambda data: data.min(),
+    'max': lambda data: data.max(),
+    'mean': lambda data: data.mean(),
+    'norm': lambda data: np.sqrt((data * data).sum()),
+}
+
+
+
+class CompiledReductionTracker(CompiledTrackerBase):
+    """ Compiled tracker recording scalar reductions of the state
+
+    The values are collected in a preallocated buffer and are available in the
+    attributes `times` and `data` after the simulation.
+
+    Example:
+        Record the minimum and a custom quantity of the state ::
+
+            tracker = CompiledReductionTracker(
+                ['min', lambda data: (data**2).mean()], interval=0.1)
+    """
+
+    name = 'reduction_compiled'
+
+
+    @fill_in_docstring
+    def __init__(self, reductions: Sequence[Union[str, Callable]] = ('mean',),
+                 interval: IntervalData = 1):
+        """
+        Args:
+            reductions (list):
+                The reductions that are recorded. Each item is either a
+                function that can be compiled by numba, takes the data of the
+                state and returns a real number, or one of the names 'min',
+                'max', 'mean', and 'norm', which reduce all values of the state
+                data.
+            interval:
+                {ARG_TRACKER_INTERVAL}
+        """
+        super().__init__(interval=interval)
+        if isinstance(reductions, str) or callable(reductions):
+            reductions = [reductions]
+        self.reductions = list(reductions)
+        self.num_values = len(self.reductions)
+        self.times: List[float] = []
+        self._data: List[np.ndarray] = []
+
+
+    @property
+    def data(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the recorded values, where the first axis
+        corresponds to the times and the second one to the reductions """
+        if self._data:
+            return np.concatenate(self._data)
+        return np.empty((0, self.num_values))
+
+
+    def _record(self, times: np.ndarray, values: np.ndarray) -> None:
+        self.times.extend(times)
+        self._data.append(values.copy())
+
+
+    def initialize(self, field: FieldBase, info: InfoDict = None) -> float:
+        """
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+            info (dict):
+                Extra information from the simulation
+
+        Returns:
+            float: The first time the tracker needs to handle data
+        """
+        # discard the values recorded by previous simulations
+        self.times = []
+        self._data = []
+        return super().initialize(field, info)
+
+
+    def _make_check(self, field: FieldBase) -> Callable:
+        """ create the function evaluating the tracker """
+
+        def chain(index: int, rest: Callable = None) -> Callable:
+            """ chain the reductions, since numba cannot iterate over them """
+            reduction = self.reductions[index]
+            if isinstance(reduction, str):
+                reduction = _REDUCTIONS[reduction]
+            func = jit(reduction)
+
+            if rest is None:
+                def reduce(state_data: np.ndarray, out: np.ndarray) -> None:
+                    out[index] = func(state_data)
+            else:
+                def reduce(state_data: np.ndarray, out: np.ndarray) -> None:
+                    out[index] = func(state_data)
+                    rest(state_data, out)
+            return jit(reduce)
+
+        reduce_all = None
+        for i in reversed(range(self.num_values)):
+            reduce_all = chain(i, reduce_all)
+
+        def check(state_data: np.ndarray, t: float, work: np.ndarray,
+                  out: np.ndarray) -> int:
+            """ record the reductions """
+            reduce_all(state_data, out)
+            return STATUS_CONTINUE
+
+        return check
+
+
+
+class CompiledTrackerCollection():
+    """ helper class evaluating compiled trackers inside a solver
+
+    This class is used by solvers that support evaluating instances of
+    :class:`CompiledTrackerBase` in their inner loop.
+    """
+
+    buffer_size: int = 1024
+    """ int: number of values each tracker can record before the solver
+    returns to python """
+
+
+    def __init__(self, trackers: List[CompiledTrackerBase], dt: float):
+        """
+        Args:
+            trackers (list):
+                The initialized trackers, which need to use intervals of type
+                :class:`~pde.trackers.intervals.ConstantIntervals`
+            dt (float):
+                The time step of the solver, which is used to convert the
+                intervals of the trackers into numbers of steps
+        """
+        for tracker in trackers:
+            if not isinstance(tracker.interval, ConstantIntervals):
+                raise ValueError('Compiled trackers in the inner loop require '
+                                 'constant intervals')
+        self.trackers = trackers
+
+        # number of steps between calls and steps until the next call
+        self.intervals = np.array([max(1, int(round(tr.interval.dt / dt)))
+                                   for tr in trackers], dtype=np.int64)
+        self.next_steps = np.zeros(len(trackers), dtype=np.int64)
+
+        # collect the data of all trackers in combined arrays
+        self._work_bounds = np.cumsum([0] + [tr.work.size for tr in trackers])
+        self._value_bounds = np.cumsum([0] + [tr.num_values for tr in trackers])
+        self.work = np.concatenate([tr.work for tr in trackers])
+        self.values = np.zeros((self.buffer_size, self._value_bounds[-1]))
+        self.times = np.zeros((self.buffer_size, len(trackers)))
+        self.rows = np.zeros(len(trackers), dtype=np.int64)
+
+
+    def _make_dispatcher(self) -> Callable:
+        """ create a compiled function calling the check of a given tracker
+
+        Returns:
+            Function with signature `(index, state_data, t, work, values_row)`
+        """
+
+        def chain(index: int, rest: Callable = None) -> Callable:
+            """ chain the trackers, since numba cannot iterate over them """
+            check = self.trackers[index].check
+            w0 = int(self._work_bounds[index])
+            w1 = int(self._work_bounds[index + 1])
+            v0 = int(self._value_bounds[index])
+            v1 = int(self._value_bounds[index + 1])
+
+            if rest is None:
+                def dispatch(i: int, state_data: np.ndarray, t: float,
+                             work: np.ndarray, values_row: np.ndarray) -> int:
+                    return check(state_data, t, work[w0:w1],  # type: ignore
+                                 values_row[v0:v1])
+            else:
+                def dispatch(i: int, state_data: np.ndarray, t: float,
+                             work: np.ndarray, values_row: np.ndarray) -> int:
+                    if i == index:
+                        return check(state_data, t,  # type: ignore
+                                     work[w0:w1], values_row[v0:v1])
+                    return rest(i, state_data, t, work, values_row)
+
+            return jit(dispatch)
+
+        dispatcher = None
+        for i in reversed(range(len(self.trackers))):
+            dispatcher = chain(i, dispatcher)
+        return dispatcher  # type: ignore
+
+
+    def flush(self) -> None:
+        """ hand the recorded values to the trackers """
+        for i, tracker in enumerate(self.trackers):
+            rows = self.rows[i]
+            if rows > 0:
+                v0, v1 = self._value_bounds[i], self._value_bounds[i + 1]
+                tracker._record(self.times[:rows, i].copy(),
+                                self.values[:rows, v0:v1])
+                self.rows[i] = 0
+
+
+    def make_stepper(self, inner_stepper: Callable, info: Dict[str, Any],
+                     compiled: bool = True) -> Callable:
+        """ wrap the inner stepper of a solver to evaluate the trackers
+
+        Args:
+            inner_stepper (callable):
+                The function advancing the state data by a given number of
+                steps. The call signature is
+                `(state_data: numpy.ndarray, t_start: float, steps: int,
+                work: numpy.ndarray)` and it returns the time after the last
+                step. Here, `work` are work buffers owned by the solver.
+            info (dict):
+                The information of the solver, whose entry `steps` is
+                increased by the number of steps taken
+            compiled (bool):
+                Flag determining whether the loop is compiled, which requires
+                the inner stepper to be compiled, too
+
+        Returns:
+            Function with the same signature as `inner_stepper`. When a
+            tracker stops the simulation, the raised exception has an attribute
+            `t` with the time of the state.
+        """
+        dispatch = self._make_dispatcher()
+        num_values = np.diff(self._value_bounds)
+        capacity = self.buffer_size
+
+        def loop(state_data: np.ndarray, t: float, steps: int,
+                 buffers: np.ndarray, intervals: np.ndarray,
+                 next_steps: np.ndarray, rows: np.ndarray, work: np.ndarray,
+                 values: np.ndarray, times: np.ndarray):
+            """ advance the state and evaluate the trackers when necessary """
+            steps_done = 0
+            while True:
+                for i in range(next_steps.size):
+                    if next_steps[i] == 0:
+                        next_steps[i] = intervals[i]
+                        status = dispatch(i, state_data, t, work,
+                                          values[rows[i]])
+                        if num_values[i] > 0:
+                            times[rows[i], i] = t
+                            rows[i] += 1
+                            if status == 0 and rows[i] == capacity:
+                                status = STATUS_FLUSH
+                        if status != 0:
+                            return t, steps_done, i, status
+
+                if steps_done >= steps:
+                    return t, steps_done, -1, 0
+
+                chunk = min(steps - steps_done, next_steps.min())
+                t = inner_stepper(state_data, t, chunk, buffers)
+                steps_done += chunk
+                next_steps -= chunk
+
+        if compiled:
+            loop = jit(loop)
+
+        def stepper(state_data: np.ndarray, t_start: float, steps: int,
+                    buffers: np.ndarray) -> float:
+            """ advance the state while evaluating the compiled trackers """
+            t = t_start
+            try:
+                while True:
+                    t, steps_done, i, status = loop(
+                        state_data, t, steps, buffers, self.intervals,
+                        self.next_steps, self.rows, self.work, self.values,
+                        self.times)
+                    info['steps'] += steps_done
+                    steps -= steps_done
+                    if status == 0:
+                        return t
+                    elif status != STATUS_FLUSH:
+                        try:
+                            self.trackers[i].handle_status(status)
+                        except StopIteration as err:
+                            err.t = t  # type: ignore
+                            raise
+                    self.flush()
+            finally:
+                self.flush()
+
+        return stepper
@@ -71,6 +71,14 @@ class ConstantIntervals():
         return self._t_next
         
         
+    def _resume(self) -> None:
+        """ prepare the intervals for resuming a simulation from a checkpoint
+        
+        The intervals might have been stored by a different process. Subclasses
+        thus need to reset all state that does not refer to simulation time.
+        """
+        
+        
     def next(self, t: float) -> float:
         """ computes the next time point based on the current time t
         
@@ -170,6 +178,15 @@ class RealtimeIntervals(ConstantIntervals):
         return super()._initialize(t)
         
         
+    def _resume(self) -> None:
+        """ prepare the intervals for resuming a simulation from a checkpoint
+        
+        The real time stored in the checkpoint refers to the previous process,
+        so the time since the last call is measured from now on.
+        """
+        self._last_time = time.time()
+        
+        
     def next(self, t: float) -> float:
         """ computes the next time point based on the current time t
         
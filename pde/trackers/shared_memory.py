@@ -0,0 +1,328 @@
+"""
+Classes for publishing the state of a running simulation in shared memory
+
+The :class:`SharedMemoryTracker` copies the current state into a segment of
+shared memory, which can be attached to by other processes using
+:class:`SharedMemoryReader`. This allows monitoring or analyzing a simulation
+from separate processes without slowing down the simulation, e.g., by
+plotting. Requires python 3.8 or later, which provides
+:mod:`multiprocessing.shared_memory`.
+
+.. autosummary::
+   :nosignatures:
+
+   SharedMemoryTracker
+   SharedMemoryReader
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+"""
+
+import json
+import time
+from typing import Optional, Tuple, Any  # @UnusedImport
+
+import numpy as np
+
+from .base import TrackerBase, InfoDict
+from .intervals import IntervalData
+from ..fields import FieldCollection
+from ..fields.base import FieldBase
+from ..tools.docstrings import fill_in_docstring
+
+
+# layout of the header of the segment, which consists of 64-bit words
+_HEADER_WORDS = 5  # version, time, finished flag, description length, owner
+_DATA_ALIGNMENT = 64  # alignment of the data in bytes
+
+
+
+def _get_header(buffer) -> Tuple[np.ndarray, np.ndarray]:
+    """ return views of the header words of a shared memory buffer
+
+    Args:
+        buffer: The buffer of the shared memory segment
+
+    Returns:
+        tuple: The integer words and the time stored as a float
+    """
+    words = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=buffer)
+    t = np.ndarray((1,), dtype=np.double, buffer=buffer, offset=8)
+    return words, t
+
+
+
+def _get_resource_tracker_pid() -> Optional[int]:
+    """ determine the resource tracker of :mod:`multiprocessing`
+
+    Shared memory segments are registered with this tracker, which removes them
+    when the processes using it exit. Processes started from the simulation
+    share its tracker, while independent processes use their own.
+
+    Note:
+        The tracker is not part of the public interface of
+        :mod:`multiprocessing`. If its private attributes are not available,
+        this function returns `None`, so the process is treated as being
+        independent of the simulation.
+
+    Returns:
+        int: The process id of the resource tracker, `-1` if the tracker was
+        inherited without its process id, or `None` if this process is not
+        connected to a resource tracker
+    """
+    try:
+        from multiprocessing import resource_tracker
+    except ImportError:
+        return None
+    tracker = getattr(resource_tracker, '_resource_tracker', None)
+    pid = getattr(tracker, '_pid', None)
+    if isinstance(pid, int):
+        return pid
+    elif getattr(tracker, '_fd', None) is not None:
+        return -1
+    else:
+        return None
+
+
+
+def _get_data_offset(description_length: int) -> int:
+    """ int: the offset of the data in the shared memory segment """
+    size = 8 * _HEADER_WORDS + description_length
+    return -(-size // _DATA_ALIGNMENT) * _DATA_ALIGNMENT
+
+
+
+class SharedMemoryTracker(TrackerBase):
+    """ Tracker publishing the current state in shared memory
+
+    Every time the tracker is called, the state is copied into a segment of
+    shared memory together with the associated time. Other processes can
+    observe the simulation using :class:`SharedMemoryReader`. A version counter
+    implements a sequence lock, which allows readers to detect (and retry)
+    reads that overlapped with an update, so the simulation never waits for
+    readers.
+
+    Example:
+        A running simulation can be observed from another process using ::
+
+            reader = SharedMemoryReader(segment_name)
+            t, field = reader.read()
+
+    Attributes:
+        segment_name (str):
+            The name of the shared memory segment, which is required by readers
+    """
+
+    name = 'shared_memory'
+
+
+    @fill_in_docstring
+    def __init__(self, interval: IntervalData = 1,
+                 segment_name: Optional[str] = None,
+                 unlink: bool = True):
+        """
+        Args:
+            interval:
+                {ARG_TRACKER_INTERVAL}
+            segment_name (str, optional):
+                The name of the shared memory segment. If omitted, a unique
+                name is chosen, which can be read from the attribute
+                `segment_name` after the tracker has been initialized.
+            unlink (bool):
+                Flag determining whether the segment is removed when the
+                simulation finishes. Processes that are attached to the segment
+                can still access the last state in any case.
+        """
+        super().__init__(interval=interval)
+        self.segment_name = segment_name
+        self.unlink = unlink
+        self._shm: Any = None
+
+
+    def initialize(self, field: FieldBase, info: InfoDict = None) -> float:
+        """
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+            info (dict):
+                Extra information from the simulation
+
+        Returns:
+            float: The first time the tracker needs to handle data
+        """
+        from multiprocessing import shared_memory
+
+        # describe the field, so readers can reconstruct it
+        description = json.dumps({
+            'attributes': field.attributes_serialized,
+            'dtype': field.data.dtype.str,
+            'shape': field.data.shape
+        }).encode()
+        offset = _get_data_offset(len(description))
+
+        self._shm = shared_memory.SharedMemory(
+            name=self.segment_name, create=True,
+            size=offset + field.data.nbytes)
+        self.segment_name = self._shm.name
+
+        self._words, self._time = _get_header(self._shm.buf)
+        self._words[:] = 0
+        self._words[3] = len(description)
+        self._words[4] = _get_resource_tracker_pid() or 0
+        self._shm.buf[8 * _HEADER_WORDS:8 * _HEADER_WORDS +
+                      len(description)] = description
+        self._data = np.ndarray(field.data.shape, dtype=field.data.dtype,
+                                buffer=self._shm.buf, offset=offset)
+        self._logger.info(f'Publish state in segment `{self.segment_name}`')
+
+        return super().initialize(field, info)
+
+
+    def handle(self, field: FieldBase, t: float) -> None:
+        """ handle data supplied to this tracker
+
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                The current state of the simulation
+            t (float):
+                The associated time
+        """
+        # an odd version signals readers that an update is in progress
+        self._words[0] += 1
+        self._data[...] = field.data
+        self._time[0] = t
+        self._words[0] += 1
+
+
+    def finalize(self, info: InfoDict = None) -> None:
+        """ finalize the tracker, supplying additional information
+
+        Args:
+            info (dict):
+                Extra information from the simulation
+        """
+        super().finalize(info)
+        if self._shm is None:
+            return
+        self._words[2] = 1  # signal that the simulation finished
+
+        # release all views before closing the segment
+        del self._words, self._time, self._data
+        self._shm.close()
+        if self.unlink:
+            self._shm.unlink()
+        self._shm = None
+
+
+
+class SharedMemoryReader():
+    """ Attach to the state published by a :class:`SharedMemoryTracker`
+
+    The attribute `field` is a field whose data is a view into the shared
+    memory, so it always reflects the latest published state without copying
+    data. Since the state might change at any time, :meth:`read` should be
+    used to obtain consistent snapshots.
+    """
+
+
+    def __init__(self, segment_name: str):
+        """
+        Args:
+            segment_name (str):
+                The name of the shared memory segment, which is available as
+                :attr:`SharedMemoryTracker.segment_name`
+        """
+        from multiprocessing import shared_memory
+
+        self.segment_name = segment_name
+        try:
+            # python 3.13 and later can attach without tracking the segment
+            self._shm = shared_memory.SharedMemory(name=segment_name,
+                                                   track=False)
+        except TypeError:
+            tracker_pid = _get_resource_tracker_pid()  # before attaching
+            self._shm = shared_memory.SharedMemory(name=segment_name)
+            owner_pid = int(_get_header(self._shm.buf)[0][4])
+            if tracker_pid != -1 and tracker_pid != owner_pid:
+                # the segment belongs to the simulation, so it must not be
+                # removed when this independent process exits
+                try:
+                    from multiprocessing import resource_tracker
+                    resource_tracker.unregister(
+                        self._shm._name, 'shared_memory')  # type: ignore
+                except (ImportError, AttributeError):
+                    pass
+        self._words, self._time = _get_header(self._shm.buf)
+
+        length = int(self._words[3])
+        start = 8 * _HEADER_WORDS
+        description = json.loads(bytes(self._shm.buf[start:start + length]))
+        data = np.ndarray(tuple(description['shape']),
+                          dtype=np.dtype(description['dtype']),
+                          buffer=self._shm.buf,
+                          offset=_get_data_offset(length))
+        data.flags.writeable = False
+
+        # create the field using a view into the shared memory
+        attributes = FieldBase.unserialize_attributes(
+            description['attributes'])
+        field = FieldBase.from_state(attributes)
+        if isinstance(field, FieldCollection):
+            fields = [f.__class__(f.grid, label=f.label) for f in field]
+            self.field: FieldBase = FieldCollection(fields, data=data,
+                                                    label=field.label)
+        else:
+            field._data = data
+            self.field = field
+
+
+    @property
+    def version(self) -> int:
+        """ int: the number of updates of the state """
+        return int(self._words[0]) // 2
+
+
+    @property
+    def finished(self) -> bool:
+        """ bool: whether the simulation has finished """
+        return bool(self._words[2])
+
+
+    def read(self, timeout: Optional[float] = None) \
+            -> Tuple[float, FieldBase]:
+        """ read a consistent snapshot of the current state
+
+        Args:
+            timeout (float, optional):
+                The maximal time in seconds to wait for a consistent state
+
+        Returns:
+            tuple: The time and a copy of the field
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            version = int(self._words[0])
+            if version % 2 == 0:
+                field = self.field.copy()
+                t = float(self._time[0])
+                if int(self._words[0]) == version:
+                    return t, field
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError('Could not read a consistent state')
+            time.sleep(0)
+
+
+    def close(self) -> None:
+        """ detach from the shared memory segment """
+        if self._shm is None:
+            return
+        del self._words, self._time, self.field
+        self._shm.close()
+        self._shm = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,73 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import numpy as np
+import pytest
+
+from .. import compiled
+from ...grids import UnitGrid
+from ...fields import ScalarField
+from ...pdes import DiffusionPDE
+from ...solvers import ExplicitSolver, Controller
+
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'numba'])
+def test_compiled_reduction_tracker(backend):
+    """ test recording reductions in the inner loop """
+    state = ScalarField.random_uniform(UnitGrid([8]))
+    data = {}
+    for adaptive in [False, True]:
+        # the adaptive solver evaluates the tracker in python
+        tracker = compiled.CompiledReductionTracker(
+            ['max', lambda d: d.sum()], interval=0.25)
+        solver = ExplicitSolver(DiffusionPDE(), backend=backend,
+                                adaptive=adaptive)
+        controller = Controller(solver, t_range=1, tracker=tracker)
+        result = controller.run(state, dt=0.01)
+        assert tracker.in_loop != adaptive
+        np.testing.assert_allclose(tracker.times, [0, 0.25, 0.5, 0.75, 1],
+                                   atol=0.01)
+        data[adaptive] = tracker.data
+        assert tracker.data.shape == (5, 2)
+        assert tracker.data[-1, 0] == pytest.approx(result.data.max())
+        np.testing.assert_allclose(tracker.data[:, 1], state.data.sum())
+    np.testing.assert_allclose(data[False], data[True], rtol=1e-2)
+    assert solver.info['steps'] > 0
+    
+    # values of previous simulations are discarded when reusing the tracker
+    controller = Controller(ExplicitSolver(DiffusionPDE(), backend=backend),
+                            t_range=0.5, tracker=tracker)
+    controller.run(state, dt=0.01)
+    np.testing.assert_allclose(tracker.times, [0, 0.25, 0.5], atol=0.01)
+    assert tracker.data.shape == (3, 2)
+    
+    
+    
+def test_compiled_stopping_trackers():
+    """ test compiled trackers that stop the simulation """
+    state = ScalarField.random_uniform(UnitGrid([8]))
+    tracker = compiled.CompiledSteadyStateTracker(interval=1)
+    controller = Controller(ExplicitSolver(DiffusionPDE()), t_range=1e4,
+                            tracker=tracker)
+    controller.run(state, dt=0.1)
+    assert controller.info['successful']
+    assert controller.info['stop_reason'] == 'Reached stationary state'
+    assert 1 < controller.info['t_final'] < 1e4
+    
+    # diffusion with fixed boundary values does not conserve material
+    pde = DiffusionPDE(bc={'value': 1})
+    tracker = compiled.CompiledMaterialConservationTracker(interval=0.1)
+    controller = Controller(ExplicitSolver(pde), t_range=10, tracker=tracker)
+    controller.run(state, dt=0.01)
+    assert not controller.info['successful']
+    assert controller.info['stop_reason'] == 'Material is not conserved'
+    assert controller.info['t_final'] < 10
+    
+    # the explicit scheme is unstable for large time steps
+    tracker = compiled.CompiledConsistencyTracker(interval=1)
+    controller = Controller(ExplicitSolver(DiffusionPDE()), t_range=1e4,
+                            tracker=tracker)
+    controller.run(state, dt=1)
+    assert controller.info['stop_reason'] == 'Field was not finite'
@@ -2,9 +2,11 @@
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
+import time
+
 import pytest
 
-from .. import ConstantIntervals, LogarithmicIntervals
+from .. import ConstantIntervals, LogarithmicIntervals, RealtimeIntervals
         
 
 
@@ -37,5 +39,14 @@ def test_interval_tstart():
     assert ival.next(3) == pytest.approx(9)
     assert ival.next(3) == pytest.approx(11)
     assert ival.next(3) == pytest.approx(13)
-
-
+    
+    
+    
+def test_realtime_intervals_resume():
+    """ test that resumed realtime intervals do not use stale wall times """
+    ival = RealtimeIntervals(duration=10, dt_initial=1)
+    ival._initialize(0)
+    ival._last_time -= 1e4  # pretend the interval was stored long ago
+    ival._resume()
+    assert time.time() - ival._last_time < 10
+    assert ival.next(0) > 1
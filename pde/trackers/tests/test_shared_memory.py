@@ -0,0 +1,100 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import multiprocessing as mp
+import sys
+
+import numpy as np
+import pytest
+
+from .. import SharedMemoryTracker, SharedMemoryReader
+from ...grids import UnitGrid
+from ...fields import ScalarField, VectorField, FieldCollection
+from ...pdes import DiffusionPDE
+from ...trackers import CallbackTracker
+
+
+
+def _read_in_process(segment_name, queue):
+    """ helper function reading the state in a separate process """
+    with SharedMemoryReader(segment_name) as reader:
+        t, field = reader.read(timeout=10)
+        queue.put((t, field.data))
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason='requires multiprocessing.shared_memory')
+def test_shared_memory_tracker():
+    """ test publishing fields in shared memory """
+    grid = UnitGrid([4, 3])
+    state = FieldCollection([ScalarField.random_uniform(grid),
+                             VectorField.random_uniform(grid)])
+    tracker = SharedMemoryTracker(interval=1)
+    tracker.initialize(state)
+    
+    with SharedMemoryReader(tracker.segment_name) as reader:
+        assert isinstance(reader.field, FieldCollection)
+        assert reader.version == 0
+        tracker.handle(state, 2)
+        assert reader.version == 1
+        t, field = reader.read()
+        assert t == 2
+        assert field == state
+        np.testing.assert_allclose(reader.field[1].data, state[1].data)
+        
+        # the view reflects the latest state
+        state.data[:] = 1
+        tracker.handle(state, 3)
+        np.testing.assert_allclose(reader.field.data, 1)
+        assert not reader.finished
+        tracker.finalize()
+        assert reader.finished
+    
+    
+    
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason='requires multiprocessing.shared_memory')
+def test_shared_memory_tracker_simulation():
+    """ test observing a running simulation """
+    state = ScalarField.random_uniform(UnitGrid([8]))
+    tracker = SharedMemoryTracker(interval=0.1)
+    times = []
+    
+    def observe(field, t):
+        with SharedMemoryReader(tracker.segment_name) as reader:
+            t_read, field_read = reader.read()
+            times.append(t_read)
+            np.testing.assert_allclose(field_read.data, field.data)
+    
+    result = DiffusionPDE().solve(state, t_range=1, dt=0.01,
+                                  tracker=[tracker, CallbackTracker(observe)])
+    assert times[-1] == pytest.approx(1)
+    assert result.data.shape == (8,)
+    
+    
+    
+@pytest.mark.skipif(sys.version_info < (3, 8),
+                    reason='requires multiprocessing.shared_memory')
+def test_shared_memory_tracker_spawn():
+    """ test reading the state from a spawned process """
+    state = ScalarField.random_uniform(UnitGrid([8]))
+    tracker = SharedMemoryTracker(interval=1)
+    tracker.initialize(state)
+    tracker.handle(state, 2)
+    
+    ctx = mp.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_read_in_process,
+                          args=(tracker.segment_name, queue))
+    process.start()
+    t, data = queue.get(timeout=120)
+    process.join()
+    assert process.exitcode == 0
+    assert t == 2
+    np.testing.assert_allclose(data, state.data)
+    
+    # the segment is still available after the reading process exited
+    with SharedMemoryReader(tracker.segment_name) as reader:
+        assert reader.read()[0] == 2
+    tracker.finalize()
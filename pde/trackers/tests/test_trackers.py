@@ -187,6 +187,48 @@ def test_data_tracker(tmp_path):
      
     
     
+def test_column_data_tracker(tmp_path):
+    """ test the ColumnDataTracker """
+    field = ScalarField(UnitGrid([4, 4]))
+    eq = DiffusionPDE()
+    
+    def get_data(state, t):
+        return {'int': state.integral, 'step': int(round(10 * t))}
+    
+    tracker1 = trackers.ColumnDataTracker(
+        lambda f: [f.average, f.data.max()], columns=['avg', 'max'],
+        interval=0.1, buffer_size=4)
+    path = tmp_path / "data.csv"
+    tracker2 = trackers.ColumnDataTracker(
+        get_data, columns={'int': float, 'step': int}, interval=0.1,
+        filename=path, buffer_size=4)
+    eq.solve(field, 1, dt=0.01, tracker=[tracker1, tracker2])
+    
+    np.testing.assert_allclose(tracker1.times, np.linspace(0, 1, 11), atol=0.02)
+    assert tracker1.data.dtype.names == ('avg', 'max')
+    np.testing.assert_allclose(tracker1.data['avg'], field.average)
+    assert len(tracker2.times) == 0  # all data was written to the file
+    
+    content = np.genfromtxt(path, delimiter=',', names=True)
+    np.testing.assert_allclose(content['time'], tracker1.times)
+    np.testing.assert_allclose(content['step'], np.arange(11))
+    
+    if module_available('h5py'):
+        import h5py
+        path = tmp_path / "data.hdf5"
+        tracker = trackers.ColumnDataTracker(
+            get_data, columns={'int': float, 'step': int}, interval=0.1,
+            filename=path, buffer_size=3)
+        eq.solve(field, 1, dt=0.01, tracker=tracker)
+        with h5py.File(path, 'r') as fp:
+            data = fp['data'][:]
+        np.testing.assert_allclose(data['step'], np.arange(11))
+        
+    with pytest.raises(ValueError):
+        trackers.ColumnDataTracker(get_data, ['a'], filename='data.txt')
+    
+    
+    
 def test_steady_state_tracker():
     """ test the SteadyStateTracker """
     storage = MemoryStorage()
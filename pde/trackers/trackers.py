@@ -11,6 +11,7 @@ The trackers defined in this module are:
    PrintTracker
    PlotTracker
    DataTracker
+   ColumnDataTracker
    SteadyStateTracker
    RuntimeTracker
    ConsistencyTracker
@@ -26,7 +27,7 @@ import time
 from datetime import timedelta
 from pathlib import Path
 from typing import (Callable, Optional, Union, IO, List, Any,  # @UnusedImport
-                    Dict, TYPE_CHECKING)
+                    Dict, Sequence, TYPE_CHECKING)
 
 import numpy as np
 
@@ -35,7 +36,7 @@ from .intervals import IntervalData, RealtimeIntervals
 from ..fields.base import FieldBase
 from ..fields import FieldCollection
 from ..tools.parse_duration import parse_duration
-from ..tools.misc import get_progress_bar_class
+from ..tools.misc import get_progress_bar_class, ensure_directory_exists
 from ..tools.docstrings import fill_in_docstring
 
 
@@ -623,6 +624,218 @@ class DataTracker(CallbackTracker):
             self.dataframe.to_excel(filename, **kwargs)
         else:
             raise ValueError(f'Unsupported file extension `{extension}`')
+
+            
+            
+class ColumnDataTracker(CallbackTracker):
+    """ Tracker that stores scalar data with a fixed set of columns
+    
+    In contrast to :class:`DataTracker`, the callback function returns the same
+    set of numbers in each call, which are declared once using `columns`. The
+    values are then stored in preallocated numpy arrays instead of lists of
+    python objects. If a `filename` is given, the data is written to the file
+    whenever the buffer is full, so the memory requirement does not grow with
+    the duration of the simulation. In this case, only the data that has not
+    been written yet is kept in memory.
+    
+    Attributes:
+        columns (list):
+            The names of the columns returned by the callback function
+    """
+    
+    @fill_in_docstring
+    def __init__(self, func: Callable,
+                 columns: Union[Sequence[str], Dict[str, Any]],
+                 interval: IntervalData = 1,
+                 filename: str = None,
+                 buffer_size: int = 1024):
+        """ 
+        Args:
+            func:
+                The function to call periodically. The function signature
+                should be `(state)` or `(state, time)`, where `state` contains
+                the current state as an instance of
+                :class:`~pde.fields.FieldBase` and `time` is a float value
+                indicating the current time. The function needs to return a
+                sequence of numbers in the order given by `columns` or a
+                dictionary whose keys are the column names.
+            columns (list or dict):
+                The names of the columns. A dictionary can be used to also
+                specify the data type of each column, which is `float`
+                otherwise.
+            interval:
+                {ARG_TRACKER_INTERVAL}
+            filename (str):
+                A path to a file to which the data is written during the
+                simulation. The data format will be determined by the extension
+                of the filename. Supported are '.csv', '.h5' and '.hdf5'
+                (requiring :mod:`h5py`), and '.parquet' (requiring
+                :mod:`pyarrow`). An existing file is overwritten.
+            buffer_size (int):
+                The number of rows kept in memory before they are written to
+                the file. Without a file, the buffer grows as necessary.
+        """
+        super().__init__(func=func, interval=interval)
+        if not isinstance(columns, dict):
+            columns = {name: float for name in columns}
+        if 'time' in columns:
+            raise ValueError('`time` cannot be used as a column name')
+        self.columns = list(columns.keys())
+        self._dtype = np.dtype([('time', float)] +  # type: ignore
+                               [(name, dtype)
+                                for name, dtype in columns.items()])
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._buffer = np.empty(buffer_size, dtype=self._dtype)
+        self._length = 0  # number of rows stored in the buffer
+        self._writer: Any = None
+        
+        if filename is not None:
+            extension = os.path.splitext(filename)[1].lower()
+            if extension not in {'.csv', '.h5', '.hdf5', '.parquet'}:
+                raise ValueError(f'Unsupported file extension `{extension}`')
+        
+        
+    @property
+    def times(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the times of the data kept in memory """
+        return self._buffer['time'][:self._length]
+    
+    
+    @property
+    def data(self) -> np.ndarray:
+        """ :class:`numpy.ndarray`: the data kept in memory as a structured
+        array with a field for each column """
+        return self._buffer[self.columns][:self._length]
+        
+        
+    @property
+    def dataframe(self) -> "pandas.DataFrame":
+        """ :class:`pandas.DataFrame`: the data kept in memory, including a
+        column 'time' """
+        import pandas as pd
+        return pd.DataFrame(self._buffer[:self._length])
+        
+        
+    def initialize(self, field: FieldBase, info: InfoDict = None) -> float:
+        """ 
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                An example of the data that will be analyzed by the tracker
+            info (dict):
+                Extra information from the simulation        
+                
+        Returns:
+            float: The first time the tracker needs to handle data
+        """
+        self._length = 0
+        if self.filename is not None:
+            self._open_file()
+        return super().initialize(field, info)
+        
+        
+    def handle(self, field: FieldBase, t: float) -> None:
+        """ handle data supplied to this tracker
+        
+        Args:
+            field (:class:`~pde.fields.FieldBase`):
+                The current state of the simulation
+            t (float):
+                The associated time
+        """
+        if self._num_args == 1:
+            values = self._callback(field)
+        else:
+            values = self._callback(field, t)
+        
+        if self._length == len(self._buffer):
+            # the buffer is full and no data is written to a file
+            self._buffer = np.resize(self._buffer, 2 * len(self._buffer))
+        
+        row = self._buffer[self._length]
+        row['time'] = t
+        if isinstance(values, dict):
+            for name in self.columns:
+                row[name] = values[name]
+        else:
+            if len(values) != len(self.columns):
+                raise ValueError(f'Expected {len(self.columns)} values, but '
+                                 f'got {len(values)}')
+            for name, value in zip(self.columns, values):
+                row[name] = value
+        self._length += 1
+        
+        if self._writer is not None and self._length == len(self._buffer):
+            self.flush()
+        
+        
+    def _open_file(self) -> None:
+        """ create the file to which the data is written """
+        ensure_directory_exists(os.path.dirname(str(self.filename)))
+        extension = os.path.splitext(self.filename)[1].lower()
+        
+        if extension == '.csv':
+            self._writer = open(self.filename, 'w')
+            self._writer.write(','.join(self._dtype.names) + '\n')
+            
+        elif extension in {'.h5', '.hdf5'}:
+            import h5py
+            self._writer = h5py.File(self.filename, 'w')
+            self._writer.create_dataset(
+                'data', shape=(0,), dtype=self._dtype, maxshape=(None,),
+                chunks=(min(self.buffer_size, 1024),))
+            
+        elif extension == '.parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = pa.schema([(name, pa.from_numpy_dtype(dtype))
+                                for name, (dtype, _)
+                                in self._dtype.fields.items()])
+            self._writer = pq.ParquetWriter(self.filename, schema)
+        
+        
+    def flush(self) -> None:
+        """ write the data kept in memory to the file """
+        if self._writer is None or self._length == 0:
+            return
+        rows = self._buffer[:self._length]
+        extension = os.path.splitext(self.filename)[1].lower()
+        
+        if extension == '.csv':
+            fmt = ['%d' if self._dtype[name].kind in 'biu' else '%.17g'
+                   for name in self._dtype.names]
+            np.savetxt(self._writer, rows, fmt=fmt, delimiter=',')
+            self._writer.flush()
+            
+        elif extension in {'.h5', '.hdf5'}:
+            dataset = self._writer['data']
+            length = len(dataset)
+            dataset.resize((length + len(rows),))
+            dataset[length:] = rows
+            self._writer.flush()
+            
+        elif extension == '.parquet':
+            import pyarrow as pa
+            table = pa.Table.from_arrays(
+                [pa.array(rows[name]) for name in self._dtype.names],
+                names=list(self._dtype.names))
+            self._writer.write_table(table)
+            
+        self._length = 0
+        
+        
+    def finalize(self, info: InfoDict = None) -> None:
+        """ finalize the tracker, supplying additional information
+
+        Args:
+            info (dict):
+                Extra information from the simulation        
+        """
+        super().finalize(info)
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
             
             
             
@@ -841,5 +1054,6 @@ class MaterialConservationTracker(TrackerBase):
             
             
 __all__ = ['CallbackTracker', 'ProgressTracker', 'PrintTracker', 'PlotTracker',
-           'DataTracker', 'SteadyStateTracker', 'RuntimeTracker',
-           'ConsistencyTracker', 'MaterialConservationTracker']
+           'DataTracker', 'ColumnDataTracker', 'SteadyStateTracker',
+           'RuntimeTracker', 'ConsistencyTracker',
+           'MaterialConservationTracker']
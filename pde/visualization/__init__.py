@@ -5,6 +5,7 @@ Functions and classes for visualizing simulations.
 .. autosummary::
    :nosignatures:
 
+   frames
    movies
    plotting
    
@@ -12,4 +13,5 @@ Functions and classes for visualizing simulations.
 '''
 
 from .plotting import plot_magnitudes, plot_kymograph, plot_kymographs
-from .movies import movie_scalar, movie_multiple
+from .movies import movie_scalar, movie_multiple, movie_parallel
+from .frames import FrameExporter
@@ -0,0 +1,234 @@
+'''
+Functions for exporting color-mapped images of fields without creating
+matplotlib figures
+
+.. autosummary::
+   :nosignatures:
+
+   FrameExporter
+   write_png
+
+
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Optional, Tuple, Union, BinaryIO  # @UnusedImport
+
+import numpy as np
+
+from ..fields.base import FieldBase
+from ..storage.base import StorageBase
+from ..tools.misc import display_progress, ensure_directory_exists
+
+
+
+def write_png(path: Union[str, Path], image: np.ndarray,
+              compression: int = 1) -> None:
+    """ write an RGB image to a PNG file
+
+    Args:
+        path (str): The path of the file
+        image (:class:`numpy.ndarray`):
+            The image given as an array of unsigned bytes with shape
+            `(height, width, 3)`
+        compression (int):
+            The compression level used by :mod:`zlib`
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width, _ = image.shape
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        """ create a PNG chunk including its checksum """
+        content = tag + data
+        return (struct.pack('>I', len(data)) + content +
+                struct.pack('>I', zlib.crc32(content) & 0xFFFFFFFF))
+
+    # each row starts with a byte determining the filter type (0 = none)
+    rows = np.empty((height, 1 + 3 * width), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = image.reshape(height, -1)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    with open(path, 'wb') as fp:
+        fp.write(b'\x89PNG\r\n\x1a\n')
+        fp.write(chunk(b'IHDR', header))
+        fp.write(chunk(b'IDAT', zlib.compress(rows.tobytes(), compression)))
+        fp.write(chunk(b'IEND', b''))
+
+
+
+class FrameExporter():
+    """ class converting fields to color-mapped images
+
+    The images are obtained from
+    :meth:`~pde.fields.base.FieldBase.get_image_data` and colored using a
+    lookup table of the colormap, which avoids drawing matplotlib figures. The
+    images can be written as PNG files or streamed as raw RGB data, e.g., to
+    `ffmpeg`.
+    """
+
+
+    def __init__(self, scale: Tuple[float, float],
+                 cmap: str = 'viridis',
+                 downsample: int = 1,
+                 source: Optional[int] = None,
+                 lut_size: int = 256):
+        """
+        Args:
+            scale (tuple):
+                The values that are mapped to the lower and the upper end of
+                the colormap
+            cmap (str):
+                The name of the matplotlib colormap
+            downsample (int):
+                Factor by which the images are reduced along each axis
+            source (int, optional):
+                Index of the field that is shown when a
+                :class:`~pde.fields.FieldCollection` is exported
+            lut_size (int):
+                Number of colors in the lookup table
+        """
+        import matplotlib as mpl
+
+        self.vmin, self.vmax = float(scale[0]), float(scale[1])
+        self.downsample = int(downsample)
+        self.source = source
+        try:
+            colormap = mpl.colormaps[cmap].resampled(lut_size)
+        except AttributeError:
+            # matplotlib versions before 3.6 do not support the new interface
+            import matplotlib.cm as cm
+            colormap = cm.get_cmap(cmap, lut_size)
+        colors = colormap(np.arange(lut_size))
+        self.lut = np.round(255 * colors[:, :3]).astype(np.uint8)
+
+
+    @classmethod
+    def from_storage(cls, storage: StorageBase,
+                     source: Optional[int] = None,
+                     **kwargs) -> "FrameExporter":
+        """ create an exporter whose scale covers all data in a storage
+
+        Args:
+            storage (:class:`~pde.storage.base.StorageBase`):
+                The storage containing the data
+            source (int, optional):
+                Index of the field that is shown when a
+                :class:`~pde.fields.FieldCollection` is exported
+            \\**kwargs:
+                Additional arguments are forwarded to the constructor
+
+        Returns:
+            :class:`FrameExporter`
+        """
+        vmin, vmax = np.inf, -np.inf
+        for field in storage:
+            if source is not None:
+                field = field[source]  # type: ignore
+            data = field.get_image_data()['data']
+            vmin = min(vmin, np.nanmin(data))
+            vmax = max(vmax, np.nanmax(data))
+        return cls((vmin, vmax), source=source, **kwargs)
+
+
+    def get_rgb(self, field: FieldBase) -> np.ndarray:
+        """ return the color-mapped image of a field
+
+        Args:
+            field (:class:`~pde.fields.base.FieldBase`):
+                The field that is converted to an image
+
+        Returns:
+            :class:`numpy.ndarray`: The image as an array of unsigned bytes with
+            shape `(height, width, 3)`
+        """
+        if self.source is not None:
+            field = field[self.source]  # type: ignore
+        data = field.get_image_data()['data']
+        if self.downsample > 1:
+            data = data[::self.downsample, ::self.downsample]
+
+        # map the values to the indices of the lookup table
+        num = len(self.lut)
+        scale = num / (self.vmax - self.vmin) if self.vmax > self.vmin else 0
+        indices = ((data - self.vmin) * scale).astype(np.intp, copy=False)
+        np.clip(indices, 0, num - 1, out=indices)
+
+        # the first row of the image data is located at the bottom
+        return self.lut[indices[::-1]]  # type: ignore
+
+
+    def write_pngs(self, storage: StorageBase, path: Union[str, Path],
+                   progress: bool = False) -> None:
+        """ write all frames of a storage as PNG files
+
+        Args:
+            storage (:class:`~pde.storage.base.StorageBase`):
+                The storage containing the data
+            path (str):
+                Pattern of the file names, which is formatted with the index of
+                the frame, e.g., `frames/frame_{:05d}.png`
+            progress (bool):
+                Flag determining whether the progress is shown
+        """
+        ensure_directory_exists(Path(str(path).format(0)).parent)
+        frames = enumerate(storage)
+        if progress:
+            frames = display_progress(frames, total=len(storage))
+        for i, field in frames:
+            write_png(str(path).format(i), self.get_rgb(field))
+
+
+    def write_raw(self, storage: StorageBase, stream: BinaryIO,
+                  progress: bool = False) -> Tuple[int, int]:
+        """ write all frames of a storage as raw RGB data to a stream
+
+        Args:
+            storage (:class:`~pde.storage.base.StorageBase`):
+                The storage containing the data
+            stream:
+                A binary stream, e.g., the standard input of `ffmpeg`
+            progress (bool):
+                Flag determining whether the progress is shown
+
+        Returns:
+            tuple: The width and height of the frames
+        """
+        frames = iter(storage)
+        if progress:
+            frames = display_progress(frames, total=len(storage))
+        size = (0, 0)
+        for field in frames:
+            image = self.get_rgb(field)
+            size = (image.shape[1], image.shape[0])
+            stream.write(image.tobytes())
+        return size
+
+
+    def write_movie(self, storage: StorageBase, filename: Union[str, Path],
+                    framerate: float = 30,
+                    codec: str = 'h264',
+                    progress: bool = False) -> None:
+        """ write all frames of a storage to a movie using `ffmpeg`
+
+        Args:
+            storage (:class:`~pde.storage.base.StorageBase`):
+                The storage containing the data
+            filename (str):
+                The filename of the movie
+            framerate (float):
+                The number of frames per second
+            codec (str):
+                The video codec used by `ffmpeg`
+            progress (bool):
+                Flag determining whether the progress is shown
+        """
+        from .movies import _ffmpeg_writer
+
+        height, width, _ = self.get_rgb(storage[0]).shape  # type: ignore
+        with _ffmpeg_writer(filename, (width, height), pix_fmt='rgb24',
+                            framerate=framerate, codec=codec) as stream:
+            self.write_raw(storage, stream, progress=progress)
@@ -8,16 +8,26 @@ Functions for creating movies of simulation results
    Movie
    movie_scalar
    movie_multiple
+   movie_parallel
    
    
 .. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
 '''
 
-from typing import Dict, Any
+import multiprocessing as mp
+import subprocess
+import tempfile
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Any, Deque, Iterator, List, Tuple, BinaryIO
+
+import numpy as np
 
 from .plotting import ScalarFieldPlot, ScaleData
 from ..storage.base import StorageBase
 from ..tools.docstrings import fill_in_docstring
+from ..tools.misc import display_progress
 
 
     
@@ -190,3 +200,231 @@ def movie_multiple(storage: StorageBase,
                                         scale=scale)
     plot.make_movie(storage, filename, progress=progress)
 
+    
+    
+_worker_plot: Dict[str, Any] = {}  # the data of a process rendering frames
+
+
+def _init_render_worker(storage: StorageBase, quantities, tight: bool,
+                        dpi: float = None) -> None:
+    """ initialize a process that renders frames of a movie
+    
+    Args:
+        storage (:class:`~pde.storage.base.StorageBase`):
+            The storage instance that contains all the data for the movie
+        quantities (list): The quantities shown in the movie
+        tight (bool): Whether to use a tight layout
+        dpi (float): The resolution of the frames
+    """
+    import matplotlib
+    matplotlib.use('agg', force=True)  # render without a display
+    
+    plot = ScalarFieldPlot(storage[0], quantities, tight=tight, show=False)
+    if dpi is not None:
+        plot.fig.set_dpi(dpi)
+    _worker_plot['storage'] = storage
+    _worker_plot['plot'] = plot
+    
+
+
+def _render_frames(indices: range) -> Tuple[Tuple[int, int], List[bytes]]:
+    """ render several frames of a movie
+    
+    Args:
+        indices (range): The indices of the frames in the storage
+        
+    Returns:
+        tuple: The width and height of the frames and a list with the raw RGBA
+        data of all frames
+    """
+    storage = _worker_plot['storage']
+    plot = _worker_plot['plot']
+    frames = []
+    for i in indices:
+        plot.update(storage[i], title=f'Time {storage.times[i]:g}')
+        plot.fig.canvas.draw()
+        frames.append(np.asarray(plot.fig.canvas.buffer_rgba()).tobytes())
+    return plot.fig.canvas.get_width_height(), frames
+
+
+
+def _iter_rendered_frames(storage: StorageBase,
+                          quantities,
+                          num_processes: int = None,
+                          chunk_size: int = 16,
+                          tight: bool = False,
+                          dpi: float = None) \
+        -> Iterator[Tuple[Tuple[int, int], bytes]]:
+    """ render the frames of a movie in parallel and yield them in order
+    
+    Args:
+        storage (:class:`~pde.storage.base.StorageBase`):
+            The storage instance that contains all the data for the movie
+        quantities (list): The prepared quantities shown in the movie
+        num_processes (int): The number of processes rendering frames
+        chunk_size (int): The number of frames that a process renders at once
+        tight (bool): Whether to use a tight layout
+        dpi (float): The resolution of the frames
+        
+    Yields:
+        tuple: The width and height of the frame and its raw RGBA data
+    """
+    if num_processes is None:
+        num_processes = mp.cpu_count()
+    chunks = [range(start, min(start + chunk_size, len(storage)))
+              for start in range(0, len(storage), chunk_size)]
+    
+    # release open files, so the processes can read the storage independently
+    if hasattr(storage, 'close'):
+        storage.close()  # type: ignore
+        
+    if 'fork' in mp.get_all_start_methods():
+        ctx = mp.get_context('fork')
+    else:
+        ctx = mp.get_context()
+    # limit the number of chunks that are rendered but not yet consumed, since
+    # the raw frames require a lot of memory
+    max_pending = 2 * num_processes
+    chunks_iter = iter(chunks)
+    with ctx.Pool(num_processes, initializer=_init_render_worker,
+                  initargs=(storage, quantities, tight, dpi)) as pool:
+        pending: Deque = deque(pool.apply_async(_render_frames, (chunk,))
+                               for chunk in islice(chunks_iter, max_pending))
+        while pending:
+            # the results are retrieved in order while rendering continues
+            size, frames = pending.popleft().get()
+            chunk = next(chunks_iter, None)
+            if chunk is not None:
+                pending.append(pool.apply_async(_render_frames, (chunk,)))
+            for frame in frames:
+                yield size, frame
+
+
+
+@contextmanager
+def _ffmpeg_writer(filename: str, size: Tuple[int, int],
+                   pix_fmt: str = 'rgba',
+                   framerate: float = 30,
+                   codec: str = 'h264') -> Iterator[BinaryIO]:
+    """ start `ffmpeg` to encode raw frames that are written to a stream
+    
+    Args:
+        filename (str): The filename to which the movie is written
+        size (tuple): The width and height of the frames
+        pix_fmt (str): The pixel format of the raw frames, e.g., `rgba`
+        framerate (float): The number of frames per second
+        codec (str): The video codec used by `ffmpeg`
+        
+    Yields:
+        The binary stream to which the raw data of the frames is written
+        
+    Raises:
+        RuntimeError: if `ffmpeg` fails. The message then contains the output
+        that `ffmpeg` wrote to its standard error stream.
+    """
+    import matplotlib as mpl
+    
+    width, height = size
+    args = [mpl.rcParams['animation.ffmpeg_path'], '-y',
+            '-f', 'rawvideo', '-pix_fmt', pix_fmt,
+            '-s', f'{width}x{height}', '-r', str(framerate),
+            '-i', 'pipe:', '-vcodec', codec,
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-pix_fmt', 'yuv420p', str(filename)]
+    
+    # the error output is collected in a file since a pipe could fill up and
+    # block ffmpeg while we are still writing frames
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(args, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=stderr)
+        broken_pipe = False
+        try:
+            yield process.stdin  # type: ignore
+        except BrokenPipeError:
+            broken_pipe = True  # ffmpeg stopped early, which is handled below
+        finally:
+            try:
+                process.stdin.close()  # type: ignore
+            except BrokenPipeError:
+                broken_pipe = True
+            returncode = process.wait()
+            
+        if returncode != 0 or broken_pipe:
+            stderr.seek(0)
+            output = stderr.read().decode(errors='replace').strip()
+            raise RuntimeError(f'ffmpeg failed to write `{filename}` '
+                               f'(exit code {returncode}):\n{output}')
+
+
+
+@fill_in_docstring
+def movie_parallel(storage: StorageBase,
+                   filename: str,
+                   quantities=None,
+                   scale: ScaleData = 'automatic',
+                   num_processes: int = None,
+                   chunk_size: int = 16,
+                   framerate: float = 30,
+                   dpi: float = None,
+                   codec: str = 'h264',
+                   tight: bool = False,
+                   progress: bool = True) -> None:
+    """ produce a movie rendering frames in parallel
+    
+    The frames are split into chunks, which are rendered by a pool of processes
+    that each use their own
+    :class:`~pde.visualization.plotting.ScalarFieldPlot`. The rendered frames
+    are streamed in order to `ffmpeg`, so they never need to be kept in memory
+    at the same time. Every process reads the data it needs from the storage,
+    so a :class:`~pde.storage.file.FileStorage` does not need to be loaded into
+    memory.
+    
+    Args:
+        storage (:class:`~pde.storage.base.StorageBase`):
+            The storage instance that contains all the data for the movie
+        filename (str):
+            The filename to which the movie is written. The extension determines
+            the format used.
+        quantities:
+            {ARG_PLOT_QUANTITIES}
+        scale (str, float, tuple of float):
+            {ARG_PLOT_SCALE}
+        num_processes (int, optional):
+            The number of processes rendering frames. If `None`, the number of
+            CPUs is used.
+        chunk_size (int):
+            The number of consecutive frames that a process renders at once
+        framerate (float):
+            The number of frames per second
+        dpi (float):
+            The resolution of the resulting movie
+        codec (str):
+            The video codec used by `ffmpeg`
+        tight (bool):
+            Whether to call :func:`matplotlib.pyplot.tight_layout`. This affects
+            the layout of all plot elements.
+        progress (bool):
+            Flag determining whether the progress of making the movie is shown.
+    """
+    if not Movie.is_available():
+        raise RuntimeError('FFMpeg is not available. See ffmpeg.org for how to '
+                           'install it properly on your system.')
+    quantities = ScalarFieldPlot._prepare_storage_quantities(storage,
+                                                             quantities, scale)
+    
+    frames = _iter_rendered_frames(storage, quantities,
+                                   num_processes=num_processes,
+                                   chunk_size=chunk_size, tight=tight, dpi=dpi)
+    if progress:
+        frames = display_progress(frames, total=len(storage))
+        
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        return  # there are no frames to write
+    size, frame = first
+    with _ffmpeg_writer(filename, size, pix_fmt='rgba', framerate=framerate,
+                        codec=codec) as stream:
+        stream.write(frame)
+        for _, frame in frames:
+            stream.write(frame)
@@ -192,6 +192,36 @@ class ScalarFieldPlot():
         """
         fields = storage[0]
         assert isinstance(fields, FieldBase)
+        quantities = cls._prepare_storage_quantities(storage, quantities, scale)
+            
+        # actually setup 
+        return cls(fields,  # lgtm [py/call-to-non-callable]
+                   quantities,
+                   tight=tight, show=show)
+        
+        
+    @classmethod
+    @fill_in_docstring
+    def _prepare_storage_quantities(cls, storage: StorageBase,
+                                    quantities=None,
+                                    scale: ScaleData = 'automatic') \
+            -> List[List[Dict[str, Any]]]:
+        """ prepare quantities, resolving automatic scales using all data
+        
+        Args:
+            storage (:class:`~pde.storage.base.StorageBase`):
+                Instance of the storage class that contains the data
+            quantities:
+                {ARG_PLOT_QUANTITIES}
+            scale (str, float, tuple of float):
+                {ARG_PLOT_SCALE}
+        
+        Returns:
+            list of list of dict: a 2d arrangements of panels that define what
+                quantities are shown.
+        """
+        fields = storage[0]
+        assert isinstance(fields, FieldBase)
         
         # prepare the data that needs to be plotted
         quantities = cls._prepare_quantities(fields,
@@ -209,11 +239,8 @@ class ScalarFieldPlot():
                         vmin = np.nanmin([np.nanmin(img['data']), vmin])
                         vmax = np.nanmax([np.nanmax(img['data']), vmax])
                     quantity['scale'] = (vmin, vmax)
-            
-        # actually setup 
-        return cls(fields,  # lgtm [py/call-to-non-callable]
-                   quantities,
-                   tight=tight, show=show)
+                    
+        return quantities
         
         
     @staticmethod
@@ -0,0 +1,70 @@
+'''
+.. codeauthor:: David Zwicker <david.zwicker@ds.mpg.de>
+'''
+
+import io
+
+import numpy as np
+import pytest
+
+from .. import frames
+from ..movies import Movie
+from ...grids import UnitGrid
+from ...fields import ScalarField, FieldCollection
+from ...storage import MemoryStorage
+
+
+
+def test_frame_exporter(tmp_path):
+    """ test exporting color-mapped frames """
+    import matplotlib.cm as cm
+    import matplotlib.image as mpimg
+    
+    grid = UnitGrid([8, 6])
+    fields = [ScalarField.random_uniform(grid) for _ in range(3)]
+    storage = MemoryStorage.from_fields([0, 1, 2], fields)
+    exporter = frames.FrameExporter.from_storage(storage)
+    assert exporter.vmin == min(f.data.min() for f in fields)
+    
+    # compare colors to matplotlib
+    rgb = exporter.get_rgb(fields[0])
+    assert rgb.shape == (6, 8, 3)
+    norm = (fields[0].data - exporter.vmin) / (exporter.vmax - exporter.vmin)
+    expect = cm.viridis(norm.T[::-1])[..., :3] * 255
+    np.testing.assert_allclose(rgb, expect, atol=2)
+    
+    # write PNG files
+    path = tmp_path / 'frames' / 'frame_{:02d}.png'
+    exporter.write_pngs(storage, path)
+    img = mpimg.imread(str(path).format(1))
+    np.testing.assert_allclose(img[..., :3] * 255,
+                               exporter.get_rgb(fields[1]), atol=0.5)
+    
+    # write raw frames with downsampling
+    exporter = frames.FrameExporter((0, 1), cmap='gray', downsample=2)
+    stream = io.BytesIO()
+    assert exporter.write_raw(storage, stream) == (4, 3)
+    assert len(stream.getvalue()) == 3 * 4 * 3 * 3
+    
+    # select a field from a collection
+    fc = FieldCollection([fields[0], fields[1]])
+    exporter = frames.FrameExporter((0, 1), source=1)
+    expect = frames.FrameExporter((0, 1)).get_rgb(fields[1])
+    np.testing.assert_array_equal(exporter.get_rgb(fc), expect)
+    
+    
+    
+@pytest.mark.skipif(not Movie.is_available(), reason='no ffmpeg')
+def test_frame_exporter_movie(tmp_path):
+    """ test writing color-mapped frames to a movie """
+    grid = UnitGrid([8, 6])
+    fields = [ScalarField.random_uniform(grid) for _ in range(3)]
+    storage = MemoryStorage.from_fields([0, 1, 2], fields)
+    exporter = frames.FrameExporter.from_storage(storage)
+    
+    path = tmp_path / 'movie.mov'
+    exporter.write_movie(storage, path)
+    assert path.stat().st_size > 0
+    
+    with pytest.raises(RuntimeError, match='ffmpeg failed'):
+        exporter.write_movie(storage, path, codec='unknown-codec')
@@ -9,6 +9,7 @@ from ...grids import UnitGrid
 from ...fields import ScalarField
 from ...storage import MemoryStorage
 from ...pdes import DiffusionPDE
+from ..plotting import ScalarFieldPlot
 
 
 
@@ -55,3 +56,52 @@ def test_movie_scalar(tmp_path):
         pass  # can happen when ffmpeg is not installed
     else:
         assert path.stat().st_size > 0
+
+
+
+def test_render_frames_parallel(tmp_path):
+    """ test rendering frames of a movie in parallel """
+    state = ScalarField.random_uniform(UnitGrid([16, 16]))
+    storage = MemoryStorage()
+    tracker = storage.tracker(interval=1)
+    DiffusionPDE().solve(state, t_range=4, dt=1e-2, backend='numpy',
+                         tracker=tracker)
+    
+    quantities = ScalarFieldPlot._prepare_storage_quantities(storage)
+    frames = list(movies._iter_rendered_frames(storage, quantities,
+                                               num_processes=2, chunk_size=2))
+    assert len(frames) == len(storage)
+    
+    # compare to frames rendered serially
+    movies._init_render_worker(storage, quantities, tight=False)
+    for i in [0, 3]:
+        size, data = movies._render_frames(range(i, i + 1))
+        assert frames[i][0] == size
+        assert frames[i][1] == data[0]
+    assert frames[0][1] != frames[3][1]
+    
+    # only a few chunks are rendered ahead of the consumed frames
+    frames_seq = movies._iter_rendered_frames(storage, quantities,
+                                              num_processes=1, chunk_size=1)
+    assert list(frames_seq) == frames
+    
+    
+
+@pytest.mark.skipif(not movies.Movie.is_available(), reason='no ffmpeg')
+def test_movie_parallel(tmp_path):
+    """ test creating a movie from frames rendered in parallel """
+    state = ScalarField.random_uniform(UnitGrid([16, 16]))
+    storage = MemoryStorage()
+    tracker = storage.tracker(interval=1)
+    DiffusionPDE().solve(state, t_range=4, dt=1e-2, backend='numpy',
+                         tracker=tracker)
+    
+    path = tmp_path / "test_movie_parallel.mov"
+    movies.movie_parallel(storage, filename=path, num_processes=2,
+                          chunk_size=2, progress=False)
+    assert path.stat().st_size > 0
+    
+    # errors of ffmpeg are reported
+    with pytest.raises(RuntimeError, match='ffmpeg failed'):
+        movies.movie_parallel(storage, filename=path, num_processes=2,
+                              codec='unknown-codec', progress=False)